@@ -0,0 +1,76 @@
+"""Compare loading processed data from processed_data.csv with the columnar cache, each in a fresh process.
+
+Usage: python -m benchmarks.columnar_benchmark --repeat 3
+"""
+import argparse
+from benchmarks.startup_benchmark import run_scenario
+from src.database.columnar_cache import ColumnarDataset
+
+TRAINING_COLUMNS = [
+    'distance_km', 'delivery_priority', 'package_weight', 'traffic_impact', 'weather_impact',
+    'average_delivery_time', 'actual_delivery_time'
+]
+ROUTING_COLUMNS = [
+    'order_id', 'customer_location', 'latitude', 'longitude', 'actual_delivery_time', 'package_weight',
+    'traffic_impact', 'weather_impact', 'vehicle_id'
+]
+
+SCENARIOS = {
+    'training csv': (
+        "import pandas as pd, numpy as np\n"
+        "from src.database.columnar_cache import CSV_PATH\n"
+        "df = pd.read_csv(CSV_PATH)\n"
+        "df['actual_delivery_time'] = pd.to_datetime(df['actual_delivery_time']).astype(np.int64) // 10**9\n"
+        "df['delivery_priority'] = pd.Categorical(df['delivery_priority']).codes\n"
+        "df = df[{training!r}]"
+    ),
+    'training columnar': (
+        "from src.database.columnar_cache import ColumnarDataset\n"
+        "df = ColumnarDataset().read({training!r}, encoded=True)"
+    ),
+    'routing csv': (
+        "import pandas as pd\n"
+        "from src.database.columnar_cache import CSV_PATH\n"
+        "df = pd.read_csv(CSV_PATH, usecols={routing!r})"
+    ),
+    'routing columnar': (
+        "from src.database.columnar_cache import ColumnarDataset\n"
+        "df = ColumnarDataset().read({routing!r})"
+    ),
+    'last day csv': (
+        "import pandas as pd\n"
+        "from src.database.columnar_cache import CSV_PATH\n"
+        "df = pd.read_csv(CSV_PATH, usecols={training!r})\n"
+        "delivered = pd.to_datetime(df['actual_delivery_time'])\n"
+        "df = df[delivered.dt.normalize() >= pd.Timestamp({last_day!r})]"
+    ),
+    'last day columnar': (
+        "from src.database.columnar_cache import ColumnarDataset\n"
+        "df = ColumnarDataset().read({training!r}, start={last_day!r}, encoded=True)"
+    ),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    dataset = ColumnarDataset.open()
+    if dataset is None:
+        raise SystemExit("Run the ETL first; there is no columnar build yet")
+    print(f"build {dataset.build}: {dataset.rows:,} rows in {len(dataset.partitions)} date partitions")
+    print(f"{'scenario':>18} {'in_proc_s':>10} {'rss_mb':>8}")
+    for name, code in SCENARIOS.items():
+        result = run_scenario(
+            code.format(training=TRAINING_COLUMNS, routing=ROUTING_COLUMNS, last_day=max(dataset.partitions)),
+            args.repeat
+        )
+        if 'error' in result:
+            print(f"{name:>18} failed: {result['error']}")
+            continue
+        print(f"{name:>18} {result['elapsed_s']:>10.3f} {result['peak_rss_mb']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Compare the published version's exported tree arrays with its pickled framework model: startup, memory, latency and agreement.
+
+Usage: python -m benchmarks.compiled_inference_benchmark --rows 20000 --single 500
+"""
+import argparse
+import os
+import pickle
+import statistics
+import time
+import numpy as np
+import pandas as pd
+from benchmarks.startup_benchmark import run_scenario
+from src.models.compiled_trees import CompiledTreeEnsemble
+from src.models.model_registry import COMPILED_DIR, MODEL_FILE, ModelRegistry
+from src.models.prediction import FEATURE_COLUMNS
+
+ARTIFACTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'models', 'artifacts')
+
+STARTUP = {
+    'framework': (
+        "import pickle, pandas as pd\n"
+        "model = pickle.load(open({path!r}, 'rb'))\n"
+        "model.predict(pd.DataFrame([[100.0, 2, 10.0, 1.2, 1.1, 3600.0]], columns={columns!r}))"
+    ),
+    'compiled': (
+        "import pandas as pd\n"
+        "from src.models.compiled_trees import CompiledTreeEnsemble\n"
+        "model = CompiledTreeEnsemble.load({path!r}, mmap_mode='r')\n"
+        "model.predict(pd.DataFrame([[100.0, 2, 10.0, 1.2, 1.1, 3600.0]], columns={columns!r}))"
+    ),
+}
+
+
+def make_features(num_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'distance_km': rng.uniform(0, 2500, num_rows),
+        'delivery_priority': rng.integers(0, 3, num_rows),
+        'package_weight': rng.uniform(1, 50, num_rows),
+        'traffic_impact': rng.choice([1.0, 1.2, 1.4], num_rows),
+        'weather_impact': rng.choice([1.0, 1.1, 1.3, 1.5], num_rows),
+        'average_delivery_time': rng.uniform(0, 2.6e6, num_rows),
+    }, columns=FEATURE_COLUMNS)
+
+
+def time_model(model, features, single):
+    """Median single-row latency in ms and batch throughput in rows/s"""
+    latencies = []
+    for i in range(single):
+        start = time.perf_counter()
+        model.predict(features.iloc[i:i + 1])
+        latencies.append((time.perf_counter() - start) * 1000)
+    start = time.perf_counter()
+    predictions = model.predict(features)
+    return statistics.median(latencies), len(features) / (time.perf_counter() - start), predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--single', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3, help='fresh processes per startup measurement')
+    args = parser.parse_args()
+
+    version = ModelRegistry(ARTIFACTS_DIR, keep_versions=1).current_version()
+    if version is None:
+        raise SystemExit(f"Train a supported tree ensemble first; nothing published in {ARTIFACTS_DIR}")
+    paths = {
+        'framework': os.path.join(ARTIFACTS_DIR, version, MODEL_FILE),
+        'compiled': os.path.join(ARTIFACTS_DIR, version, COMPILED_DIR),
+    }
+    if not os.path.isdir(paths['compiled']):
+        raise SystemExit(
+            f"Version {version} has no compiled trees; its model is not a supported tree ensemble or was faster pickled"
+        )
+
+    with open(paths['framework'], 'rb') as f:
+        models = {'framework': pickle.load(f), 'compiled': CompiledTreeEnsemble.load(paths['compiled'], mmap_mode='r')}
+    features = make_features(args.rows)
+
+    print(f"model: {type(models['framework']).__name__}, {len(models['compiled'].roots)} trees")
+    print(f"{'path':>10} {'startup_s':>10} {'rss_mb':>8} {'row_ms':>8} {'rows/s':>12}  backends loaded")
+    predictions = {}
+    for name, model in models.items():
+        startup = run_scenario(
+            STARTUP[name].format(path=os.path.abspath(paths[name]), columns=FEATURE_COLUMNS), args.repeat
+        )
+        row_ms, throughput, predictions[name] = time_model(model, features, args.single)
+        print(f"{name:>10} {startup.get('elapsed_s', float('nan')):>10.3f} {startup.get('peak_rss_mb', float('nan')):>8.1f} "
+              f"{row_ms:>8.3f} {throughput:>12,.0f}  {', '.join(startup.get('loaded', [])) or '-'}")
+
+    difference = np.abs(predictions['compiled'] - predictions['framework'])
+    print(f"max |compiled - framework| = {difference.max():.6g} "
+          f"(relative {difference.max() / max(np.abs(predictions['framework']).max(), 1.0):.2e})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Compare the NumPy savings heuristic with the OR-Tools solver on identical instances.
+
+Usage: python -m benchmarks.heuristic_benchmark --stops 100 300 1000 --seconds 10
+"""
+import argparse
+import os
+import tempfile
+import time
+from src.models.route_heuristics import route_cost, solve_savings_heuristic
+from src.models.route_optimization import RouteOptimization
+from benchmarks.vrp_benchmark import make_instance
+
+
+def run_heuristic(optimizer, data):
+    """Time the savings heuristic and score it with the solver's arc costs"""
+    settings = optimizer.config['route_optimization']
+    start = time.perf_counter()
+    routes = solve_savings_heuristic(data, settings['time_window'], settings['max_waiting_time'])
+    elapsed = time.perf_counter() - start
+    if routes is None:
+        return {'elapsed_s': round(elapsed, 3), 'objective': None, 'vehicles_used': None}
+    return {
+        'elapsed_s': round(elapsed, 3),
+        'objective': sum(route_cost(route, data['distance_matrix'], data['depot']) for route in routes),
+        'vehicles_used': sum(1 for route in routes if route)
+    }
+
+
+def run_ortools(optimizer, data, seconds):
+    """Time a full OR-Tools solve on the same data model"""
+    start = time.perf_counter()
+    manager, routing = optimizer._create_routing_model(data)
+    optimizer._register_callbacks(routing, manager, data)
+    solution = optimizer._solve_with_optimized_parameters(routing, seconds, mode='benchmark')
+    elapsed = time.perf_counter() - start
+    if not solution:
+        return {'elapsed_s': round(elapsed, 3), 'objective': None, 'vehicles_used': None}
+    node_routes = optimizer._extract_node_routes(solution, routing, manager)
+    return {
+        'elapsed_s': round(elapsed, 3),
+        'objective': solution.ObjectiveValue(),
+        'vehicles_used': sum(1 for nodes in node_routes if len(nodes) > 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stops', type=int, nargs='+', default=[100, 300, 1000])
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{'stops':>6} {'solver':>10} {'time_s':>8} {'objective':>10} {'vehicles':>9} {'gap':>8}")
+    # OR-Tools runs record search curves; keep them out of the production telemetry
+    with tempfile.TemporaryDirectory() as telemetry_dir:
+        for num_stops in args.stops:
+            optimizer = RouteOptimization()
+            settings = optimizer.config['route_optimization']
+            settings['telemetry_file'] = os.path.join(telemetry_dir, 'solver_telemetry.jsonl')
+            # The instance's fleet grows with its demand, so 1000 stops stay feasible for both solvers
+            delivery_df = make_instance(num_stops, seed=42, capacity=settings['max_capacity'])
+            settings['max_vehicles'] = max(settings['max_vehicles'], delivery_df['vehicle_id'].nunique())
+            optimizer._use_settings(settings)
+            optimizer.delivery_df = delivery_df
+            data = optimizer._create_data_model_optimized(optimizer._create_distance_matrix_vectorized())
+
+            heuristic = run_heuristic(optimizer, data)
+            ortools = run_ortools(optimizer, data, args.seconds)
+            for name, result in (('heuristic', heuristic), ('ortools', ortools)):
+                gap = ''
+                if name == 'heuristic' and heuristic['objective'] and ortools['objective']:
+                    gap = f"{(heuristic['objective'] - ortools['objective']) / ortools['objective']:+.1%}"
+                print(f"{num_stops:>6} {name:>10} {result['elapsed_s']:>8} {str(result['objective']):>10} "
+                      f"{str(result['vehicles_used']):>9} {gap:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Compare per-order prediction with vectorized batch prediction on the saved model.
+
+Usage: python -m benchmarks.prediction_benchmark --orders 20000 --single 500
+"""
+import argparse
+import time
+import numpy as np
+from src.models.prediction import PRIORITY_CODES, PredictionModel
+from src.database.data_engineering import TRAFFIC_IMPACT, WEATHER_IMPACT
+
+
+def make_orders(num_orders, locations, seed=42):
+    """Raw order fields as column lists, the shape the API hands to build_features"""
+    rng = np.random.default_rng(seed)
+    return {
+        'customer_location': rng.choice(locations, num_orders).tolist(),
+        'delivery_priority': rng.choice(list(PRIORITY_CODES), num_orders).tolist(),
+        'package_weight': rng.uniform(1, 50, num_orders).tolist(),
+        'latitude': (41.8781 + rng.uniform(-0.1, 0.1, num_orders)).tolist(),
+        'longitude': (-87.6298 + rng.uniform(-0.1, 0.1, num_orders)).tolist(),
+        'traffic_condition': rng.choice(list(TRAFFIC_IMPACT), num_orders).tolist(),
+        'weather_condition': rng.choice(list(WEATHER_IMPACT), num_orders).tolist(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--single', type=int, default=500, help='orders timed through the one-at-a-time path')
+    parser.add_argument('--chunk-size', type=int, default=8192)
+    args = parser.parse_args()
+
+    model = PredictionModel()
+    model.load()
+    orders = make_orders(args.orders, ['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix'])
+
+    # Warm up the feature lookups and the model outside the timed regions
+    model.predict(model.build_features(*[[values[0]] for values in orders.values()]))
+
+    start = time.perf_counter()
+    for i in range(args.single):
+        model.predict(model.build_features(*[[values[i]] for values in orders.values()]))
+    single_rate = args.single / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    model.predict_batch(model.build_features(*orders.values()), args.chunk_size)
+    batch_rate = args.orders / (time.perf_counter() - start)
+
+    print(f"single: {single_rate:>12,.0f} orders/s")
+    print(f"batch:  {batch_rate:>12,.0f} orders/s ({batch_rate / single_rate:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
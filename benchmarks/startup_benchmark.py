@@ -0,0 +1,89 @@
+"""Measure import time, cold-start latency and memory of the prediction stack in fresh processes.
+
+Usage: python -m benchmarks.startup_benchmark --repeat 5 [--model-path path/to/model.pkl]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), '..')
+HEAVY_MODULES = ('tensorflow', 'catboost', 'xgboost', 'lightgbm', 'sklearn', 'ortools')
+
+PRELUDE = """
+import json, resource, sys, time
+start = time.perf_counter()
+"""
+EPILOGUE = """
+print(json.dumps({
+    'elapsed_s': time.perf_counter() - start,
+    'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'loaded': [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+SCENARIOS = {
+    'import prediction': "import src.models.prediction",
+    'construct PredictionModel': (
+        "from src.models.prediction import PredictionModel\n"
+        "PredictionModel()"
+    ),
+    'cold start: load + predict': (
+        "import pandas as pd\n"
+        "from src.models.prediction import PredictionModel, FEATURE_COLUMNS\n"
+        "model = PredictionModel()\n"
+        "model.load({model_path!r})\n"
+        "model.predict(pd.DataFrame([[100.0, 2, 10.0, 1.2, 1.1, 3600.0]], columns=FEATURE_COLUMNS))"
+    ),
+    'import api': "import src.api.main",
+}
+
+
+def run_scenario(code, repeat):
+    """Median in-process time, median whole-process wall time and peak RSS over fresh interpreters"""
+    results = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, '-c', PRELUDE + code + EPILOGUE], cwd=REPO_ROOT, capture_output=True, text=True
+        )
+        wall = time.perf_counter() - start
+        if completed.returncode != 0:
+            return {'error': completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'failed'}
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        result['process_s'] = wall
+        results.append(result)
+    return {
+        'elapsed_s': statistics.median(result['elapsed_s'] for result in results),
+        'process_s': statistics.median(result['process_s'] for result in results),
+        'peak_rss_mb': max(result['peak_rss_mb'] for result in results),
+        'loaded': results[-1]['loaded'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--model-path', help='pickle to load instead of the published model version')
+    args = parser.parse_args()
+    model_path = os.path.abspath(args.model_path) if args.model_path else None
+    artifact = args.model_path or os.path.join(REPO_ROOT, 'src', 'models', 'artifacts', 'CURRENT')
+
+    print(f"{'scenario':>28} {'in_proc_s':>10} {'process_s':>10} {'rss_mb':>8}  backends loaded")
+    for name, code in SCENARIOS.items():
+        if '{model_path' in code and not os.path.exists(artifact):
+            print(f"{name:>28} skipped: no model artifact at {artifact}")
+            continue
+        result = run_scenario(code.format(model_path=model_path), args.repeat)
+        if 'error' in result:
+            print(f"{name:>28} failed: {result['error']}")
+            continue
+        print(f"{name:>28} {result['elapsed_s']:>10.3f} {result['process_s']:>10.3f} "
+              f"{result['peak_rss_mb']:>8.1f}  {', '.join(result['loaded']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
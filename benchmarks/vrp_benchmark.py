@@ -0,0 +1,327 @@
+"""Reproducible RouteOptimization benchmark on synthetic instances, with a history and regression check.
+
+Usage: python -m benchmarks.vrp_benchmark run --stops 100 1000 5000 20000 --configs exact heuristic decomposed
+       python -m benchmarks.vrp_benchmark compare [--base COMMIT] [--head COMMIT] [--threshold 0.1]
+"""
+import argparse
+import functools
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from src.utils.geo import haversine_km, scale_to_int
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+HISTORY_PATH = os.path.join(RESULTS_DIR, 'vrp_history.jsonl')
+CSV_PATH = os.path.join(RESULTS_DIR, 'vrp_history.csv')
+REPO_ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+# Solver configurations as route_optimization overrides; max_stops skips sizes a mode cannot finish
+CONFIGURATIONS = {
+    'exact': {'overrides': {'solver_mode': 'exact'}, 'max_stops': 2000},
+    'heuristic': {'overrides': {'solver_mode': 'heuristic'}, 'max_stops': 5000},
+    'decomposed': {'overrides': {'solver_mode': 'decomposed'}, 'max_stops': 20000},
+    'portfolio': {'overrides': {'solver_mode': 'portfolio'}, 'max_stops': 1000},
+    'exact_distance_time': {'overrides': {'solver_mode': 'exact', 'travel_time_model': 'distance'}, 'max_stops': 2000},
+}
+
+# Above this many stops plans are scored arc by arc instead of on a dense matrix, which would not fit in memory
+DENSE_SCORING_MAX_STOPS = 5000
+
+# Metrics where a larger value on the head commit is a regression, with the noise floor for each
+METRIC_FLOORS = {
+    'matrix_build_s': 0.05,
+    'model_build_s': 0.05,
+    'first_solution_s': 0.05,
+    'solve_s': 0.5,
+    'peak_rss_mb': 20,
+    'objective': 0,
+    'vehicles_used': 0,
+}
+
+
+def make_instance(num_stops, seed, city='Chicago', capacity=1000, min_fleet=20):
+    """One shift of orders around a city from data_generator, run through the regular ETL preprocessing
+
+    Orders are spread over a fleet with 20% more capacity than their demand, and never fewer than
+    min_fleet vehicles, so every size is feasible.
+    """
+    from src.data.data_generator import generate_delivery_data
+    from src.database.data_engineering import DataEngineering
+
+    raw_df = generate_delivery_data(num_stops, seed=seed, cities=[city])
+    delivery_df = DataEngineering().preprocess_raw_data(raw_df)
+
+    # Generated delivery times span a month; re-time them into one planning shift so windows stay feasible
+    rng = np.random.default_rng(seed)
+    shift_start = pd.Timestamp('2024-01-01 08:00')
+    delivery_df['actual_delivery_time'] = shift_start + pd.to_timedelta(rng.integers(0, 300, num_stops), unit='m')
+    delivery_df['shift_start'] = shift_start
+    fleet = max(min_fleet, int(np.ceil(delivery_df['package_weight'].astype(np.int32).sum() * 1.2 / capacity)))
+    delivery_df['vehicle_id'] = [f'VEH-{vehicle:04d}' for vehicle in np.arange(num_stops) % fleet]
+    return delivery_df[[
+        'order_id', 'customer_location', 'latitude', 'longitude', 'actual_delivery_time',
+        'package_weight', 'traffic_impact', 'weather_impact', 'vehicle_id', 'shift_start'
+    ]].reset_index(drop=True)
+
+
+def arc_costs(delivery_df, scale, sources, targets):
+    """Scaled great-circle arc costs weighted by the destination's impacts, as the dense matrix holds them"""
+    coords = delivery_df[['latitude', 'longitude']].values
+    impacts = (delivery_df['traffic_impact'] * delivery_df['weather_impact']).values
+    km = haversine_km(coords[sources, 0], coords[sources, 1], coords[targets, 0], coords[targets, 1])
+    return np.rint(scale_to_int(km, scale) * impacts[targets]).astype(np.int64)
+
+
+def plan_objective(distance_model, node_routes, depot=0):
+    """Arc cost of depot-started node routes, on a dense matrix or an arc-cost function"""
+    paths = [np.array(nodes + [depot]) for nodes in node_routes if len(nodes) > 1]
+    if not paths:
+        return 0
+    sources = np.concatenate([path[:-1] for path in paths])
+    targets = np.concatenate([path[1:] for path in paths])
+    if isinstance(distance_model, np.ndarray):
+        return int(distance_model[sources, targets].astype(np.int64).sum())
+    return int(distance_model(sources, targets).sum())
+
+
+def run_once(num_stops, configuration, seed, seconds, telemetry_file):
+    """Solve one instance with one configuration and return its metrics; meant to run in a fresh process
+
+    Solver telemetry goes to telemetry_file, so benchmark curves never feed production time budgets.
+    """
+    from src.models.route_heuristics import solve_savings_heuristic
+    from src.models.route_optimization import RouteOptimization
+
+    optimizer = RouteOptimization()
+    settings = optimizer.config['route_optimization']
+    settings.update(
+        CONFIGURATIONS[configuration]['overrides'],
+        adaptive_time_limit=False, time_limit=seconds, telemetry_file=os.path.abspath(telemetry_file)
+    )
+    delivery_df = make_instance(num_stops, seed, capacity=settings['max_capacity'])
+    settings['max_vehicles'] = max(settings['max_vehicles'], delivery_df['vehicle_id'].nunique())
+    # Large exact and portfolio solves run decomposed, as they would in production
+    mode = optimizer._solve_mode(settings['solver_mode'], num_stops)
+    optimizer.delivery_df = delivery_df
+    optimizer._use_settings(settings)
+    metrics = {'model_build_s': None, 'first_solution_s': None, 'solved_as': mode}
+
+    # Plans are scored on the dense matrix, or arc by arc where a dense matrix would not fit
+    start = time.perf_counter()
+    if num_stops <= DENSE_SCORING_MAX_STOPS or mode == 'heuristic':
+        distance_model = optimizer._create_distance_matrix_vectorized()
+    else:
+        distance_model = functools.partial(arc_costs, delivery_df, settings['distance_scale'])
+    metrics['matrix_build_s'] = time.perf_counter() - start
+
+    if mode == 'exact':
+        start = time.perf_counter()
+        data = optimizer._create_data_model_optimized(distance_model)
+        manager, routing = optimizer._create_routing_model(data)
+        optimizer._register_callbacks(routing, manager, data)
+        metrics['model_build_s'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        monitor = optimizer._attach_search_monitor(routing)
+        solution = routing.SolveWithParameters(optimizer._search_parameters(seconds))
+        metrics['solve_s'] = time.perf_counter() - start
+        metrics['first_solution_s'] = monitor.curve[0][0] if monitor.curve else None
+        node_routes = optimizer._extract_node_routes(solution, routing, manager) if solution else None
+    elif mode == 'heuristic':
+        start = time.perf_counter()
+        data = optimizer._create_data_model_optimized(distance_model)
+        metrics['model_build_s'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        routes = solve_savings_heuristic(data, settings['time_window'], settings['max_waiting_time'])
+        metrics['solve_s'] = metrics['first_solution_s'] = time.perf_counter() - start
+        node_routes = [[data['depot']] + route for route in routes] if routes is not None else None
+    else:
+        # Decomposed and portfolio build their models inside worker processes, so only the total is timed
+        start = time.perf_counter()
+        routes = optimizer._solve_decomposed() if mode == 'decomposed' else optimizer._solve_portfolio()
+        metrics['solve_s'] = time.perf_counter() - start
+        node_of = {order_id: node for node, order_id in enumerate(optimizer.delivery_df['order_id'])}
+        node_routes = [[node_of[stop['order_id']] for stop in route['stops']] for route in routes] if routes else None
+
+    if node_routes is None:
+        metrics.update(status='no_solution', objective=None, vehicles_used=None)
+    else:
+        metrics.update(
+            status='ok',
+            objective=plan_objective(distance_model, node_routes),
+            vehicles_used=sum(1 for nodes in node_routes if len(nodes) > 1)
+        )
+    # ru_maxrss is in KiB on Linux; pool workers are reported separately as the largest child
+    metrics['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    metrics['worker_peak_rss_mb'] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return {key: round(value, 4) if isinstance(value, float) else value for key, value in metrics.items()}
+
+
+def git_commit():
+    """Short HEAD hash, suffixed with -dirty when the working tree has uncommitted changes"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f'{commit}-dirty' if dirty else commit
+
+
+def run_isolated(num_stops, configuration, seed, seconds, timeout):
+    """Run one benchmark in a child process so peak RSS and crashes are per run"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = os.path.join(tmp_dir, 'result.json')
+        command = [
+            sys.executable, '-m', 'benchmarks.vrp_benchmark', 'run-one',
+            '--stops', str(num_stops), '--config', configuration, '--seed', str(seed),
+            '--seconds', str(seconds), '--output', output_path
+        ]
+        try:
+            completed = subprocess.run(command, cwd=REPO_ROOT, timeout=timeout, capture_output=True, text=True)
+        except subprocess.TimeoutExpired:
+            return {'status': 'timeout'}
+        if completed.returncode != 0 or not os.path.exists(output_path):
+            print(completed.stderr[-2000:], file=sys.stderr)
+            return {'status': f'error ({completed.returncode})'}
+        with open(output_path) as f:
+            return json.load(f)
+
+
+def append_history(records):
+    """Append records to the JSON-lines history and regenerate the CSV view from it"""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(HISTORY_PATH, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+    load_history().to_csv(CSV_PATH, index=False)
+
+
+def load_history():
+    if not os.path.exists(HISTORY_PATH):
+        return pd.DataFrame()
+    with open(HISTORY_PATH) as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+
+def run(args):
+    commit = git_commit()
+    records = []
+    print(f"{'stops':>6} {'config':>20} {'status':>12} {'matrix_s':>9} {'model_s':>8} {'first_s':>8} "
+          f"{'solve_s':>8} {'objective':>11} {'vehicles':>9} {'rss_mb':>8}")
+    for num_stops in args.stops:
+        for configuration in args.configs:
+            if num_stops > CONFIGURATIONS[configuration]['max_stops'] and not args.force:
+                continue
+            result = run_isolated(num_stops, configuration, args.seed, args.seconds, args.timeout)
+            record = {
+                'recorded_at': datetime.now().isoformat(timespec='seconds'),
+                'commit': commit,
+                'stops': num_stops,
+                'configuration': configuration,
+                'seed': args.seed,
+                'seconds': args.seconds,
+                **result
+            }
+            records.append(record)
+            print(f"{num_stops:>6} {configuration:>20} {record['status']:>12} "
+                  + ' '.join(f"{str(record.get(key)):>{width}}" for key, width in (
+                      ('matrix_build_s', 9), ('model_build_s', 8), ('first_solution_s', 8), ('solve_s', 8),
+                      ('objective', 11), ('vehicles_used', 9), ('peak_rss_mb', 8))))
+    append_history(records)
+    print(f"\nRecorded {len(records)} runs for {commit} in {HISTORY_PATH}")
+
+
+def compare(args):
+    """Flag metrics that got worse by more than the threshold between two recorded commits"""
+    history = load_history()
+    if history.empty:
+        sys.exit(f"No benchmark history in {HISTORY_PATH}")
+    commits = list(dict.fromkeys(history['commit']))
+    head = args.head or commits[-1]
+    base = args.base or (commits[-2] if len(commits) > 1 else None)
+    if base is None or base not in commits or head not in commits:
+        sys.exit(f"Need two recorded commits to compare, have: {', '.join(commits)}")
+
+    # Median over repeated runs of the same commit, size and configuration
+    keys = ['stops', 'configuration']
+    metrics = [metric for metric in METRIC_FLOORS if metric in history]
+    summary = {
+        commit: history[history['commit'] == commit].groupby(keys).agg(
+            status=('status', 'last'), **{metric: (metric, 'median') for metric in metrics}
+        )
+        for commit in (base, head)
+    }
+    merged = summary[base].join(summary[head], lsuffix='_base', rsuffix='_head', how='inner')
+
+    regressions = []
+    for (num_stops, configuration), row in merged.iterrows():
+        if row['status_base'] == 'ok' and row['status_head'] != 'ok':
+            regressions.append((num_stops, configuration, 'status', row['status_base'], row['status_head']))
+            continue
+        for metric in metrics:
+            before, after = row[f'{metric}_base'], row[f'{metric}_head']
+            if pd.isna(before) or pd.isna(after):
+                continue
+            if after > before * (1 + args.threshold) and after - before > METRIC_FLOORS[metric]:
+                regressions.append((num_stops, configuration, metric, before, after))
+
+    print(f"Comparing {head} against {base} ({len(merged)} shared runs, threshold {args.threshold:.0%})")
+    for num_stops, configuration, metric, before, after in regressions:
+        change = f"{(after - before) / before:+.1%}" if isinstance(before, (int, float)) and before else ''
+        print(f"REGRESSION {num_stops:>6} {configuration:>20} {metric:>16}: {before} -> {after} {change}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='benchmark the current tree and append to the history')
+    run_parser.add_argument('--stops', type=int, nargs='+', default=[100, 500, 1000, 5000, 20000])
+    run_parser.add_argument('--configs', nargs='+', choices=list(CONFIGURATIONS), default=['exact', 'heuristic', 'decomposed'])
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--seconds', type=float, default=10)
+    run_parser.add_argument('--timeout', type=float, default=1800)
+    run_parser.add_argument('--force', action='store_true', help="also run sizes above a configuration's max_stops")
+
+    compare_parser = subparsers.add_parser('compare', help='flag regressions between two recorded commits')
+    compare_parser.add_argument('--base')
+    compare_parser.add_argument('--head')
+    compare_parser.add_argument('--threshold', type=float, default=0.1)
+
+    one_parser = subparsers.add_parser('run-one', help='single isolated run, used by run')
+    one_parser.add_argument('--stops', type=int, required=True)
+    one_parser.add_argument('--config', choices=list(CONFIGURATIONS), required=True)
+    one_parser.add_argument('--seed', type=int, required=True)
+    one_parser.add_argument('--seconds', type=float, required=True)
+    one_parser.add_argument('--output', required=True)
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    elif args.command == 'compare':
+        compare(args)
+    else:
+        # run writes the output into a scratch directory, which takes the telemetry as well
+        telemetry_file = os.path.join(os.path.dirname(os.path.abspath(args.output)), 'solver_telemetry.jsonl')
+        result = run_once(args.stops, args.config, args.seed, args.seconds, telemetry_file)
+        with open(args.output, 'w') as f:
+            json.dump(result, f)
+
+
+if __name__ == '__main__':
+    main()
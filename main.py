@@ -19,8 +19,8 @@ def main():
     print("2. Processing data...")
     data_engineer.preprocess_data()
     
-    print("3. Training prediction model...")
-    prediction_model.train_and_save_model()
+    print("3. Updating prediction model...")
+    prediction_model.update_model()
     
     print("4. Optimizing routes...")
     optimized_routes = route_optimizer.solve_vrp()
@@ -0,0 +1,89 @@
+import asyncio
+import time
+from collections import deque
+from fastapi.concurrency import run_in_threadpool
+
+
+class MicroBatcher:
+    """Collect concurrent single-item requests into one batched call run off the event loop"""
+
+    def __init__(self, predict_batch, max_batch_size, window_ms, history=1000):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000
+        self._queue = None
+        self._worker = None
+        self._batch_sizes = deque(maxlen=history)
+        self._batches = 0
+        self._items = 0
+        self._max_queue_depth = 0
+
+    async def submit(self, item):
+        """Queue one item and wait for its own result from the next batch"""
+        if self._worker is None:
+            # Created lazily so the queue and task belong to the serving event loop
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+        return await future
+
+    async def _run(self):
+        """Form a batch from the first waiting item plus whatever arrives within the window, then predict it"""
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # Requests that queued up during the previous model call still join this batch
+                    while len(batch) < self.max_batch_size and not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    continue
+
+            # Requests whose client went away are not worth predicting
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                continue
+            self._batches += 1
+            self._items += len(batch)
+            self._batch_sizes.append(len(batch))
+            try:
+                results = await run_in_threadpool(self.predict_batch, [item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self):
+        """Queue depth and batch-size metrics since startup (sizes over the last batches)"""
+        sizes = list(self._batch_sizes)
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'max_queue_depth': self._max_queue_depth,
+            'batches': self._batches,
+            'items': self._items,
+            'mean_batch_size': self._items / self._batches if self._batches else 0.0,
+            'recent_p50_batch_size': sorted(sizes)[len(sizes) // 2] if sizes else 0,
+            'recent_max_batch_size': max(sizes, default=0),
+            'max_batch_size': self.max_batch_size,
+            'window_ms': self.window * 1000
+        }
+
+    async def stop(self):
+        """Cancel the batching task; pending requests fail with CancelledError"""
+        if self._worker is not None:
+            self._worker.cancel()
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                future.cancel()
+            self._worker = None
@@ -0,0 +1,153 @@
+import os
+import uuid
+import signal
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from src.models.route_optimization import RouteOptimization
+
+
+class QueueFullError(Exception):
+    """Raised when the optimization queue is at its pending-job limit"""
+
+
+def _optimization_worker(mode, conn):
+    """Run one blocking solve in a child process and send the outcome back"""
+    # Own session, so cancelling the job can signal the solver pools this process starts as well
+    os.setsid()
+    try:
+        conn.send(('completed', RouteOptimization().solve_vrp(mode)))
+    except Exception as e:
+        conn.send(('failed', str(e)))
+    finally:
+        conn.close()
+
+
+def _terminate_group(process):
+    """SIGTERM a solver process together with the pool workers in its process group"""
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        # Not yet in a group of its own, so it has not started any workers
+        process.terminate()
+
+
+class OptimizationJobQueue:
+    """Bounded queue of route-optimization jobs, each solved in its own process"""
+
+    def __init__(self, max_concurrent, max_pending, max_finished):
+        self.max_concurrent = max_concurrent
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        # Each dispatcher thread supervises one solver process, so it also caps concurrency
+        self._dispatcher = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='optimize')
+        self._context = multiprocessing.get_context('spawn')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, mode=None):
+        """Enqueue a solve and return its job id immediately"""
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if job['status'] in ('queued', 'running'))
+            if active >= self.max_concurrent + self.max_pending:
+                raise QueueFullError(f"{active} optimization jobs already queued or running")
+            self._prune_finished()
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'status': 'queued',
+                'mode': mode,
+                'submitted_at': datetime.now().isoformat(timespec='seconds'),
+                'started_at': None,
+                'finished_at': None,
+                'error': None,
+                'result': None,
+                'process': None,
+            }
+            self._jobs[job_id]['future'] = self._dispatcher.submit(self._run, job_id)
+        return job_id
+
+    def add_completed(self, mode, routes):
+        """Record a job that was answered without solving, e.g. from the route plan cache"""
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            self._prune_finished()
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'status': 'completed',
+                'mode': mode,
+                'submitted_at': now,
+                'started_at': now,
+                'finished_at': now,
+                'error': None,
+                'result': routes,
+                'process': None,
+                'future': None,
+            }
+        return job_id
+
+    def _prune_finished(self):
+        """Forget the oldest finished jobs beyond max_finished; dicts keep submission order"""
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] not in ('queued', 'running')]
+        for job_id in finished[:max(len(finished) - self.max_finished, 0)]:
+            del self._jobs[job_id]
+
+    def _run(self, job_id):
+        """Start the solver process for a job and wait for its outcome"""
+        job = self._jobs[job_id]
+        parent_conn, child_conn = self._context.Pipe(duplex=False)
+        # Not a daemon: partitioned and decomposed solves start process pools of their own
+        process = self._context.Process(target=_optimization_worker, args=(job['mode'], child_conn))
+        with self._lock:
+            if job['status'] != 'queued':
+                return
+            process.start()
+            job.update(status='running', process=process, started_at=datetime.now().isoformat(timespec='seconds'))
+        child_conn.close()
+
+        try:
+            status, payload = parent_conn.recv()
+        except EOFError:
+            status, payload = 'failed', f"Solver process exited with code {process.exitcode}"
+        process.join()
+
+        with self._lock:
+            if job['status'] == 'cancelled':
+                return
+            job.update(status=status, process=None, finished_at=datetime.now().isoformat(timespec='seconds'))
+            if status == 'completed':
+                job['result'] = payload
+            else:
+                job['error'] = payload
+
+    def cancel(self, job_id):
+        """Cancel a queued job or terminate a running one; returns False if it had already finished"""
+        with self._lock:
+            job = self._jobs[job_id]
+            if job['status'] not in ('queued', 'running'):
+                return False
+            if job['status'] == 'queued':
+                job['future'].cancel()
+            elif job['process'] is not None:
+                _terminate_group(job['process'])
+            job.update(status='cancelled', process=None, finished_at=datetime.now().isoformat(timespec='seconds'))
+            return True
+
+    def status(self, job_id):
+        """Public view of a job without its payload"""
+        job = self._jobs[job_id]
+        return {key: job[key] for key in (
+            'job_id', 'status', 'mode', 'submitted_at', 'started_at', 'finished_at', 'error'
+        )}
+
+    def result(self, job_id):
+        """Routes of a completed job, or None while it is not completed"""
+        return self._jobs[job_id]['result']
+
+    def shutdown(self):
+        """Terminate running solves and stop the dispatcher"""
+        for job_id in list(self._jobs):
+            self.cancel(job_id)
+        self._dispatcher.shutdown(wait=False)
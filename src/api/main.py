@@ -1,76 +1,210 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from datetime import datetime
-import pandas as pd
-import pickle
-import mysql.connector
-from typing import List, Optional
-import os
-from src.utils.config_loader import ConfigLoader
-from src.models.prediction import PredictionModel
-from src.models.route_optimization import RouteOptimization
-
-app = FastAPI(title="TransLogi API", version="1.0.0")
-config = ConfigLoader().load_config()
-
-# Initialize models
-prediction_model = PredictionModel()
-route_optimizer = RouteOptimization()
-
-class DeliveryOrder(BaseModel):
-    customer_location: str
-    delivery_priority: str
-    package_weight: float
-    latitude: float
-    longitude: float
-    weather_condition: str
-    traffic_condition: str
-
-class DeliveryPrediction(BaseModel):
-    order_id: str
-    predicted_delivery_time: str
-    confidence_score: float
-
-class RouteStop(BaseModel):
-    order_id: str
-    location: str
-    latitude: float
-    longitude: float
-    planned_delivery_time: str
-
-class Route(BaseModel):
-    route_id: str
-    vehicle_id: str
-    stops: List[RouteStop]
-
-@app.post("/api/v1/predict-delivery", response_model=DeliveryPrediction)
-async def predict_delivery(order: DeliveryOrder):
-    try:
-        # Prepare features for prediction
-        features = pd.DataFrame({
-            'distance_km': [prediction_model.calculate_distance(order.latitude, order.longitude)],
-            'delivery_priority': [prediction_model.encode_priority(order.delivery_priority)],
-            'package_weight': [order.package_weight],
-            'traffic_impact': [order.traffic_condition],
-            'weather_impact': [order.weather_condition],
-            'average_delivery_time': [prediction_model.get_average_delivery_time(order.customer_location)]
-        })
-
-        predicted_time = prediction_model.predict(features)
-        order_id = f"ORD-{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        
-        return DeliveryPrediction(
-            order_id=order_id,
-            predicted_delivery_time=str(predicted_time),
-            confidence_score=0.95
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@app.get("/api/v1/routes/{date}", response_model=List[Route])
-async def get_routes(date: str):
-    try:
-        routes = route_optimizer.get_routes_by_date(date)
-        return routes
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from datetime import datetime
+import pandas as pd
+import pickle
+import mysql.connector
+from typing import List, Optional
+import os
+from src.utils.config_loader import ConfigLoader
+from src.models.prediction import PredictionModel
+from src.models.route_optimization import RouteOptimization
+from src.api.jobs import OptimizationJobQueue, QueueFullError
+from src.api.batching import MicroBatcher
+
+app = FastAPI(title="TransLogi API", version="1.0.0")
+config = ConfigLoader().load_config()
+
+# Initialize models; the prediction backend and artifact are only loaded by the first prediction
+prediction_model = PredictionModel()
+route_optimizer = RouteOptimization()
+optimization_jobs = OptimizationJobQueue(
+    config['api']['max_concurrent_jobs'],
+    config['api']['max_pending_jobs'],
+    config['api']['max_finished_jobs']
+)
+
+class DeliveryOrder(BaseModel):
+    customer_location: str
+    delivery_priority: str
+    package_weight: float
+    latitude: float
+    longitude: float
+    weather_condition: str
+    traffic_condition: str
+
+class DeliveryPrediction(BaseModel):
+    order_id: str
+    predicted_delivery_time: str
+    confidence_score: float
+
+class RouteStop(BaseModel):
+    order_id: str
+    location: str
+    latitude: float
+    longitude: float
+    planned_delivery_time: str
+
+class Route(BaseModel):
+    route_id: str
+    vehicle_id: str
+    stops: List[RouteStop]
+
+class OptimizationRequest(BaseModel):
+    mode: Optional[str] = None
+
+class OptimizationJob(BaseModel):
+    job_id: str
+    status: str
+    mode: Optional[str] = None
+    submitted_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+
+def _predict_orders(orders):
+    """Vectorized features and chunked model calls for a list of orders, in input order"""
+    features = prediction_model.build_features(
+        [order.customer_location for order in orders],
+        [order.delivery_priority for order in orders],
+        [order.package_weight for order in orders],
+        [order.latitude for order in orders],
+        [order.longitude for order in orders],
+        [order.traffic_condition for order in orders],
+        [order.weather_condition for order in orders]
+    )
+    predicted_times = prediction_model.predict_batch(features, config['api']['prediction_batch_size'])
+    return pd.to_datetime(predicted_times, unit='s').strftime('%Y-%m-%d %H:%M:%S').tolist()
+
+# Opt-in: single-order predictions are grouped into batched model calls
+prediction_batcher = MicroBatcher(
+    _predict_orders,
+    config['api']['micro_batch_max_size'],
+    config['api']['micro_batch_window_ms']
+) if config['api']['micro_batching'] else None
+
+@app.post("/api/v1/predict-delivery", response_model=DeliveryPrediction)
+async def predict_delivery(order: DeliveryOrder):
+    try:
+        if prediction_batcher is not None:
+            # Shares one model call with the other requests arriving in the same window
+            predicted_time = await prediction_batcher.submit(order)
+        else:
+            predicted_time = _predict_orders([order])[0]
+        order_id = f"ORD-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        
+        return DeliveryPrediction(
+            order_id=order_id,
+            predicted_delivery_time=predicted_time,
+            confidence_score=0.95
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/v1/predict-delivery/batch", response_model=List[DeliveryPrediction])
+async def predict_delivery_batch(orders: List[DeliveryOrder]):
+    try:
+        # One vectorized pass off the event loop instead of one model call per order
+        predicted_times = await run_in_threadpool(_predict_orders, orders)
+        prefix = f"ORD-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        return [
+            {
+                'order_id': f"{prefix}-{index:06d}",
+                'predicted_delivery_time': predicted_time,
+                'confidence_score': 0.95
+            }
+            for index, predicted_time in enumerate(predicted_times)
+        ]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/v1/routes/{date}", response_model=List[Route])
+async def get_routes(date: str):
+    try:
+        routes = route_optimizer.get_routes_by_date(date)
+        return routes
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/v1/optimize", response_model=OptimizationJob, status_code=202)
+async def optimize_routes(request: OptimizationRequest):
+    if request.mode is not None and request.mode not in RouteOptimization.SOLVER_MODES:
+        raise HTTPException(status_code=422, detail=f"Unknown solver mode: {request.mode}")
+    # Identical orders and config were solved before: answer from the plan cache without a solve
+    cached_routes = await run_in_threadpool(route_optimizer.get_cached_plan, request.mode)
+    if cached_routes is not None:
+        return optimization_jobs.status(optimization_jobs.add_completed(request.mode, cached_routes))
+    try:
+        job_id = optimization_jobs.submit(request.mode)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return optimization_jobs.status(job_id)
+
+@app.get("/api/v1/optimize/{job_id}", response_model=OptimizationJob)
+async def get_optimization_status(job_id: str):
+    try:
+        return optimization_jobs.status(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+
+@app.get("/api/v1/optimize/{job_id}/result", response_model=List[Route])
+async def get_optimization_result(job_id: str):
+    try:
+        status = optimization_jobs.status(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    if status['status'] != 'completed':
+        raise HTTPException(status_code=409, detail=f"Job is {status['status']}")
+    return [
+        {
+            'route_id': route['route_id'],
+            'vehicle_id': route['vehicle_id'],
+            'stops': [
+                {
+                    'order_id': stop['order_id'],
+                    'location': stop['location'],
+                    'latitude': stop['latitude'],
+                    'longitude': stop['longitude'],
+                    'planned_delivery_time': stop['delivery_time']
+                }
+                for stop in route['stops']
+            ]
+        }
+        for route in optimization_jobs.result(job_id) or []
+    ]
+
+@app.delete("/api/v1/optimize/{job_id}", response_model=OptimizationJob)
+async def cancel_optimization(job_id: str):
+    try:
+        if not optimization_jobs.cancel(job_id):
+            raise HTTPException(status_code=409, detail="Job has already finished")
+        return optimization_jobs.status(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+
+@app.get("/api/v1/route-cache/stats")
+async def get_route_cache_stats():
+    return route_optimizer.plan_cache_stats()
+
+@app.get("/api/v1/predict-delivery/model")
+async def get_prediction_model_version():
+    manifest = prediction_model.serving_version
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="No published model version is being served yet")
+    return manifest
+
+@app.get("/api/v1/predict-delivery/batcher-stats")
+async def get_prediction_batcher_stats():
+    if prediction_batcher is None:
+        raise HTTPException(status_code=404, detail="Micro-batching is disabled")
+    return prediction_batcher.stats()
+
+@app.on_event("shutdown")
+def shutdown_optimization_jobs():
+    optimization_jobs.shutdown()
+
+@app.on_event("shutdown")
+async def shutdown_prediction_batcher():
+    if prediction_batcher is not None:
+        await prediction_batcher.stop()
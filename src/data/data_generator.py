@@ -1,27 +1,30 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from geopy.distance import geodesic
 import random
+from src.utils.geo import DEPOT_LOCATION, haversine_km
 
-# Set random seed for reproducibility
-np.random.seed(42)
+# Sample customer locations (major cities)
+LOCATIONS = {
+    'New York': {'lat': 40.7128, 'lng': -74.0060},
+    'Los Angeles': {'lat': 34.0522, 'lng': -118.2437},
+    'Chicago': {'lat': 41.8781, 'lng': -87.6298},
+    'Houston': {'lat': 29.7604, 'lng': -95.3698},
+    'Phoenix': {'lat': 33.4484, 'lng': -112.0740}
+}
+
+def generate_delivery_data(num_records=1000, seed=42, cities=None):
+    """Synthetic orders clustered around the given cities (all of LOCATIONS by default)"""
+    # Set random seed for reproducibility
+    np.random.seed(seed)
+    random.seed(seed)
+    locations = {city: LOCATIONS[city] for city in (cities or LOCATIONS)}
 
-def generate_delivery_data(num_records=1000):
     # Generate dates for the last 30 days
     end_date = datetime.now()
     start_date = end_date - timedelta(days=30)
     dates = pd.date_range(start_date, end_date, periods=num_records)
     
-    # Sample customer locations (major cities)
-    locations = {
-        'New York': {'lat': 40.7128, 'lng': -74.0060},
-        'Los Angeles': {'lat': 34.0522, 'lng': -118.2437},
-        'Chicago': {'lat': 41.8781, 'lng': -87.6298},
-        'Houston': {'lat': 29.7604, 'lng': -95.3698},
-        'Phoenix': {'lat': 33.4484, 'lng': -112.0740}
-    }
-    
     # Generate delivery data
     data = {
         'order_id': [f'ORD-{i:06d}' for i in range(num_records)],
@@ -43,9 +46,8 @@ def generate_delivery_data(num_records=1000):
     df['longitude'] = df['customer_location'].map(lambda x: locations[x]['lng'] + np.random.uniform(-0.1, 0.1))
     
     # Add distance from central depot
-    depot_location = (39.8283, -98.5795)  # Near the geographic center of the US
-    df['distance_km'] = df.apply(
-        lambda row: geodesic(depot_location, (row['latitude'], row['longitude'])).kilometers, axis=1
+    df['distance_km'] = haversine_km(
+        DEPOT_LOCATION[0], DEPOT_LOCATION[1], df['latitude'].values, df['longitude'].values
     )
     
     # Add vehicle capacity
@@ -87,15 +89,16 @@ def generate_delivery_data(num_records=1000):
     
     return df
 
-# Generate data
-delivery_df = generate_delivery_data()
+if __name__ == '__main__':
+    # Generate data
+    delivery_df = generate_delivery_data()
 
-# Save to CSV
-delivery_df.to_csv('./src/data/delivery_data.csv', index=False)
+    # Save to CSV
+    delivery_df.to_csv('./src/data/delivery_data.csv', index=False)
 
-# Display first few rows
-print(delivery_df.head())
+    # Display first few rows
+    print(delivery_df.head())
 
-# Display basic statistics
-print("\nDataset Statistics:")
-print(delivery_df.describe())
+    # Display basic statistics
+    print("\nDataset Statistics:")
+    print(delivery_df.describe())
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+import numpy as np
+import pandas as pd
+from src.utils.cache import atomic_write
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+COLUMNAR_DIR = os.path.join(DATA_DIR, 'columnar')
+CSV_PATH = os.path.join(DATA_DIR, 'processed_data.csv')
+
+# Stored as int codes into one sorted category list, so codes match pd.Categorical(...).codes on the full data
+CATEGORY_COLUMNS = ('customer_location', 'delivery_priority', 'vehicle_id', 'weather_condition', 'traffic_condition')
+# Stored as int64 seconds since the epoch
+TIMESTAMP_COLUMNS = ('timestamp', 'actual_delivery_time')
+# Rows are split into one directory per delivery date, so date-range reads skip whole partitions
+PARTITION_COLUMN = 'actual_delivery_time'
+SCHEMA_FILE = 'schema.json'
+# Per partition: each row's position in the processed data, so multi-date reads come back in file order
+ROW_INDEX_FILE = '_row.npy'
+CURRENT_FILE = 'CURRENT'
+
+
+def epoch_seconds(values):
+    """Seconds since the epoch of datetime-like values, whatever datetime64 unit pandas parsed them to"""
+    timestamps = pd.to_datetime(pd.Series(values))
+    return ((timestamps - pd.Timestamp(0)) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+
+
+def write_columnar_dataset(processed_df, root=COLUMNAR_DIR, keep_builds=2):
+    """Write processed rows as typed .npy columns partitioned by delivery date and make it the current build
+
+    Builds are never modified after publishing; the previous one is kept so readers that opened it
+    just before the switch can finish.
+    """
+    build = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    staging = os.path.join(root, f'.{build}.tmp')
+    os.makedirs(staging)
+    try:
+        columns, encoded = [], {}
+        for column in processed_df.columns:
+            values = processed_df[column]
+            if column in TIMESTAMP_COLUMNS:
+                columns.append({'name': column, 'kind': 'timestamp'})
+                encoded[column] = epoch_seconds(values)
+            elif column in CATEGORY_COLUMNS:
+                categorical = pd.Categorical(values)
+                columns.append({'name': column, 'kind': 'category', 'categories': categorical.categories.tolist()})
+                encoded[column] = categorical.codes
+            elif pd.api.types.is_numeric_dtype(values):
+                columns.append({'name': column, 'kind': 'numeric'})
+                encoded[column] = values.to_numpy()
+            else:
+                columns.append({'name': column, 'kind': 'text'})
+                encoded[column] = values.astype(str).to_numpy(dtype=str)
+
+        dates = pd.Series(encoded[PARTITION_COLUMN].astype('datetime64[s]')).dt.strftime('%Y-%m-%d')
+        digest = hashlib.sha256()
+        partitions = {}
+        for date, rows in dates.groupby(dates).indices.items():
+            partition_dir = os.path.join(staging, f'date={date}')
+            os.makedirs(partition_dir)
+            np.save(os.path.join(partition_dir, ROW_INDEX_FILE), rows.astype(np.int64))
+            digest.update(rows.astype(np.int64).tobytes())
+            for column in columns:
+                values = np.ascontiguousarray(encoded[column['name']][rows])
+                np.save(os.path.join(partition_dir, f"{column['name']}.npy"), values)
+                digest.update(values.tobytes())
+            partitions[date] = len(rows)
+
+        for column in columns:
+            column['dtype'] = encoded[column['name']].dtype.str
+        with open(os.path.join(staging, SCHEMA_FILE), 'w') as f:
+            json.dump({
+                'build': build, 'rows': len(processed_df), 'fingerprint': digest.hexdigest(),
+                'columns': columns, 'partitions': partitions, 'row_index': True
+            }, f)
+        os.rename(staging, os.path.join(root, build))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    with atomic_write(os.path.join(root, CURRENT_FILE), 'w') as f:
+        f.write(build)
+    builds = sorted(name for name in os.listdir(root) if not name.startswith('.') and name != CURRENT_FILE)
+    for old_build in builds[:-keep_builds]:
+        shutil.rmtree(os.path.join(root, old_build), ignore_errors=True)
+    return build
+
+
+class ColumnarDataset:
+    """Current build of the columnar processed data; reads memory-map only the requested columns and dates"""
+
+    def __init__(self, root=COLUMNAR_DIR):
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            self.path = os.path.join(root, f.read().strip())
+        with open(os.path.join(self.path, SCHEMA_FILE)) as f:
+            schema = json.load(f)
+        self.build = schema['build']
+        self.rows = schema['rows']
+        self.fingerprint = schema['fingerprint']
+        self.partitions = schema['partitions']
+        # Builds written before row positions were stored read back in date order
+        self.row_index = schema.get('row_index', False)
+        self.columns = {column['name']: column for column in schema['columns']}
+
+    @classmethod
+    def open(cls, root=COLUMNAR_DIR):
+        """The current build, or None before ETL has written one"""
+        return cls(root) if os.path.exists(os.path.join(root, CURRENT_FILE)) else None
+
+    def partition_arrays(self, date, columns):
+        """Encoded, memory-mapped arrays of some columns of one date partition"""
+        return {
+            name: np.load(os.path.join(self.path, f'date={date}', f'{name}.npy'), mmap_mode='r') for name in columns
+        }
+
+    def read(self, columns, start=None, end=None, encoded=False):
+        """Columns of the rows delivered from date start through date end (inclusive, either may be None)
+
+        Rows keep their order in the processed data, as the CSV fallback returns them, so splits and
+        samples do not depend on the source. Encoded reads return category codes and epoch seconds;
+        otherwise categories come back as pd.Categorical and timestamps as datetime64. A single
+        partition is returned without copying.
+        """
+        first = pd.Timestamp(start).strftime('%Y-%m-%d') if start is not None else None
+        last = pd.Timestamp(end).strftime('%Y-%m-%d') if end is not None else None
+        dates = sorted(
+            date for date in self.partitions
+            if (first is None or date >= first) and (last is None or date <= last)
+        )
+        # Partitions hold ascending row positions, so only reads spanning several dates need reordering
+        order = None
+        if len(dates) > 1 and self.row_index:
+            order = np.argsort(np.concatenate([
+                np.load(os.path.join(self.path, f'date={date}', ROW_INDEX_FILE), mmap_mode='r') for date in dates
+            ]), kind='stable')
+        data = {}
+        for name in columns:
+            column = self.columns[name]
+            parts = [np.load(os.path.join(self.path, f'date={date}', f'{name}.npy'), mmap_mode='r') for date in dates]
+            if len(parts) == 1:
+                values = parts[0]
+            elif parts:
+                values = np.concatenate(parts)
+                values = values[order] if order is not None else values
+            else:
+                values = np.empty(0, dtype=np.dtype(column['dtype']))
+            data[name] = values if encoded else _decode(column, values)
+        return pd.DataFrame(data, columns=list(columns), copy=False)
+
+
+def _decode(column, values):
+    if column['kind'] == 'category':
+        return pd.Categorical.from_codes(values, column['categories'])
+    if column['kind'] == 'timestamp':
+        return values.astype('datetime64[s]')
+    return values
+
+
+def processed_data_version():
+    """Changes whenever ETL writes new processed data: the columnar build, else the CSV's mtime; None if neither exists"""
+    dataset = ColumnarDataset.open()
+    if dataset is not None:
+        return dataset.build
+    return os.path.getmtime(CSV_PATH) if os.path.exists(CSV_PATH) else None
+
+
+def read_processed_data(columns, start=None, end=None, encoded=False):
+    """Processed rows from the columnar cache when ETL has written one, else parsed from processed_data.csv
+
+    Returns the rows, as ColumnarDataset.read would, and a source description (path, fingerprint, rows).
+    """
+    dataset = ColumnarDataset.open()
+    if dataset is not None:
+        source = {'path': os.path.relpath(dataset.path, DATA_DIR), 'fingerprint': dataset.fingerprint, 'rows': dataset.rows}
+        return dataset.read(columns, start, end, encoded), source
+
+    usecols = list(dict.fromkeys(list(columns) + ([PARTITION_COLUMN] if start is not None or end is not None else [])))
+    processed_df = pd.read_csv(CSV_PATH, usecols=usecols)
+    digest = hashlib.sha256()
+    with open(CSV_PATH, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    source = {'path': 'processed_data.csv', 'fingerprint': digest.hexdigest(), 'rows': len(processed_df)}
+    if start is not None or end is not None:
+        delivered = pd.to_datetime(processed_df[PARTITION_COLUMN]).dt.normalize()
+        keep = np.ones(len(processed_df), dtype=bool)
+        if start is not None:
+            keep &= (delivered >= pd.Timestamp(start).normalize()).values
+        if end is not None:
+            keep &= (delivered <= pd.Timestamp(end).normalize()).values
+    else:
+        keep = slice(None)
+    for name in columns:
+        if name in TIMESTAMP_COLUMNS:
+            processed_df[name] = epoch_seconds(processed_df[name]) if encoded else pd.to_datetime(processed_df[name])
+        elif encoded and name in CATEGORY_COLUMNS:
+            # Codes over all rows, before the date filter, as the columnar cache stores them
+            processed_df[name] = pd.Categorical(processed_df[name]).codes
+    return processed_df.loc[keep, list(columns)].reset_index(drop=True), source
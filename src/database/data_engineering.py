@@ -1,8 +1,24 @@
 import os
 import pandas as pd
 from src.utils.config_loader import ConfigLoader
+from src.database.feature_store import compute_location_aggregates, delivery_offsets, save_location_aggregates
+from src.database.columnar_cache import write_columnar_dataset
 import mysql.connector
 
+# Travel-time multipliers per reported condition, shared by ETL and serving
+TRAFFIC_IMPACT = {
+    'Light': 1.0,
+    'Moderate': 1.2,
+    'Heavy': 1.4
+}
+
+WEATHER_IMPACT = {
+    'Clear': 1.0,
+    'Cloudy': 1.1,
+    'Rain': 1.3,
+    'Storm': 1.5
+}
+
 class DataEngineering:
     def __init__(self):
         self.config = ConfigLoader().load_config()
@@ -20,6 +36,12 @@ class DataEngineering:
         # Save the processed data to a CSV file
         self.save_processed_data_to_csv(processed_df)
 
+        # Save the typed, date-partitioned copy that training and routing read
+        self.save_columnar_cache(processed_df)
+
+        # Publish per-location aggregates for serving
+        self.save_feature_store(processed_df)
+
     def extract_raw_data(self):
         """
         Extract raw data from the MySQL database.
@@ -57,23 +79,12 @@ class DataEngineering:
         raw_df['longitude'] = raw_df['longitude'].apply(lambda x: x if -180 <= x <= 180 else None)
 
         # Calculate average delivery time in seconds
-        raw_df['average_delivery_time'] = raw_df.groupby('customer_location')['actual_delivery_time'].transform(
-            lambda x: (x - pd.to_datetime(x.min())).dt.total_seconds().mean()
-        )
+        raw_df['average_delivery_time'] = delivery_offsets(raw_df).groupby(raw_df['customer_location']).transform('mean')
 
         # Create impact features
-        raw_df['traffic_impact'] = raw_df['traffic_condition'].map({
-            'Light': 1.0,
-            'Moderate': 1.2,
-            'Heavy': 1.4
-        }).fillna(1.0)
-
-        raw_df['weather_impact'] = raw_df['weather_condition'].map({
-            'Clear': 1.0,
-            'Cloudy': 1.1,
-            'Rain': 1.3,
-            'Storm': 1.5
-        }).fillna(1.0)
+        raw_df['traffic_impact'] = raw_df['traffic_condition'].map(TRAFFIC_IMPACT).fillna(1.0)
+
+        raw_df['weather_impact'] = raw_df['weather_condition'].map(WEATHER_IMPACT).fillna(1.0)
 
         # Calculate vehicle utilization
         raw_df['vehicle_utilization'] = (raw_df['package_weight'] / raw_df['vehicle_capacity']).clip(0, 1)
@@ -143,6 +154,20 @@ class DataEngineering:
         db.commit()
         db.close()
         
+    def save_feature_store(self, processed_df):
+        """
+        Save per-location delivery-time aggregates for the prediction feature store.
+        """
+        store_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'feature_store', 'location_aggregates.npz')
+        save_location_aggregates(compute_location_aggregates(processed_df), store_path)
+
+    def save_columnar_cache(self, processed_df):
+        """
+        Save the processed data as memory-mappable columns with encoded categoricals and epoch-second timestamps.
+        """
+        build = write_columnar_dataset(processed_df)
+        print(f"Wrote columnar build {build} ({len(processed_df)} rows)")
+
     def save_processed_data_to_csv(self, processed_df):
         """
         Save the processed data to a CSV file.
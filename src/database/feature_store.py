@@ -0,0 +1,99 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from src.utils.cache import atomic_write
+
+AGGREGATE_COLUMNS = [
+    'average_delivery_time', 'p50_delivery_time', 'p90_delivery_time', 'p95_delivery_time', 'order_count'
+]
+
+
+def delivery_offsets(processed_df):
+    """Seconds from each location's first delivery to every delivery there, the basis of average_delivery_time"""
+    delivery_times = pd.to_datetime(processed_df['actual_delivery_time'])
+    first_delivery = delivery_times.groupby(processed_df['customer_location']).transform('min')
+    return (delivery_times - first_delivery).dt.total_seconds()
+
+
+def compute_location_aggregates(processed_df):
+    """Per-location mean, percentiles and count of delivery offsets, all in vectorized group reductions"""
+    offsets = delivery_offsets(processed_df)
+    grouped = offsets.groupby(processed_df['customer_location'].astype(str))
+    quantiles = grouped.quantile([0.5, 0.9, 0.95]).unstack()
+    return pd.DataFrame({
+        'average_delivery_time': grouped.mean(),
+        'p50_delivery_time': quantiles[0.5],
+        'p90_delivery_time': quantiles[0.9],
+        'p95_delivery_time': quantiles[0.95],
+        'order_count': grouped.size(),
+    })[AGGREGATE_COLUMNS]
+
+
+def save_location_aggregates(aggregates, path):
+    """Write the aggregates as one compressed .npz, replacing the previous file atomically"""
+    with atomic_write(path) as f:
+        np.savez_compressed(
+            f,
+            locations=np.asarray(aggregates.index, dtype=str),
+            **{column: aggregates[column].values for column in AGGREGATE_COLUMNS}
+        )
+
+
+class _Snapshot:
+    """Immutable lookup tables from one version of the aggregates file"""
+
+    def __init__(self, path):
+        # Taken before reading, so a file published meanwhile is picked up by the next refresh
+        self.mtime = os.path.getmtime(path)
+        with np.load(path) as stored:
+            self.locations = pd.Index(stored['locations'])
+            self.columns = {column: stored[column] for column in AGGREGATE_COLUMNS}
+        counts = self.columns['order_count']
+        # Unseen locations get the order-weighted mean over all locations
+        self.defaults = {
+            column: float(np.average(values, weights=counts)) if counts.sum() else 0.0
+            for column, values in self.columns.items() if column != 'order_count'
+        }
+        self.defaults['order_count'] = 0
+
+
+class LocationFeatureStore:
+    """In-memory per-location aggregates, reloaded in the background when ETL publishes a new file"""
+
+    def __init__(self, path, refresh_seconds):
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self._snapshot = _Snapshot(path)
+        self._stop = threading.Event()
+        if refresh_seconds:
+            threading.Thread(target=self._refresh_loop, name='feature-store-refresh', daemon=True).start()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_seconds):
+            try:
+                if os.path.getmtime(self.path) != self._snapshot.mtime:
+                    # Build the new tables first, then swap one reference so readers never see a mix
+                    self._snapshot = _Snapshot(self.path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Feature store refresh failed, keeping the loaded version: {e}")
+
+    def lookup(self, customer_location, column):
+        """One aggregate for a location, or an array of it for a sequence of locations"""
+        snapshot = self._snapshot
+        if isinstance(customer_location, str):
+            row = snapshot.locations.get_indexer([customer_location])[0]
+            return snapshot.columns[column][row].item() if row >= 0 else snapshot.defaults[column]
+        rows = snapshot.locations.get_indexer(pd.Index(customer_location).astype(str))
+        if not len(snapshot.locations):
+            return np.full(len(rows), snapshot.defaults[column], dtype=np.float64)
+        values = snapshot.columns[column][np.maximum(rows, 0)].astype(np.float64)
+        values[rows < 0] = snapshot.defaults[column]
+        return values
+
+    def get(self, customer_location):
+        """All aggregates of one location"""
+        return {column: self.lookup(customer_location, column) for column in AGGREGATE_COLUMNS}
+
+    def stop(self):
+        self._stop.set()
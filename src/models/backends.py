@@ -0,0 +1,48 @@
+import importlib
+
+# Model name -> (module, estimator class, keyword for its thread count); modules are imported on first use
+BACKENDS = {
+    'random_forest': ('sklearn.ensemble', 'RandomForestRegressor', 'n_jobs'),
+    'xgboost': ('xgboost', 'XGBRegressor', 'n_jobs'),
+    'lightgbm': ('lightgbm', 'LGBMRegressor', 'n_jobs'),
+    'catboost': ('catboost', 'CatBoostRegressor', 'thread_count'),
+}
+
+# Config keys passed straight to each estimator
+MODEL_PARAMS = {
+    'random_forest': ('n_estimators', 'max_depth'),
+    'xgboost': ('n_estimators', 'learning_rate'),
+    'lightgbm': ('n_estimators', 'num_leaves'),
+    'catboost': ('iterations', 'depth'),
+}
+
+
+def estimator_class(name):
+    """Import the backend of a model only now and return its regressor class"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown model: {name}")
+    module_name, class_name, _ = BACKENDS[name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def build_model(name, params, n_threads):
+    """Regressor for a models: entry of config.yml, using n_threads cores"""
+    _, _, threads_keyword = BACKENDS[name]
+    kwargs = {key: params[key] for key in MODEL_PARAMS[name]}
+    kwargs[threads_keyword] = n_threads
+    return estimator_class(name)(**kwargs)
+
+
+def build_neural_network(nn_config, input_dim):
+    """Compiled Keras regressor; TensorFlow is only imported when a network is actually needed"""
+    from tensorflow import keras
+
+    model = keras.Sequential([
+        keras.layers.Dense(nn_config['hidden_layers'][0], input_dim=input_dim, activation='relu'),
+        keras.layers.Dropout(nn_config['dropout_rate']),
+        keras.layers.Dense(nn_config['hidden_layers'][1], activation='relu'),
+        keras.layers.Dropout(nn_config['dropout_rate']),
+        keras.layers.Dense(1)
+    ])
+    model.compile(optimizer='adam', loss='mse')
+    return model
@@ -0,0 +1,232 @@
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+LEAF = -1
+
+
+class CompiledTreeEnsemble:
+    """Tree ensemble flattened into NumPy node arrays, evaluated for whole batches without its framework
+
+    A row goes left at a node when x <= threshold (or when x is NaN and missing_left is set); the
+    prediction is bias + scale * (sum of the leaf values reached), divided by the tree count when averaging.
+    """
+
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'missing_left', 'roots')
+    # Derived layout used by predict, saved as well so memory-mapped loads share it too
+    EVALUATION_ARRAYS = ('children', 'split_feature')
+
+    def __init__(self, feature, threshold, left, right, value, missing_left, roots, max_depth,
+                 feature_names, input_dtype, bias=0.0, scale=1.0, average=False, children=None, split_feature=None):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=input_dtype)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.missing_left = np.asarray(missing_left, dtype=bool)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.max_depth = int(max_depth)
+        self.feature_names = list(feature_names)
+        self.input_dtype = np.dtype(input_dtype)
+        self.bias = float(bias)
+        self.scale = float(scale)
+        self.average = bool(average)
+        # Evaluation layout: one gather picks the child, and leaves read a harmless feature 0
+        self.children = np.column_stack([self.left, self.right]).ravel() if children is None else children
+        self.split_feature = np.maximum(self.feature, 0) if split_feature is None else split_feature
+
+    def predict(self, X, chunk_size=1024):
+        """Predictions for a DataFrame (columns picked by name) or a 2-D array in feature order"""
+        if isinstance(X, pd.DataFrame):
+            X = X[self.feature_names].values
+        X = np.asarray(X, dtype=self.input_dtype)
+        predictions = np.empty(len(X))
+        for start in range(0, len(X), chunk_size):
+            predictions[start:start + chunk_size] = self._predict_chunk(X[start:start + chunk_size])
+        return predictions
+
+    def _predict_chunk(self, X):
+        # Every (row, tree) pair descends one level per step; leaves are their own children, so they stay put
+        row_offsets = np.arange(len(X))[:, np.newaxis] * X.shape[1]
+        X = X.ravel()
+        nodes = np.broadcast_to(self.roots, (row_offsets.shape[0], len(self.roots))).copy()
+        has_missing = np.isnan(X).any()
+        for _ in range(self.max_depth):
+            values = X[row_offsets + self.split_feature[nodes]]
+            go_right = values > self.threshold[nodes]
+            if has_missing:
+                go_right = np.where(np.isnan(values), ~self.missing_left[nodes], go_right)
+            nodes = self.children[2 * nodes + go_right]
+        total = self.value[nodes].sum(axis=1)
+        if self.average:
+            total /= len(self.roots)
+        return self.bias + self.scale * total
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS + self.EVALUATION_ARRAYS)
+
+    def save(self, directory):
+        """Write every array as its own uncompressed .npy plus meta.json, so loading can memory-map them"""
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAYS + self.EVALUATION_ARRAYS:
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self, name))
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump({
+                'max_depth': self.max_depth,
+                'feature_names': self.feature_names,
+                'input_dtype': self.input_dtype.str,
+                'bias': self.bias,
+                'scale': self.scale,
+                'average': self.average
+            }, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode=None):
+        """Load a saved ensemble; with mmap_mode='r' the node arrays stay in the page cache, shared across processes"""
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in cls.ARRAYS + cls.EVALUATION_ARRAYS
+        }
+        return cls(**arrays, **meta)
+
+
+class _NodeTable:
+    """Append-only node arrays shared by all trees of an ensemble"""
+
+    def __init__(self):
+        self.feature, self.threshold, self.left, self.right, self.value, self.missing_left = [], [], [], [], [], []
+        self.roots = []
+        self.max_depth = 0
+
+    def add(self, feature=LEAF, threshold=0.0, value=0.0, missing_left=True):
+        node = len(self.feature)
+        self.feature.append(feature)
+        self.threshold.append(threshold)
+        self.left.append(node)
+        self.right.append(node)
+        self.value.append(value)
+        self.missing_left.append(missing_left)
+        return node
+
+    def link(self, node, left, right):
+        self.left[node] = left
+        self.right[node] = right
+
+    def build(self, feature_names, input_dtype, **kwargs):
+        return CompiledTreeEnsemble(
+            self.feature, self.threshold, self.left, self.right, self.value, self.missing_left,
+            self.roots, self.max_depth, feature_names, input_dtype, **kwargs
+        )
+
+
+def compile_model(model, feature_names):
+    """Flatten a fitted RandomForest, XGBoost, LightGBM or CatBoost regressor; None for anything else"""
+    compilers = {
+        'RandomForestRegressor': _compile_random_forest,
+        'XGBRegressor': _compile_xgboost,
+        'LGBMRegressor': _compile_lightgbm,
+        'CatBoostRegressor': _compile_catboost,
+    }
+    compiler = compilers.get(type(model).__name__)
+    return compiler(model, list(feature_names)) if compiler else None
+
+
+def _compile_random_forest(model, feature_names):
+    # scikit-learn trees split float32 inputs on x <= threshold
+    table = _NodeTable()
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        offset = len(table.feature)
+        is_leaf = tree.children_left < 0
+        table.roots.append(offset)
+        table.max_depth = max(table.max_depth, tree.max_depth)
+        table.feature.extend(np.where(is_leaf, LEAF, tree.feature).tolist())
+        # Largest float32 not above each float64 threshold gives the same decisions on float32 inputs
+        threshold = tree.threshold.astype(np.float32)
+        threshold = np.where(threshold > tree.threshold, np.nextafter(threshold, np.float32(-np.inf)), threshold)
+        table.threshold.extend(threshold.tolist())
+        nodes = np.arange(tree.node_count) + offset
+        table.left.extend(np.where(is_leaf, nodes, tree.children_left + offset).tolist())
+        table.right.extend(np.where(is_leaf, nodes, tree.children_right + offset).tolist())
+        table.value.extend(np.where(is_leaf, tree.value[:, 0, 0], 0.0).tolist())
+        table.missing_left.extend([True] * tree.node_count)
+    return table.build(feature_names, np.float32, average=True)
+
+
+def _compile_xgboost(model, feature_names):
+    booster = model.get_booster()
+    config = json.loads(booster.save_config())
+    # Stored as '414.3' by XGBoost 2.0 and as '[4.143E2]' by later releases
+    base_score = float(config['learner']['learner_model_param']['base_score'].strip('[]'))
+    index_of = {name: i for i, name in enumerate(booster.feature_names or feature_names)}
+    index_of.update({f'f{i}': i for i in range(len(feature_names))})
+
+    table = _NodeTable()
+
+    def add_tree(node, depth):
+        table.max_depth = max(table.max_depth, depth)
+        if 'leaf' in node:
+            return table.add(value=node['leaf'])
+        # XGBoost goes left on x < split in float32, i.e. x <= the next float32 below it
+        threshold = np.nextafter(np.float32(node['split_condition']), np.float32(-np.inf))
+        current = table.add(index_of[node['split']], float(threshold), missing_left=node['missing'] == node['yes'])
+        children = {child['nodeid']: child for child in node['children']}
+        table.link(current, add_tree(children[node['yes']], depth + 1), add_tree(children[node['no']], depth + 1))
+        return current
+
+    for dump in booster.get_dump(dump_format='json'):
+        table.roots.append(add_tree(json.loads(dump), 0))
+    return table.build(feature_names, np.float32, bias=base_score)
+
+
+def _compile_lightgbm(model, feature_names):
+    dumped = model.booster_.dump_model()
+    table = _NodeTable()
+
+    def add_tree(node, depth):
+        table.max_depth = max(table.max_depth, depth)
+        if 'leaf_value' in node:
+            return table.add(value=node['leaf_value'])
+        if node['decision_type'] != '<=':
+            raise ValueError(f"Unsupported LightGBM split: {node['decision_type']}")
+        current = table.add(node['split_feature'], node['threshold'], missing_left=node['default_left'])
+        table.link(current, add_tree(node['left_child'], depth + 1), add_tree(node['right_child'], depth + 1))
+        return current
+
+    for tree in dumped['tree_info']:
+        table.roots.append(add_tree(tree['tree_structure'], 0))
+    return table.build(feature_names, np.float64)
+
+
+def _compile_catboost(model, feature_names):
+    # Oblivious trees: level d tests splits[d] and sets bit d of the leaf index when x > border
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'model.json')
+        model.save_model(path, format='json')
+        with open(path) as f:
+            dumped = json.load(f)
+    scale, bias = dumped.get('scale_and_bias', [1.0, [0.0]])
+    table = _NodeTable()
+
+    def add_level(splits, leaf_values, depth, leaf_index):
+        if depth == len(splits):
+            return table.add(value=leaf_values[leaf_index])
+        split = splits[depth]
+        current = table.add(split['float_feature_index'], split['border'], missing_left=True)
+        table.link(
+            current,
+            add_level(splits, leaf_values, depth + 1, leaf_index),
+            add_level(splits, leaf_values, depth + 1, leaf_index | (1 << depth))
+        )
+        return current
+
+    for tree in dumped['oblivious_trees']:
+        splits = tree.get('splits', [])
+        table.max_depth = max(table.max_depth, len(splits))
+        table.roots.append(add_level(splits, tree['leaf_values'], 0, 0))
+    return table.build(feature_names, np.float32, bias=bias[0] if isinstance(bias, list) else bias, scale=scale)
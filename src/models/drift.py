@@ -0,0 +1,30 @@
+import numpy as np
+
+# Floor for empty bins, so a bin that was empty in one sample does not make the index infinite
+_MIN_FRACTION = 1e-4
+
+
+def feature_profile(features, bins=10):
+    """Per-column quantile bin edges and the fraction of rows in each bin, JSON-serializable"""
+    profile = {}
+    for column in features.columns:
+        values = features[column].to_numpy(dtype=np.float64)
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1])) if len(values) else np.empty(0)
+        profile[column] = {'edges': edges.tolist(), 'fractions': _bin_fractions(values, edges).tolist()}
+    return profile
+
+
+def population_stability(profile, features):
+    """Population stability index of each profiled column of features against its reference bins"""
+    stability = {}
+    for column, reference in profile.items():
+        edges = np.asarray(reference['edges'])
+        expected = np.maximum(np.asarray(reference['fractions']), _MIN_FRACTION)
+        actual = np.maximum(_bin_fractions(features[column].to_numpy(dtype=np.float64), edges), _MIN_FRACTION)
+        stability[column] = float(np.sum((actual - expected) * np.log(actual / expected)))
+    return stability
+
+
+def _bin_fractions(values, edges):
+    counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+    return counts / max(len(values), 1)
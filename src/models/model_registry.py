@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+import uuid
+from src.models.compiled_trees import CompiledTreeEnsemble
+from src.utils.cache import atomic_write
+
+MANIFEST_FILE = 'manifest.json'
+MODEL_FILE = 'model.pkl'
+COMPILED_DIR = 'compiled'
+CURRENT_FILE = 'CURRENT'
+
+
+def file_fingerprint(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def feature_schema(features):
+    """Column names and dtypes of a feature frame, in order"""
+    return [{'name': column, 'dtype': str(dtype)} for column, dtype in features.dtypes.items()]
+
+
+class ModelRegistry:
+    """Versioned model artifacts under one directory, each published in full before the CURRENT pointer moves
+
+    A version directory holds model.pkl, optionally compiled/ (tree arrays as .npy files) and
+    manifest.json. Versions are never modified after publishing, so readers need no locking.
+    """
+
+    def __init__(self, root, keep_versions):
+        self.root = root
+        self.keep_versions = keep_versions
+
+    def publish(self, model, manifest, compiled=None):
+        """Write a new version next to the others, then point CURRENT at it; returns the version name"""
+        version = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        # Staged under a dot-name that current_version and load ignore until the rename
+        staging = os.path.join(self.root, f'.{version}.tmp')
+        os.makedirs(staging)
+        try:
+            with open(os.path.join(staging, MODEL_FILE), 'wb') as f:
+                pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+            if compiled is not None:
+                compiled.save(os.path.join(staging, COMPILED_DIR))
+            manifest = dict(manifest, version=version, published_at=time.time(), files={
+                os.path.relpath(path, staging): file_fingerprint(path)
+                for path in _walk_files(staging)
+            })
+            with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.rename(staging, os.path.join(self.root, version))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self._set_current(version)
+        self._prune(version)
+        return version
+
+    def _set_current(self, version):
+        with atomic_write(os.path.join(self.root, CURRENT_FILE), 'w') as f:
+            f.write(version)
+
+    def _prune(self, current):
+        """Drop the oldest versions beyond keep_versions; processes still mapping them keep their pages"""
+        versions = [version for version in self.versions() if version != current]
+        for version in versions[:max(len(versions) - (self.keep_versions - 1), 0)]:
+            shutil.rmtree(os.path.join(self.root, version), ignore_errors=True)
+
+    def versions(self):
+        """Published versions, oldest first (names start with their publish time)"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if not name.startswith('.') and os.path.isfile(os.path.join(self.root, name, MANIFEST_FILE))
+        )
+
+    def current_version(self):
+        """Version CURRENT points at, or None before the first publish"""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def manifest(self, version):
+        with open(os.path.join(self.root, version, MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    def load(self, version, compiled_inference):
+        """(model, manifest) of a version; compiled tree arrays are memory-mapped read-only when preferred"""
+        manifest = self.manifest(version)
+        compiled_dir = os.path.join(self.root, version, COMPILED_DIR)
+        if compiled_inference and os.path.isdir(compiled_dir):
+            # Forked API workers map the same page-cache pages instead of each holding a copy
+            return CompiledTreeEnsemble.load(compiled_dir, mmap_mode='r'), manifest
+        # Unpickling imports only that model's backend
+        with open(os.path.join(self.root, version, MODEL_FILE), 'rb') as f:
+            return pickle.load(f), manifest
+
+
+def _walk_files(directory):
+    for parent, _, names in os.walk(directory):
+        for name in sorted(names):
+            yield os.path.join(parent, name)
+
+
+class ServingModel:
+    """The registry's current model, swapped in the background when a new version is published
+
+    Requests read one reference per call, so a swap never interrupts them: calls in flight finish on
+    the version they started with and the next ones get the new version.
+    """
+
+    def __init__(self, registry, expected_features, compiled_inference, reload_seconds):
+        self.registry = registry
+        self.expected_features = list(expected_features)
+        self.compiled_inference = compiled_inference
+        self.reload_seconds = reload_seconds
+        self._loaded = None
+        self._stop = threading.Event()
+        self.reload()
+        if reload_seconds:
+            threading.Thread(target=self._reload_loop, name='model-reload', daemon=True).start()
+
+    @property
+    def model(self):
+        return self._loaded[1]
+
+    @property
+    def version(self):
+        return self._loaded[0]
+
+    @property
+    def manifest(self):
+        return self._loaded[2]
+
+    def reload(self):
+        """Load the current version if it differs from the one being served; True when swapped"""
+        version = self.registry.current_version()
+        if version is None:
+            raise FileNotFoundError(f"No model version published in {self.registry.root}")
+        if self._loaded is not None and version == self._loaded[0]:
+            return False
+        model, manifest = self.registry.load(version, self.compiled_inference)
+        features = [column['name'] for column in manifest['feature_schema']]
+        if features != self.expected_features:
+            raise ValueError(f"Model {version} expects features {features}, serving provides {self.expected_features}")
+        # Fully loaded before this one assignment, so readers see either the old or the new triple
+        self._loaded = (version, model, manifest)
+        print(f"Serving model version {version} ({manifest['model_name']})")
+        return True
+
+    def _reload_loop(self):
+        while not self._stop.wait(self.reload_seconds):
+            try:
+                self.reload()
+            except (OSError, ValueError, KeyError, pickle.UnpicklingError) as e:
+                print(f"Model reload failed, keeping version {self._loaded[0]}: {e}")
+
+    def stop(self):
+        self._stop.set()
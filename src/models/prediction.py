@@ -1,85 +1,655 @@
 import os
+import json
+import time
+import uuid
+import threading
+import multiprocessing
 import pandas as pd
-import lightgbm as lgb
 import pickle
-import tensorflow as tf
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
-from xgboost import XGBRegressor
-from catboost import CatBoostRegressor
-from tensorflow import keras
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from src.database.columnar_cache import ColumnarDataset, read_processed_data
+from src.database.data_engineering import TRAFFIC_IMPACT, WEATHER_IMPACT
+from src.database.feature_store import LocationFeatureStore, compute_location_aggregates, save_location_aggregates
+from src.models.backends import BACKENDS, build_model, build_neural_network
+from src.models.compiled_trees import compile_model
+from src.models.drift import feature_profile, population_stability
+from src.models.model_registry import ModelRegistry, ServingModel, feature_schema
+from src.models.streaming import (
+    StreamingScore, TrainingStream, sample_for_budget, train_lightgbm_sampled, train_neural_network_streaming,
+    train_xgboost_sampled
+)
+from src.models.successive_halving import AshaScheduler, sample_configurations
+from src.utils.cache import atomic_write
 from src.utils.config_loader import ConfigLoader
+from src.utils.geo import DEPOT_LOCATION, haversine_km
+
+FEATURE_COLUMNS = [
+    'distance_km', 'delivery_priority', 'package_weight', 'traffic_impact', 'weather_impact', 'average_delivery_time'
+]
+
+# Boosters that can continue training from a published model (init_model / xgb_model)
+INCREMENTAL_MODELS = ('xgboost', 'lightgbm')
+
+# Rows and repeats used to time compiled trees against the framework model before publishing them
+COMPILED_TIMING_ROWS = 10000
+COMPILED_TIMING_REPEATS = 3
+
+# Same codes pd.Categorical assigns the priorities in training (sorted order, -1 for unknown)
+PRIORITY_CODES = {
+    'Express': 0,
+    'Same-day': 1,
+    'Standard': 2
+}
+
 
 class PredictionModel:
     def __init__(self):
         self.config = ConfigLoader().load_config()
-        
-        # Create neural network model separately
-        self.nn_model = self._create_neural_network()
-        
-        # Other models with configuration from config.yml
-        self.models = {
-            'random_forest': RandomForestRegressor(
-                n_estimators=self.config['models']['random_forest']['n_estimators'],
-                max_depth=self.config['models']['random_forest']['max_depth']
-            ),
-            'xgboost': XGBRegressor(
-                n_estimators=self.config['models']['xgboost']['n_estimators'],
-                learning_rate=self.config['models']['xgboost']['learning_rate']
-            ),
-            'lightgbm': lgb.LGBMRegressor(
-                n_estimators=self.config['models']['lightgbm']['n_estimators'],
-                num_leaves=self.config['models']['lightgbm']['num_leaves']
-            ),
-            'catboost': CatBoostRegressor(
-                iterations=self.config['models']['catboost']['iterations'],
-                depth=self.config['models']['catboost']['depth']
-            ),
-        }
+        self.registry = ModelRegistry(
+            os.path.join(os.path.dirname(__file__), 'artifacts'), self.config['model_registry']['keep_versions']
+        )
+        # Winning parameters of the last hyperparameter search, applied over config.yml
+        self.hyperparameters_path = os.path.join(os.path.dirname(__file__), 'artifacts', 'hyperparameters.json')
+        self._tuned_params = None
+        # Backends are imported and estimators built on first use, not at construction
+        self._models = None
+        self._nn_model = None
+        self._serving_model = None
+        self._serving = None
+        self._serving_lock = threading.Lock()
+        self._feature_store = None
+        self._feature_store_lock = threading.Lock()
+
+    @property
+    def models(self):
+        """Untrained candidate models with configuration from config.yml, each limited to its core budget"""
+        if self._models is None:
+            self._models = {
+                name: build_model(name, self.model_params(name), self._core_budget(name))
+                for name in BACKENDS
+            }
+        return self._models
+
+    @property
+    def nn_model(self):
+        """Neural network model, created separately and only when asked for"""
+        if self._nn_model is None:
+            self._nn_model = build_neural_network(self.config['models']['neural_network'], len(FEATURE_COLUMNS))
+        return self._nn_model
+
+    def model_params(self, name):
+        """Parameters of a model family: config.yml, overridden by the last search's winner when enabled"""
+        if self._tuned_params is None:
+            self._tuned_params = {}
+            if self.config['hyperparameter_search']['apply_results'] and os.path.exists(self.hyperparameters_path):
+                with open(self.hyperparameters_path) as f:
+                    self._tuned_params = json.load(f)['models']
+        return dict(self.config['models'][name], **self._tuned_params.get(name, {}))
 
-    def _create_neural_network(self):
-        # Use configuration from config.yml for neural network
-        nn_config = self.config['models']['neural_network']
-        
-        model = keras.Sequential([
-            keras.layers.Dense(nn_config['hidden_layers'][0], input_dim=6, activation='relu'),
-            keras.layers.Dropout(nn_config['dropout_rate']),
-            keras.layers.Dense(nn_config['hidden_layers'][1], activation='relu'),
-            keras.layers.Dropout(nn_config['dropout_rate']),
-            keras.layers.Dense(1)
+    def _core_budget(self, name):
+        """Threads a model may use while training, never more than the machine has"""
+        return max(1, min(self.config['training']['core_budget'][name], os.cpu_count()))
+
+    def load(self, model_path=None):
+        """Serve the registry's current version, following new publishes; or pin the pickle at model_path"""
+        if model_path is not None:
+            with open(model_path, 'rb') as f:
+                self._serving_model = pickle.load(f)
+            return self._serving_model
+        with self._serving_lock:
+            if self._serving is None:
+                self._serving = ServingModel(
+                    self.registry, FEATURE_COLUMNS, self.config['api']['compiled_inference'],
+                    self.config['model_registry']['reload_seconds']
+                )
+            else:
+                self._serving.reload()
+        self._serving_model = None
+        return self._serving.model
+
+    @property
+    def serving_version(self):
+        """Manifest of the version being served, None until the first prediction or when pinned to a pickle"""
+        return self._serving.manifest if self._serving is not None and self._serving_model is None else None
+
+    def _current_model(self):
+        if self._serving_model is None and self._serving is None:
+            self.load()
+        return self._serving_model if self._serving_model is not None else self._serving.model
+
+    def predict(self, features):
+        """Predicted delivery times as Unix seconds, loading the published model on first use"""
+        return self._current_model().predict(features[FEATURE_COLUMNS])
+
+    def predict_batch(self, features, chunk_size):
+        """Predict in chunks of chunk_size rows, one model call per chunk, preserving row order"""
+        if len(features) == 0:
+            return np.empty(0)
+        # One model for all chunks, even if a new version is swapped in meanwhile
+        model = self._current_model()
+        return np.concatenate([
+            model.predict(features.iloc[start:start + chunk_size][FEATURE_COLUMNS])
+            for start in range(0, len(features), chunk_size)
         ])
-        model.compile(optimizer='adam', loss='mse')
-        return model
+
+    def build_features(self, customer_location, delivery_priority, package_weight, latitude, longitude,
+                       traffic_condition, weather_condition):
+        """Model features for many orders at once from column arrays of their raw fields"""
+        return pd.DataFrame({
+            'distance_km': self.calculate_distance(np.asarray(latitude, dtype=np.float64),
+                                                   np.asarray(longitude, dtype=np.float64)),
+            'delivery_priority': self.encode_priority(delivery_priority),
+            'package_weight': np.asarray(package_weight, dtype=np.float64),
+            'traffic_impact': pd.Series(traffic_condition, dtype=object).map(TRAFFIC_IMPACT).fillna(1.0).values,
+            'weather_impact': pd.Series(weather_condition, dtype=object).map(WEATHER_IMPACT).fillna(1.0).values,
+            'average_delivery_time': self.get_average_delivery_time(customer_location)
+        }, columns=FEATURE_COLUMNS)
+
+    def encode_priority(self, delivery_priority):
+        """Training-time category code of a priority, or an array of codes for a sequence"""
+        if isinstance(delivery_priority, str):
+            return PRIORITY_CODES.get(delivery_priority, -1)
+        return pd.Series(delivery_priority, dtype=object).map(PRIORITY_CODES).fillna(-1).astype(np.int8).values
+
+    def get_average_delivery_time(self, customer_location):
+        """Per-location average_delivery_time from the feature store; unknown locations get the overall mean"""
+        return self.feature_store.lookup(customer_location, 'average_delivery_time')
+
+    @property
+    def feature_store(self):
+        """Per-location aggregates published by ETL, loaded on first use and refreshed in the background"""
+        with self._feature_store_lock:
+            if self._feature_store is None:
+                self._feature_store = self._open_feature_store()
+        return self._feature_store
+
+    def _open_feature_store(self):
+        store_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'feature_store', 'location_aggregates.npz')
+        if not os.path.exists(store_path):
+            # ETL has not published aggregates yet; derive them once from the processed data
+            processed_df, _ = read_processed_data(['customer_location', 'actual_delivery_time'])
+            save_location_aggregates(compute_location_aggregates(processed_df), store_path)
+        return LocationFeatureStore(store_path, self.config['feature_store']['refresh_seconds'])
+
+    def calculate_distance(self, latitude, longitude):
+        """Great-circle distance in km from the depot, accepting scalars or arrays"""
+        distance = haversine_km(DEPOT_LOCATION[0], DEPOT_LOCATION[1], latitude, longitude)
+        return float(distance) if np.ndim(distance) == 0 else distance
+
+    def _load_training_data(self, start=None):
+        """Source and rows of the processed data (deliveries from date start on, if given) as model inputs
+
+        Only the feature and target columns are read; the target comes as Unix seconds and the
+        priorities as their category codes, already encoded by the columnar cache.
+        """
+        delivery_df, source = read_processed_data(FEATURE_COLUMNS + ['actual_delivery_time'], start=start, encoded=True)
+        return source, delivery_df
 
     def train_and_save_model(self):
-        # Load the processed data
-        csv_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'processed_data.csv')
-        delivery_df = pd.read_csv(csv_path)
+        if self.config['training']['streaming']['enabled']:
+            # History too large for one DataFrame: train out of core within the memory budget
+            return self.train_streaming()
 
-        # Convert datetime columns to timestamps
-        delivery_df['actual_delivery_time'] = pd.to_datetime(delivery_df['actual_delivery_time']).astype(np.int64) // 10**9
+        from sklearn.model_selection import train_test_split
 
-        # Convert categorical variables to numeric
-        delivery_df['delivery_priority'] = pd.Categorical(delivery_df['delivery_priority']).codes
+        # Load the processed data
+        source, delivery_df = self._load_training_data()
 
         # Split the data into features and target
-        X = delivery_df[['distance_km', 'delivery_priority', 'package_weight', 'traffic_impact', 'weather_impact', 'average_delivery_time']]
+        X = delivery_df[FEATURE_COLUMNS]
         y = delivery_df['actual_delivery_time']
 
         # Split the data into training and testing sets
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-        # Train the models
-        for name, model in self.models.items():
-            model.fit(X_train, y_train)
-            score = model.score(X_test, y_test)
-            print(f"{name} R-squared: {score:.2f}")
+        # Train the models in parallel, sharing the feature arrays instead of pickling them to every worker
+        scores, timings = self._train_models_parallel(X_train, X_test, y_train, y_test)
 
         # Select the best model
-        best_model = max(self.models.items(), key=lambda x: x[1].score(X_test, y_test))[1]
+        best_name = max(scores, key=scores.get)
+        best_model = self.models[best_name]
+        print(f"Best model: {best_name}")
+
+        # Publish the best model as a new version; a running server picks it up on its next reload check
+        version = self.registry.publish(best_model, {
+            'model_name': best_name,
+            'model_class': type(best_model).__name__,
+            'training_mode': 'full',
+            'params': self.model_params(best_name),
+            'metrics': {
+                'r2': scores,
+                'test_mae': _mean_absolute_error(y_test, best_model.predict(X_test)),
+                'train_seconds': timings
+            },
+            'feature_schema': feature_schema(X),
+            # Reference distribution for drift checks by later incremental updates
+            'feature_profile': feature_profile(X_train),
+            'training_data': {
+                'path': source['path'],
+                'fingerprint': source['fingerprint'],
+                'rows': len(delivery_df),
+                'train_rows': len(X_train),
+                'test_rows': len(X_test),
+                'watermark': int(y.max())
+            }
+        }, self._compile_for_serving(best_model, X_test))
+        print(f"Published model version {version}")
+        return timings
+
+    def train_streaming(self):
+        """Train the boosters (and optionally the network) out of core from the columnar cache and publish the best
+
+        Rows are read partition by partition in chunks sized to training.streaming.memory_budget_mb:
+        XGBoost and then LightGBM each build their training matrix chunk by chunk, from a uniform sample
+        of the rows when all of them would not fit half the budget, and the network, when enabled, is fed
+        from a generator.
+        Scores come from one more streaming pass over the hash-selected test rows.
+        """
+        settings = self.config['training']['streaming']
+        dataset = ColumnarDataset.open()
+        if dataset is None:
+            raise FileNotFoundError("Streaming training reads the columnar cache; run the ETL to write it first")
+        stream = TrainingStream(
+            dataset, FEATURE_COLUMNS, 'actual_delivery_time', settings['memory_budget_mb'], settings['test_percent']
+        )
+        print(f"Streaming {dataset.rows:,} rows from build {dataset.build} "
+              f"in chunks of {stream.rows_per_chunk:,} rows ({settings['memory_budget_mb']} MB budget)")
+
+        models, timings = {}, {}
+        start = time.perf_counter()
+        models['xgboost'], xgboost_fraction = train_xgboost_sampled(
+            stream, self.model_params('xgboost'), self._core_budget('xgboost'), stream.memory_budget * 0.5
+        )
+        timings['xgboost'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        models['lightgbm'], lightgbm_fraction = train_lightgbm_sampled(
+            stream, self.model_params('lightgbm'), self._core_budget('lightgbm'), stream.memory_budget * 0.5
+        )
+        timings['lightgbm'] = time.perf_counter() - start
+
+        if settings['neural_network']:
+            start = time.perf_counter()
+            models['neural_network'] = train_neural_network_streaming(
+                stream, self.config['models']['neural_network'], settings['nn_epochs'], settings['nn_batch_size']
+            )
+            timings['neural_network'] = time.perf_counter() - start
+
+        # One pass scores every model; a bounded slice of test rows is kept to check the compiled trees
+        scores = {name: StreamingScore() for name in models}
+        check_rows, check_budget = [], settings['check_rows']
+        watermark = 0
+        for features, target, is_test, _ in stream.chunks():
+            watermark = max(watermark, int(target.max(initial=0)))
+            if not is_test.any():
+                continue
+            X_test = stream.frame(features[is_test])
+            for name, model in models.items():
+                scores[name].update(target[is_test], model.predict(X_test))
+            if check_budget > 0:
+                check_rows.append(X_test.iloc[:check_budget].copy())
+                check_budget -= len(check_rows[-1])
+        for name, score in scores.items():
+            print(f"{name} R-squared: {score.r2:.2f} ({timings[name]:.1f}s)")
+
+        # The network is scored for comparison; serving and incremental updates work on the boosters
+        best_name = max(('xgboost', 'lightgbm'), key=lambda name: scores[name].r2)
+        best_model = models[best_name]
+        print(f"Best model: {best_name}")
+        X_check = pd.concat(check_rows, ignore_index=True)
+        profile_sample, _, _ = sample_for_budget(stream, stream.memory_budget * 0.1, 4 * len(FEATURE_COLUMNS) + 4)
+        version = self.registry.publish(best_model, {
+            'model_name': best_name,
+            'model_class': type(best_model).__name__,
+            'training_mode': 'streaming',
+            'params': self.model_params(best_name),
+            'metrics': {
+                'r2': {name: score.r2 for name, score in scores.items()},
+                'test_mae': scores[best_name].mae,
+                'train_seconds': timings,
+                'xgboost_sample_fraction': xgboost_fraction,
+                'lightgbm_sample_fraction': lightgbm_fraction
+            },
+            'feature_schema': feature_schema(X_check),
+            'feature_profile': feature_profile(stream.frame(profile_sample)),
+            'training_data': {
+                'path': os.path.relpath(dataset.path, os.path.join(os.path.dirname(__file__), '..', 'data')),
+                'fingerprint': dataset.fingerprint,
+                'rows': dataset.rows,
+                'test_rows': scores[best_name].target.count,
+                'watermark': watermark
+            }
+        }, self._compile_for_serving(best_model, X_check))
+        print(f"Published model version {version}")
+        return timings
+
+    def update_model(self):
+        """Continue training the published booster on deliveries after its watermark, or retrain fully when needed
+
+        Nothing happens while fewer than min_new_rows deliveries arrived after the watermark. Otherwise a
+        full retrain runs when there is no published version, the published model cannot continue
+        training, the new deliveries drift from the training distribution, the published model has
+        lost accuracy on them, or the continued model is no better than the published one.
+        """
+        from sklearn.model_selection import train_test_split
+
+        settings = self.config['training']['incremental']
+        version = self.registry.current_version()
+        if version is None:
+            print("No published model yet; running a full retrain")
+            return self.train_and_save_model()
+        manifest = self.registry.manifest(version)
+        name = manifest['model_name']
+        if 'watermark' not in manifest['training_data']:
+            print(f"Version {version} ({name}) records no watermark; running a full retrain")
+            return self.train_and_save_model()
+
+        watermark = manifest['training_data']['watermark']
+        # Only the partitions from the watermark's date on are read
+        source, delivery_df = self._load_training_data(start=pd.Timestamp(watermark, unit='s'))
+        new_df = delivery_df[delivery_df['actual_delivery_time'] > watermark]
+        # Checked before the model type, so models that cannot continue training are not rebuilt for nothing
+        if len(new_df) < settings['min_new_rows']:
+            print(f"{len(new_df)} deliveries since the watermark, fewer than {settings['min_new_rows']}; "
+                  f"keeping version {version}")
+            return {}
+        if name not in INCREMENTAL_MODELS:
+            print(f"Version {version} ({name}) cannot be trained incrementally; running a full retrain")
+            return self.train_and_save_model()
+
+        X_new = new_df[FEATURE_COLUMNS]
+        stability = population_stability(manifest['feature_profile'], X_new)
+        drifted = max(stability, key=stability.get)
+        if stability[drifted] > settings['max_psi']:
+            print(f"{drifted} drifted (PSI {stability[drifted]:.2f} > {settings['max_psi']}); running a full retrain")
+            return self.train_and_save_model()
+
+        X_fit, X_check, y_fit, y_check = train_test_split(
+            X_new, new_df['actual_delivery_time'], test_size=settings['holdout_fraction'], random_state=42
+        )
+        base_model, _ = self.registry.load(version, compiled_inference=False)
+        base_mae = _mean_absolute_error(y_check, base_model.predict(X_check))
+        if base_mae > manifest['metrics']['test_mae'] * (1 + settings['max_mae_increase']):
+            print(f"Version {version} MAE on new deliveries is {base_mae:.1f} against {manifest['metrics']['test_mae']:.1f} "
+                  f"at training; running a full retrain")
+            return self.train_and_save_model()
+
+        # Adds `rounds` trees on top of the published booster instead of rebuilding all of them
+        params = dict(self.model_params(name), n_estimators=settings['rounds'])
+        model = build_model(name, params, self._core_budget(name))
+        start = time.perf_counter()
+        if name == 'lightgbm':
+            model.fit(X_fit, y_fit, init_model=base_model.booster_)
+        else:
+            model.fit(X_fit, y_fit, xgb_model=base_model.get_booster())
+        timings = {name: time.perf_counter() - start}
+        timings['total'] = timings[name]
+
+        updated_mae = _mean_absolute_error(y_check, model.predict(X_check))
+        if updated_mae > base_mae:
+            print(f"Continued {name} did not improve on new deliveries (MAE {updated_mae:.1f} vs {base_mae:.1f}); "
+                  f"running a full retrain")
+            return self.train_and_save_model()
+
+        version = self.registry.publish(model, {
+            'model_name': name,
+            'model_class': type(model).__name__,
+            'training_mode': 'incremental',
+            'parent_version': version,
+            'params': manifest.get('params'),
+            'metrics': {
+                'r2': {name: model.score(X_check, y_check)},
+                # Kept from the full retrain, so accuracy is always checked against the same baseline
+                'test_mae': manifest['metrics']['test_mae'],
+                'new_data_mae': updated_mae,
+                'parent_new_data_mae': base_mae,
+                'train_seconds': timings
+            },
+            'feature_schema': feature_schema(X_new),
+            # Drift is measured against the last full retrain, so small shifts cannot accumulate unnoticed
+            'feature_profile': manifest['feature_profile'],
+            'training_data': {
+                'path': source['path'],
+                'fingerprint': source['fingerprint'],
+                'rows': source['rows'],
+                'train_rows': len(X_fit),
+                'test_rows': len(X_check),
+                'watermark': int(new_df['actual_delivery_time'].max())
+            }
+        }, self._compile_for_serving(model, X_check))
+        print(f"Published model version {version}: {name} continued on {len(X_fit)} new deliveries "
+              f"in {timings[name]:.1f}s (MAE {base_mae:.1f} -> {updated_mae:.1f})")
+        return timings
+
+    def search_hyperparameters(self):
+        """Asynchronous successive halving over sampled configurations of every model family
+
+        Configurations start on a small share of the training rows in a process pool; the best of each
+        rung move on to reduction_factor times more rows, up to the full training set. Every trial is
+        appended to the search's trials.jsonl, and the best parameters of each family that reached the full
+        training rows are written to hyperparameters.json, which later training runs pick up.
+        """
+        from sklearn.model_selection import train_test_split
+
+        settings = self.config['hyperparameter_search']
+        _, delivery_df = self._load_training_data()
+        X_train, _, y_train, _ = train_test_split(
+            delivery_df[FEATURE_COLUMNS], delivery_df['actual_delivery_time'], test_size=0.2, random_state=42
+        )
+        # Scored on a validation split of the training rows; the test rows stay unseen until model selection
+        X_fit, X_valid, y_fit, y_valid = train_test_split(X_train, y_train, test_size=0.2, random_state=settings['seed'])
+
+        configurations = sample_configurations(
+            settings['space'], {name: self.config['models'][name] for name in settings['space']},
+            settings['configurations'], settings['seed']
+        )
+        scheduler = AshaScheduler(
+            len(configurations), int(len(X_fit) * settings['min_fraction']), len(X_fit), settings['reduction_factor']
+        )
+        search_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        search_dir = os.path.join(os.path.dirname(__file__), 'artifacts', 'searches', search_id)
+        os.makedirs(search_dir)
+        print(f"Search {search_id}: {len(configurations)} configurations, rungs of {scheduler.budgets} rows")
+
+        arrays = {
+            'X_train': np.ascontiguousarray(X_fit, dtype=np.float64),
+            'X_test': np.ascontiguousarray(X_valid, dtype=np.float64),
+            'y_train': np.ascontiguousarray(y_fit, dtype=np.float64),
+            'y_test': np.ascontiguousarray(y_valid, dtype=np.float64),
+        }
+        workers = os.cpu_count()
+        start = time.perf_counter()
+        with _shared_arrays(arrays) as descriptors, open(os.path.join(search_dir, 'trials.jsonl'), 'a') as trial_log:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                running = {}
+                while True:
+                    # One single-threaded trial per core: many small fits keep the pool busier than a few wide ones
+                    while len(running) < workers:
+                        trial = scheduler.next_trial()
+                        if trial is None:
+                            break
+                        name, params = configurations[trial[0]]
+                        running[executor.submit(
+                            _train_model, name, params, 1, FEATURE_COLUMNS, descriptors,
+                            scheduler.budgets[trial[1]], False
+                        )] = (trial, time.perf_counter())
+                    if not running:
+                        break
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        (configuration, rung), submitted = running.pop(future)
+                        name, params = configurations[configuration]
+                        record = {
+                            'configuration': configuration, 'model': name, 'params': params, 'rung': rung,
+                            'rows': scheduler.budgets[rung]
+                        }
+                        try:
+                            _, score, fit_seconds = future.result()
+                            record.update(score=score, fit_seconds=fit_seconds)
+                        except Exception as e:
+                            score = float('-inf')
+                            record.update(score=None, error=repr(e))
+                        record['wall_seconds'] = time.perf_counter() - submitted
+                        scheduler.report(configuration, rung, score)
+                        trial_log.write(json.dumps(record) + '\n')
+                        trial_log.flush()
+                        print(f"{name} rung {rung} ({record['rows']} rows): R-squared {record['score']} "
+                              f"in {record['wall_seconds']:.1f}s")
+
+        families = {}
+        for name in settings['space']:
+            best = scheduler.best({i for i, (family, _) in enumerate(configurations) if family == name})
+            if best is not None:
+                configuration, rung, score = best
+                families[name] = {
+                    'params': configurations[configuration][1], 'score': score, 'rows': scheduler.budgets[rung]
+                }
+        if not families:
+            raise RuntimeError(f"Every trial of search {search_id} failed; see {search_dir}/trials.jsonl")
+        winner = max(families, key=lambda name: (families[name]['rows'], families[name]['score']))
+        result = {
+            'search_id': search_id,
+            'winner': winner,
+            'families': families,
+            # Only parameters that proved themselves on the full training rows replace config.yml
+            'models': {
+                name: family['params'] for name, family in families.items()
+                if family['rows'] == scheduler.budgets[-1]
+            },
+            'seconds': time.perf_counter() - start
+        }
+        with open(os.path.join(search_dir, 'result.json'), 'w') as f:
+            json.dump(result, f, indent=2)
+        with atomic_write(self.hyperparameters_path, 'w') as f:
+            json.dump(result, f, indent=2)
+        self._tuned_params = None
+        self._models = None
+        print(f"Search {search_id} finished in {result['seconds']:.1f}s; best: {winner} {families[winner]['params']} "
+              f"(R-squared {families[winner]['score']:.3f})")
+        return result
+
+    def _compile_for_serving(self, model, X_check):
+        """Flat tree arrays of the model if it is a supported ensemble, they reproduce its own predictions
+        and they predict at least as fast; otherwise serving keeps the pickle even with compiled_inference"""
+        compiled = compile_model(model, FEATURE_COLUMNS)
+        if compiled is None:
+            return None
+        expected = model.predict(X_check)
+        tolerance = 1e-6 * max(float(np.abs(expected).max(initial=0.0)), 1.0)
+        if np.abs(compiled.predict(X_check) - expected).max(initial=0.0) > tolerance:
+            print("Compiled model does not match the framework predictions; serving the pickle")
+            return None
+        # LightGBM's native predictor outruns the NumPy traversal on batches, so time both on the check rows
+        X_timing = X_check.iloc[:COMPILED_TIMING_ROWS]
+        framework_s, compiled_s = _best_predict_time(model, X_timing), _best_predict_time(compiled, X_timing)
+        if compiled_s > framework_s:
+            print(f"Compiled trees predict slower than the framework ({compiled_s:.3f}s vs {framework_s:.3f}s "
+                  f"for {len(X_timing)} rows); serving the pickle")
+            return None
+        print(f"Compiled {len(compiled.roots)} trees ({compiled.nbytes / 2**20:.1f} MB) for serving")
+        return compiled
+
+    def _train_models_parallel(self, X_train, X_test, y_train, y_test):
+        """Fit every model in a process pool, starting each one once its core budget is free"""
+        arrays = {
+            'X_train': np.ascontiguousarray(X_train, dtype=np.float64),
+            'X_test': np.ascontiguousarray(X_test, dtype=np.float64),
+            'y_train': np.ascontiguousarray(y_train, dtype=np.float64),
+            'y_test': np.ascontiguousarray(y_test, dtype=np.float64),
+        }
+        with _shared_arrays(arrays) as descriptors:
+            # Largest budgets first, so the small ones fill the cores left over
+            pending = sorted(BACKENDS, key=self._core_budget, reverse=True)
+            free_cores = os.cpu_count()
+            running = {}
+            scores, timings, fitted = {}, {}, {}
+            start = time.perf_counter()
+            # Spawned workers: forking a parent whose ML backends already started thread pools can deadlock
+            with ProcessPoolExecutor(
+                max_workers=len(pending), mp_context=multiprocessing.get_context('spawn')
+            ) as executor:
+                while pending or running:
+                    while pending and (self._core_budget(pending[0]) <= free_cores or not running):
+                        name = pending.pop(0)
+                        free_cores -= self._core_budget(name)
+                        running[executor.submit(
+                            _train_model, name, self.model_params(name), self._core_budget(name),
+                            list(X_train.columns), descriptors
+                        )] = name
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        free_cores += self._core_budget(name)
+                        payload, scores[name], timings[name] = future.result()
+                        fitted[name] = pickle.loads(payload)
+                        print(f"{name} R-squared: {scores[name]:.2f} "
+                              f"({timings[name]:.1f}s on {self._core_budget(name)} cores)")
+            timings['total'] = time.perf_counter() - start
+            self._models = fitted
+
+        print(f"Trained {len(scores)} models in {timings['total']:.1f}s "
+              f"({sum(timings[name] for name in scores):.1f}s of model time)")
+        return scores, timings
+
+
+def _mean_absolute_error(y_true, y_pred):
+    return float(np.mean(np.abs(np.asarray(y_true, dtype=np.float64) - y_pred)))
+
+
+def _best_predict_time(model, X):
+    """Fastest of a few batch predictions, in seconds"""
+    timings = []
+    for _ in range(COMPILED_TIMING_REPEATS):
+        start = time.perf_counter()
+        model.predict(X)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _train_model(name, params, n_threads, columns, descriptors, train_rows=None, return_model=True):
+    """Process-pool worker fitting one model on the shared arrays (the first train_rows rows, if given)
+
+    Returns the pickled model (None unless return_model), R-squared on the test arrays and seconds.
+    """
+    arrays = {key: _attach_shared_array(*descriptor) for key, descriptor in descriptors.items()}
+    # Feature names keep inference on DataFrames consistent with training; wrapping does not copy
+    X_train = pd.DataFrame(arrays['X_train'][:train_rows], columns=columns, copy=False)
+    X_test = pd.DataFrame(arrays['X_test'], columns=columns, copy=False)
+
+    start = time.perf_counter()
+    model = build_model(name, params, n_threads)
+    model.fit(X_train, arrays['y_train'][:train_rows])
+    score = model.score(X_test, arrays['y_test'])
+    elapsed = time.perf_counter() - start
+    payload = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL) if return_model else None
+    return payload, score, elapsed
+
+
+@contextmanager
+def _shared_arrays(arrays):
+    """Copy arrays into shared memory once and yield their descriptors; workers only receive the block names"""
+    blocks = {}
+    try:
+        for key, array in arrays.items():
+            blocks[key] = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=blocks[key].buf)[:] = array
+        yield {key: (blocks[key].name, array.shape, array.dtype.str) for key, array in arrays.items()}
+    finally:
+        for block in blocks.values():
+            block.close()
+            block.unlink()
+
+
+_shared_blocks = {}
+
 
-        # Save the best model
-        model_path = os.path.join(os.path.dirname(__file__), 'best_delivery_time_model.pkl')
-        with open(model_path, 'wb') as f:
-            pickle.dump(best_model, f)
\ No newline at end of file
+def _attach_shared_array(block_name, shape, dtype):
+    """Read-only view of a shared-memory array; blocks stay mapped for the short life of the worker"""
+    if block_name not in _shared_blocks:
+        _shared_blocks[block_name] = shared_memory.SharedMemory(name=block_name)
+    array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=_shared_blocks[block_name].buf)
+    array.flags.writeable = False
+    return array
@@ -0,0 +1,117 @@
+import os
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+from src.utils.geo import EARTH_RADIUS_KM, MatrixCache, haversine_km, to_unit_vectors
+
+
+class RoadNetwork:
+    """Local road graph in CSR form with snapped many-to-many travel-time matrices in minutes"""
+
+    _shared = {}
+
+    def __init__(self, network_dir, cache_dir, batch_memory_mb, access_speed_kph, disk_entries, memory_entries=16):
+        """Load nodes.csv (node_id, latitude, longitude) and edges.csv (source, target, and travel_time_s
+        or length_m with speed_kph, optional oneway) from network_dir"""
+        self.network_dir = network_dir
+        self._disk_cache = MatrixCache(cache_dir, disk_entries)
+        self.batch_memory_mb = batch_memory_mb
+        self.access_speed_kph = access_speed_kph
+        self.memory_entries = memory_entries
+        self._matrices = OrderedDict()
+
+        nodes = pd.read_csv(os.path.join(network_dir, 'nodes.csv'))
+        edges = pd.read_csv(os.path.join(network_dir, 'edges.csv'))
+        self.node_coords = nodes[['latitude', 'longitude']].values.astype(np.float64)
+        node_index = pd.Index(nodes['node_id'])
+
+        if 'travel_time_s' in edges:
+            seconds = edges['travel_time_s'].values.astype(np.float64)
+        else:
+            seconds = edges['length_m'].values / (edges['speed_kph'].values / 3.6)
+        sources = node_index.get_indexer(edges['source'])
+        targets = node_index.get_indexer(edges['target'])
+
+        # Two-way streets become a pair of arcs
+        two_way = ~edges['oneway'].astype(bool).values if 'oneway' in edges else np.ones(len(edges), dtype=bool)
+        sources, targets = np.concatenate([sources, targets[two_way]]), np.concatenate([targets, sources[two_way]])
+        seconds = np.concatenate([seconds, seconds[two_way]])
+        valid = (sources >= 0) & (targets >= 0)
+
+        # Keep the fastest of any parallel arcs; csr_matrix would otherwise add them up
+        arcs = pd.DataFrame({'source': sources[valid], 'target': targets[valid], 'seconds': seconds[valid]})
+        arcs = arcs.sort_values('seconds').drop_duplicates(['source', 'target'])
+        self.graph = csr_matrix(
+            (arcs['seconds'].values, (arcs['source'].values, arcs['target'].values)),
+            shape=(len(nodes), len(nodes))
+        )
+        self._tree = cKDTree(to_unit_vectors(self.node_coords))
+
+        # Cached matrices are only valid for this exact graph
+        digest = hashlib.sha256()
+        for name in ('nodes.csv', 'edges.csv'):
+            stat = os.stat(os.path.join(network_dir, name))
+            digest.update(f'{name}:{stat.st_size}:{stat.st_mtime_ns}'.encode())
+        self.graph_fingerprint = digest.hexdigest()[:16]
+
+    @classmethod
+    def shared(cls, network_dir, cache_dir, batch_memory_mb, access_speed_kph, disk_entries):
+        """Load each road graph once per process"""
+        key = os.path.abspath(network_dir)
+        if key not in cls._shared:
+            cls._shared[key] = cls(network_dir, cache_dir, batch_memory_mb, access_speed_kph, disk_entries)
+        return cls._shared[key]
+
+    def snap(self, coords):
+        """Nearest graph node for each (lat, lon) and the straight-line access distance in km"""
+        chord, nodes = self._tree.query(to_unit_vectors(np.asarray(coords, dtype=np.float64)))
+        return nodes, 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+    def travel_time_matrix(self, coords):
+        """Stop-to-stop travel time in minutes: access legs plus shortest road path between snapped nodes"""
+        nodes, access_km = self.snap(coords)
+        unique_nodes, inverse = np.unique(nodes, return_inverse=True)
+        node_matrix = self._node_matrix(unique_nodes)
+
+        matrix = node_matrix[np.ix_(inverse, inverse)] / 60.0
+        access_minutes = access_km / self.access_speed_kph * 60.0
+        matrix += access_minutes[:, np.newaxis] + access_minutes[np.newaxis, :]
+        np.fill_diagonal(matrix, 0.0)
+        return matrix
+
+    def _node_matrix(self, unique_nodes):
+        """Seconds between every pair of graph nodes in unique_nodes, cached per node set in memory and on disk"""
+        digest = hashlib.sha256(self.graph_fingerprint.encode())
+        digest.update(np.ascontiguousarray(unique_nodes, dtype=np.int64).tobytes())
+        key = digest.hexdigest()
+        if key in self._matrices:
+            self._matrices.move_to_end(key)
+            return self._matrices[key]
+
+        matrix = self._disk_cache.get(key, lambda: self._shortest_paths(unique_nodes))
+        self._matrices[key] = matrix
+        while len(self._matrices) > self.memory_entries:
+            self._matrices.popitem(last=False)
+        return matrix
+
+    def _shortest_paths(self, unique_nodes):
+        """Batched single-source Dijkstra, sized so each batch of full-graph rows fits the memory budget"""
+        num_graph_nodes = self.graph.shape[0]
+        batch_size = max(1, int(self.batch_memory_mb * 2**20 // (num_graph_nodes * 8)))
+        matrix = np.empty((len(unique_nodes), len(unique_nodes)), dtype=np.float64)
+        for start in range(0, len(unique_nodes), batch_size):
+            sources = unique_nodes[start:start + batch_size]
+            matrix[start:start + len(sources)] = dijkstra(self.graph, directed=True, indices=sources)[:, unique_nodes]
+
+        # Disconnected pairs fall back to the access speed over the straight line
+        unreachable = ~np.isfinite(matrix)
+        if unreachable.any():
+            coords = self.node_coords[unique_nodes]
+            rows, cols = np.nonzero(unreachable)
+            km = haversine_km(coords[rows, 0], coords[rows, 1], coords[cols, 0], coords[cols, 1])
+            matrix[rows, cols] = km / self.access_speed_kph * 3600.0
+        return matrix
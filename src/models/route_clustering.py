@@ -0,0 +1,80 @@
+import numpy as np
+
+
+def sweep_clusters(latitudes, longitudes, demands, depot, n_clusters, max_cluster_size):
+    """Partition stops into angular sectors around the depot with balanced demand and bounded size"""
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    demands = np.asarray(demands, dtype=np.float64)
+
+    # Polar angle of each stop as seen from the depot
+    angles = np.arctan2(latitudes - depot[0], (longitudes - depot[1]) * np.cos(np.radians(depot[0])))
+    order = np.argsort(angles, kind='stable')
+
+    target_demand = demands.sum() / max(n_clusters, 1)
+    labels = np.empty(len(order), dtype=np.int32)
+    label, size, load = 0, 0, 0.0
+    for idx in order:
+        if size and (size >= max_cluster_size or load + demands[idx] > target_demand):
+            label += 1
+            size, load = 0, 0.0
+        labels[idx] = label
+        size += 1
+        load += demands[idx]
+    return labels
+
+
+def kmeans_clusters(latitudes, longitudes, n_clusters, iterations=25, seed=42):
+    """Lloyd's k-means on locally projected coordinates"""
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    points = np.column_stack([latitudes, longitudes * np.cos(np.radians(latitudes))])
+    n_clusters = min(n_clusters, len(points))
+
+    rng = np.random.default_rng(seed)
+    centers = points[rng.choice(len(points), n_clusters, replace=False)]
+    labels = np.full(len(points), -1, dtype=np.int32)
+    for _ in range(iterations):
+        sq_dist = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        new_labels = sq_dist.argmin(axis=1).astype(np.int32)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=n_clusters)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, points)
+        nonempty = counts > 0
+        centers[nonempty] = sums[nonempty] / counts[nonempty, None]
+    return labels
+
+
+def split_oversized_clusters(labels, latitudes, longitudes, demands, depot, max_cluster_size):
+    """Re-sweep any cluster larger than max_cluster_size so every sub-problem stays bounded"""
+    labels = np.asarray(labels, dtype=np.int32).copy()
+    next_label = labels.max() + 1 if len(labels) else 0
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label)
+        if len(members) <= max_cluster_size:
+            continue
+        n_parts = int(np.ceil(len(members) / max_cluster_size))
+        sub_labels = sweep_clusters(
+            latitudes[members], longitudes[members], demands[members], depot, n_parts, max_cluster_size
+        )
+        labels[members] = np.where(sub_labels == 0, label, next_label + sub_labels - 1)
+        next_label += sub_labels.max()
+    return labels
+
+
+def partition_stops(latitudes, longitudes, demands, depot, n_clusters, max_cluster_size, method='sweep'):
+    """Assign each stop to a cluster using the sweep or k-means strategy"""
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    demands = np.asarray(demands, dtype=np.float64)
+    n_clusters = max(n_clusters, int(np.ceil(len(latitudes) / max_cluster_size)))
+
+    if method == 'kmeans':
+        labels = kmeans_clusters(latitudes, longitudes, n_clusters)
+        return split_oversized_clusters(labels, latitudes, longitudes, demands, depot, max_cluster_size)
+    if method == 'sweep':
+        return sweep_clusters(latitudes, longitudes, demands, depot, n_clusters, max_cluster_size)
+    raise ValueError(f"Unknown clustering method: {method}")
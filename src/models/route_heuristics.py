@@ -0,0 +1,223 @@
+import numpy as np
+
+
+def schedule_is_feasible(route, time_matrix, windows, horizon, max_wait, depot=0):
+    """Check a route against the Time dimension: slack up to max_wait, windows and horizon"""
+    # Track the interval of cumul values reachable at each stop; the depot start is free
+    earliest, latest = 0, horizon
+    previous = depot
+    for node in route:
+        transit = time_matrix[previous, node]
+        earliest = max(earliest + transit, windows[node, 0])
+        latest = min(latest + transit + max_wait, windows[node, 1], horizon)
+        if earliest > latest:
+            return False
+        previous = node
+    return earliest + time_matrix[previous, depot] <= horizon
+
+
+def route_cost(route, distance_matrix, depot=0):
+    """Arc cost of depot -> route -> depot"""
+    path = np.array([depot] + list(route) + [depot])
+    return int(distance_matrix[path[:-1], path[1:]].sum())
+
+
+def clarke_wright(distance_matrix, time_matrix, demands, capacity, windows, horizon, max_wait,
+                  depot=0, neighbors=30):
+    """Savings construction restricted to each stop's nearest neighbours
+
+    Returns None when some stop cannot be served even on a route of its own.
+    """
+    size = len(distance_matrix)
+    stops = np.array([node for node in range(size) if node != depot])
+    if not len(stops):
+        return []
+    # Every merge keeps routes feasible, so the singleton routes it starts from must be feasible too
+    for node in stops:
+        if demands[node] > capacity or not schedule_is_feasible([node], time_matrix, windows, horizon, max_wait, depot):
+            return None
+
+    # Candidate merges (i ends a route, j starts the next) among the k nearest neighbours of i
+    k = min(neighbors, len(stops) - 1)
+    sub = distance_matrix[np.ix_(stops, stops)].astype(np.float64)
+    np.fill_diagonal(sub, np.inf)
+    if k > 0:
+        nearest = np.argpartition(sub, k - 1, axis=1)[:, :k]
+        heads = np.repeat(stops, k)
+        tails = stops[nearest.ravel()]
+    else:
+        heads = tails = np.array([], dtype=np.int64)
+    savings = (
+        distance_matrix[heads, depot].astype(np.int64)
+        + distance_matrix[depot, tails]
+        - distance_matrix[heads, tails]
+    )
+    order = np.argsort(-savings, kind='stable')
+
+    routes = {int(node): [int(node)] for node in stops}
+    route_of = np.arange(size)
+    loads = {int(node): int(demands[node]) for node in stops}
+    for idx in order:
+        if savings[idx] <= 0:
+            break
+        i, j = int(heads[idx]), int(tails[idx])
+        ri, rj = int(route_of[i]), int(route_of[j])
+        if ri == rj or routes[ri][-1] != i or routes[rj][0] != j:
+            continue
+        if loads[ri] + loads[rj] > capacity:
+            continue
+        merged = routes[ri] + routes[rj]
+        if not schedule_is_feasible(merged, time_matrix, windows, horizon, max_wait, depot):
+            continue
+        routes[ri] = merged
+        loads[ri] += loads.pop(rj)
+        route_of[routes.pop(rj)] = ri
+    return list(routes.values())
+
+
+def two_opt(route, distance_matrix, time_matrix, windows, horizon, max_wait, depot=0, max_passes=50):
+    """Best-improvement 2-opt with all segment reversals scored in one vectorized step"""
+    route = list(route)
+    for _ in range(max_passes):
+        if len(route) < 3:
+            break
+        path = np.array([depot] + route + [depot])
+        n = len(route)
+        i, j = np.triu_indices(n, 1)
+        # Reversing route[i..j] replaces arcs (i-1 -> i) and (j -> j+1) and flips the inner arcs
+        before = path[i], path[i + 1], path[j + 1], path[j + 2]
+        inner_forward = np.cumsum(np.concatenate([[0], distance_matrix[path[1:-2], path[2:-1]]]))
+        inner_backward = np.cumsum(np.concatenate([[0], distance_matrix[path[2:-1], path[1:-2]]]))
+        delta = (
+            distance_matrix[before[0], before[2]].astype(np.int64)
+            + distance_matrix[before[1], before[3]]
+            - distance_matrix[before[0], before[1]]
+            - distance_matrix[before[2], before[3]]
+            + (inner_backward[j] - inner_backward[i])
+            - (inner_forward[j] - inner_forward[i])
+        )
+        improved = False
+        for idx in np.flatnonzero(delta < 0)[np.argsort(delta[delta < 0])]:
+            candidate = route[:i[idx]] + route[i[idx]:j[idx] + 1][::-1] + route[j[idx] + 1:]
+            if schedule_is_feasible(candidate, time_matrix, windows, horizon, max_wait, depot):
+                route = candidate
+                improved = True
+                break
+        if not improved:
+            break
+    return route
+
+
+def or_opt(route, distance_matrix, time_matrix, windows, horizon, max_wait, depot=0, max_segment=3,
+           max_passes=50):
+    """Relocate segments of up to max_segment stops to their cheapest feasible position in the route"""
+    route = list(route)
+    for _ in range(max_passes):
+        improved = False
+        current = route_cost(route, distance_matrix, depot)
+        for length in range(1, min(max_segment, len(route) - 1) + 1):
+            for start in range(len(route) - length + 1):
+                segment = route[start:start + length]
+                rest = route[:start] + route[start + length:]
+                path = np.array([depot] + rest + [depot])
+                # Cost of inserting the segment between every consecutive pair of the remaining path
+                removed = route_cost(rest, distance_matrix, depot)
+                insert = (
+                    distance_matrix[path[:-1], segment[0]].astype(np.int64)
+                    + distance_matrix[segment[-1], path[1:]]
+                    - distance_matrix[path[:-1], path[1:]]
+                    + route_cost(segment, distance_matrix, depot)
+                    - distance_matrix[depot, segment[0]]
+                    - distance_matrix[segment[-1], depot]
+                )
+                for position in np.argsort(insert):
+                    if removed + insert[position] >= current:
+                        break
+                    candidate = rest[:position] + segment + rest[position:]
+                    if schedule_is_feasible(candidate, time_matrix, windows, horizon, max_wait, depot):
+                        route, improved = candidate, True
+                        break
+                if improved:
+                    break
+            if improved:
+                break
+        if not improved:
+            break
+    return route
+
+
+def eliminate_routes(routes, distance_matrix, time_matrix, demands, capacity, windows, horizon, max_wait,
+                     depot=0, attempts=10):
+    """Dissolve the smallest routes into the others by cheapest feasible insertion"""
+    routes = [list(route) for route in routes]
+    for victim in sorted(range(len(routes)), key=lambda r: len(routes[r])):
+        others = [r for r, route in enumerate(routes) if r != victim and route]
+        if not others:
+            break
+        trial = {r: list(routes[r]) for r in others}
+        loads = {r: int(demands[trial[r]].sum()) for r in others}
+        paths = {r: np.array([depot] + trial[r] + [depot]) for r in others}
+        for node in routes[victim]:
+            # Every insertion slot of every other route, scored in one vectorized pass
+            owners = np.concatenate([np.full(len(paths[r]) - 1, r) for r in others])
+            slots = np.concatenate([np.arange(len(paths[r]) - 1) for r in others])
+            prevs = np.concatenate([paths[r][:-1] for r in others])
+            nexts = np.concatenate([paths[r][1:] for r in others])
+            added = (
+                distance_matrix[prevs, node]
+                + distance_matrix[node, nexts]
+                - distance_matrix[prevs, nexts]
+            ).astype(np.float64)
+            owner_loads = np.array([loads[r] for r in others])[np.searchsorted(others, owners)]
+            added[owner_loads + demands[node] > capacity] = np.inf
+            inserted = False
+            for slot in np.argsort(added)[:attempts]:
+                if not np.isfinite(added[slot]):
+                    break
+                r, position = int(owners[slot]), int(slots[slot])
+                candidate = trial[r][:position] + [node] + trial[r][position:]
+                if schedule_is_feasible(candidate, time_matrix, windows, horizon, max_wait, depot):
+                    trial[r] = candidate
+                    loads[r] += int(demands[node])
+                    paths[r] = np.array([depot] + candidate + [depot])
+                    inserted = True
+                    break
+            if not inserted:
+                break
+        else:
+            for r in others:
+                routes[r] = trial[r]
+            routes[victim] = []
+    return [route for route in routes if route]
+
+
+def solve_savings_heuristic(data, horizon, max_wait):
+    """Clarke-Wright construction followed by 2-opt and or-opt; returns node routes without the depot
+
+    Returns None when no plan was found that serves every stop within data['num_vehicles'] vehicles.
+    """
+    distance_matrix = np.asarray(data['distance_matrix'], dtype=np.int64)
+    time_matrix = np.asarray(data['time_matrix'], dtype=np.int64)
+    windows = np.asarray(data['time_windows'], dtype=np.int64)
+    demands = np.asarray(data['demands'], dtype=np.int64)
+    depot = data['depot']
+
+    capacity = data['vehicle_capacities'][0]
+    routes = clarke_wright(distance_matrix, time_matrix, demands, capacity, windows, horizon, max_wait, depot)
+    if routes is None:
+        return None
+    routes = eliminate_routes(routes, distance_matrix, time_matrix, demands, capacity, windows, horizon, max_wait, depot)
+    if len(routes) > data['num_vehicles']:
+        # Over the fleet: try every insertion slot rather than the cheapest few
+        routes = eliminate_routes(
+            routes, distance_matrix, time_matrix, demands, capacity, windows, horizon, max_wait, depot,
+            attempts=len(distance_matrix)
+        )
+        if len(routes) > data['num_vehicles']:
+            return None
+    improved = []
+    for route in routes:
+        route = two_opt(route, distance_matrix, time_matrix, windows, horizon, max_wait, depot)
+        route = or_opt(route, distance_matrix, time_matrix, windows, horizon, max_wait, depot)
+        improved.append(route)
+    return improved
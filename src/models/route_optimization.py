@@ -1,40 +1,187 @@
 import os
+import time
+import multiprocessing
 import pandas as pd
 import numpy as np
 import mysql.connector
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
+from src.database.columnar_cache import processed_data_version, read_processed_data
+from src.models.route_clustering import partition_stops
+from src.models.route_heuristics import solve_savings_heuristic
+from src.models.road_network import RoadNetwork
+from src.models.route_plan_cache import RoutePlanCache, plan_fingerprint
+from src.models.solver_telemetry import SearchMonitor, TelemetryStore, adaptive_time_limit
+from src.models.travel_time import HourlyImpactProfile, TravelTimeTensor
 from src.utils.config_loader import ConfigLoader
-from functools import lru_cache
-from scipy.spatial.distance import pdist, squareform
+from src.utils.geo import DEPOT_LOCATION, DistanceMatrixCache
 
 class RouteOptimization:
+    SOLVER_MODES = ('exact', 'decomposed', 'portfolio', 'heuristic')
+
     def __init__(self):
         self.config = ConfigLoader().load_config()
-        self.depot_location = (39.8283, -98.5795)
+        self.depot_location = DEPOT_LOCATION
+        self._telemetry = self._create_telemetry_store()
+        self._plan_cache = RoutePlanCache.shared(
+            os.path.join(os.path.dirname(__file__), '..', 'data', 'cache', 'plans'),
+            self.config['route_optimization']['plan_cache_entries'],
+            self.config['route_optimization']['plan_cache_disk_entries']
+        )
         self._init_cache()
         
+    def _create_telemetry_store(self):
+        """Search-curve history at telemetry_file, relative to src/data unless absolute"""
+        settings = self.config['route_optimization']
+        return TelemetryStore(
+            os.path.join(os.path.dirname(__file__), '..', 'data', settings['telemetry_file']),
+            settings['telemetry_history'],
+            settings['telemetry_max_kb']
+        )
+
+    def _use_settings(self, settings):
+        """Adopt a caller's route_optimization settings, e.g. in a pool worker, including where telemetry goes"""
+        self.config['route_optimization'] = settings
+        self._telemetry = self._create_telemetry_store()
+        self._init_cache()
+
     def _init_cache(self):
         """Initialize cache settings for frequently accessed data"""
+        # (fingerprint, value) pairs, so a changed order set never reuses a stale matrix or model
         self._distance_matrix_cache = None
         self._data_model_cache = None
+        self._matrix_store = DistanceMatrixCache(
+            os.path.join(os.path.dirname(__file__), '..', 'data', 'cache', 'distance'),
+            self.config['route_optimization']['distance_scale'],
+            self.config['route_optimization']['distance_cache_entries']
+        )
         
-    @lru_cache(maxsize=128)
-    def _calculate_distance(self, lat1, lon1, lat2, lon2):
-        """Cached distance calculation between two points"""
-        return np.sqrt((lat1 - lat2)**2 + (lon1 - lon2)**2)
+    def solve_vrp(self, mode=None):
+        """Main function to solve the Vehicle Routing Problem, one plan per service date and shift"""
+        mode = mode or self.config['route_optimization']['solver_mode']
+        if mode not in self.SOLVER_MODES:
+            raise ValueError(f"Unknown solver mode: {mode}")
 
-    def solve_vrp(self):
-        """Main function to solve the Vehicle Routing Problem with optimizations"""
         # Load and preprocess data efficiently
-        csv_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'processed_data.csv')
-        self.delivery_df = pd.read_csv(csv_path, usecols=[
+        partitions = self._partition_orders(self._load_delivery_data())
+
+        # Decomposed and portfolio modes already spread over max_workers, so only exact fans out here
+        if mode == 'exact' and len(partitions) > 1:
+            with ProcessPoolExecutor(max_workers=self._max_workers()) as executor:
+                solved = list(executor.map(
+                    _solve_partition,
+                    [partition_df for _, _, partition_df in partitions],
+                    [mode] * len(partitions)
+                ))
+        else:
+            solved = [self._solve_orders(partition_df, mode) for _, _, partition_df in partitions]
+
+        routes_by_date = {}
+        for (plan_date, shift, _), partition_routes in zip(partitions, solved):
+            if not partition_routes:
+                print(f"No solution found for {plan_date} {shift} shift")
+                continue
+            self._label_routes(partition_routes, plan_date, shift)
+            routes_by_date.setdefault(plan_date, []).extend(partition_routes)
+
+        for plan_date, date_routes in routes_by_date.items():
+            self._batch_save_routes_to_db(date_routes, plan_date)
+        routes = [route for date_routes in routes_by_date.values() for route in date_routes]
+        return routes or None
+
+    def get_cached_plan(self, mode=None):
+        """The full plan when every partition of the current orders is already cached, otherwise None"""
+        mode = mode or self.config['route_optimization']['solver_mode']
+        routes = []
+        for plan_date, shift, partition_df in self._partition_orders(self._load_delivery_data()):
+            partition_routes = self._plan_cache.get(
+                self._plan_fingerprint(partition_df, self._solve_mode(mode, len(partition_df)))
+            )
+            if partition_routes is None:
+                return None
+            routes.extend(self._label_routes(partition_routes, plan_date, shift))
+        return routes or None
+
+    def plan_cache_stats(self):
+        """Hit/miss counters of the route plan cache in this process"""
+        return self._plan_cache.stats()
+
+    def _label_routes(self, routes, plan_date, shift):
+        """Tag routes with their service date, shift and route id"""
+        for route in routes:
+            route['service_date'] = plan_date
+            route['shift'] = shift
+            route['route_id'] = f"ROUTE-{plan_date}-{shift.upper()}-{route['vehicle_id']}"
+        return routes
+
+    def _plan_fingerprint(self, delivery_df, mode):
+        """Plan cache key, including the road graph and hourly profile versions the plan would be solved on"""
+        settings = self.config['route_optimization']
+        input_versions = {}
+        if settings['distance_source'] == 'road_network':
+            input_versions['road_graph'] = self._road_network().graph_fingerprint
+        if settings['travel_time_model'] == 'hourly':
+            input_versions['processed_data'] = processed_data_version()
+        return plan_fingerprint(delivery_df, mode, settings, input_versions)
+
+    def _solve_orders(self, delivery_df, mode):
+        """Solve one set of orders with the selected solver mode, reusing the stored plan for identical input"""
+        self.delivery_df = delivery_df
+        self._init_cache()
+        mode = self._solve_mode(mode, len(delivery_df))
+        fingerprint = self._plan_fingerprint(delivery_df, mode)
+        routes = self._plan_cache.get(fingerprint)
+        if routes is not None:
+            return routes
+
+        if mode == 'decomposed':
+            routes = self._solve_decomposed()
+        elif mode == 'portfolio':
+            routes = self._solve_portfolio()
+        elif mode == 'heuristic':
+            routes = self._solve_heuristic()
+        else:
+            routes = self._solve_single()
+        # A shift whose vehicles all stay at the depot is a plan too, and is cached like any other
+        if routes is not None:
+            self._plan_cache.put(fingerprint, routes)
+        return routes
+
+    def _solve_mode(self, mode, num_stops):
+        """Exact and portfolio solves from decompose_min_stops up run decomposed, as dense native-matrix clusters
+
+        A dense matrix over all stops would not fit in memory, and without one OR-Tools evaluates arcs
+        through Python and builds no first solution in time.
+        """
+        if mode in ('exact', 'portfolio') and num_stops >= self.config['route_optimization']['decompose_min_stops']:
+            return 'decomposed'
+        return mode
+
+    def _partition_orders(self, delivery_df):
+        """Split orders into (service date, shift) partitions, each timed from its shift start"""
+        delivery_times = pd.to_datetime(delivery_df['actual_delivery_time'])
+        partitions = []
+        for shift, (start_hour, end_hour) in self.config['route_optimization']['shifts'].items():
+            in_shift = (delivery_times.dt.hour >= start_hour) & (delivery_times.dt.hour < end_hour)
+            for service_date, shift_df in delivery_df[in_shift].groupby(delivery_times[in_shift].dt.date):
+                shift_df = shift_df.reset_index(drop=True)
+                shift_df['shift_start'] = pd.Timestamp(service_date) + pd.Timedelta(hours=start_hour)
+                partitions.append((service_date.strftime('%Y%m%d'), shift, shift_df))
+        return partitions
+
+    def _load_delivery_data(self):
+        """Load the processed orders needed for routing"""
+        delivery_df, _ = read_processed_data([
             'order_id', 'customer_location', 'latitude', 'longitude',
             'actual_delivery_time', 'package_weight', 'traffic_impact',
             'weather_impact', 'vehicle_id'
         ])
-        
+        return delivery_df
+
+    def _solve_single(self):
+        """Solve all loaded orders as one routing model"""
         # Vectorized distance matrix calculation
         distance_matrix = self._create_distance_matrix_vectorized()
         
@@ -51,63 +198,265 @@ class RouteOptimization:
         solution = self._solve_with_optimized_parameters(routing)
         
         if solution:
-            routes = self._get_routes_optimized(solution, routing, manager)
-            self._batch_save_routes_to_db(routes)
-            return routes
+            return self._get_routes_optimized(solution, routing, manager)
         return None
 
+    def _solve_heuristic(self):
+        """Sub-second Clarke-Wright savings with 2-opt/or-opt improvement, without OR-Tools"""
+        settings = self.config['route_optimization']
+        if len(self.delivery_df) <= 1:
+            return self._depot_only_routes()
+        data = self._create_data_model_optimized(self._create_distance_matrix_vectorized())
+        node_routes = solve_savings_heuristic(data, settings['time_window'], settings['max_waiting_time'])
+        if node_routes is None:
+            return None
+        return self._routes_from_nodes([[data['depot']] + route for route in node_routes])
+
+    def _solve_decomposed(self):
+        """Cluster-first, route-second: solve each stop cluster as an independent sub-VRP in parallel"""
+        settings = self.config['route_optimization']
+        if len(self.delivery_df) <= 1:
+            return self._depot_only_routes()
+        depot = tuple(self.delivery_df[['latitude', 'longitude']].values[0])
+        stops_df = self.delivery_df.iloc[1:]
+        demands = self.delivery_df['package_weight'].values.astype(np.int32)
+
+        # Clusters as large as max_cluster_size allows, so vehicles share the stops of a whole area. Clusters of
+        # one vehicle's demand each leave no slack for time windows and fail to solve on large instances
+        labels = partition_stops(
+            stops_df['latitude'].values,
+            stops_df['longitude'].values,
+            demands[1:],
+            depot,
+            int(np.ceil(len(stops_df) / settings['max_cluster_size'])),
+            settings['max_cluster_size'],
+            settings['clustering_method']
+        )
+
+        # Every sub-problem keeps row 0 as its depot, mirroring the single-model formulation
+        clusters = []
+        for label in np.unique(labels):
+            rows = np.concatenate([[0], np.flatnonzero(labels == label) + 1])
+            clusters.append([rows, max(int(np.ceil(demands[rows[1:]].sum() / settings['max_capacity'])), 1)])
+
+        # Largest clusters first so no worker is left with a long tail
+        clusters.sort(key=lambda cluster: len(cluster[0]), reverse=True)
+
+        # The clusters share the real fleet: each gets the vehicles its demand needs, then spares if every
+        # cluster can have them; otherwise spares are held back for clusters that turn out infeasible
+        fleet = self._num_vehicles(self.delivery_df)
+        spare = fleet - sum(num_vehicles for _, num_vehicles in clusters)
+        if spare < 0:
+            print(f"Decomposition needs {fleet - spare} vehicles for {len(clusters)} clusters, {fleet} available")
+            return None
+        if spare >= settings['cluster_spare_vehicles'] * len(clusters):
+            for cluster in clusters:
+                cluster[1] += settings['cluster_spare_vehicles']
+            spare -= settings['cluster_spare_vehicles'] * len(clusters)
+
+        # Clusters run a pool's width at a time, so their limits split the whole instance's budget
+        workers = min(len(clusters), self._max_workers())
+        time_limit = self._time_budget(len(self.delivery_df), 'decomposed') * workers / len(clusters)
+
+        cluster_routes = {}
+        pending = list(range(len(clusters)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while pending:
+                results = executor.map(
+                    _solve_cluster,
+                    [self.delivery_df.iloc[clusters[index][0]] for index in pending],
+                    [clusters[index][1] for index in pending],
+                    [time_limit] * len(pending),
+                    [settings] * len(pending)
+                )
+                failed = []
+                for index, routes in zip(pending, results):
+                    if routes is None:
+                        failed.append(index)
+                    else:
+                        cluster_routes[index] = routes
+                # Time windows can need more vehicles than demand does: retry with one more each
+                if len(failed) > spare:
+                    # A plan missing a cluster's stops is not a plan
+                    print(f"No solution found for {len(failed)} clusters with {spare} spare vehicles left")
+                    return None
+                for index in failed:
+                    clusters[index][1] += 1
+                spare -= len(failed)
+                pending = failed
+
+        node_routes = [
+            rows[nodes].tolist()
+            for index, (rows, _) in enumerate(clusters)
+            for nodes in cluster_routes[index]
+        ]
+        return self._routes_from_nodes(node_routes)
+
+    def _solve_portfolio(self):
+        """Race several search strategies in separate processes and keep the best plan"""
+        settings = self.config['route_optimization']
+        distance_matrix = self._create_distance_matrix_vectorized()
+        data = self._create_data_model_optimized(distance_matrix)
+        lower_bound = self._objective_lower_bound(distance_matrix, data['depot'])
+        
+        # Shared with every worker: best objective so far and the signal to stop searching
+        best_objective = multiprocessing.Value('q', np.iinfo(np.int64).max)
+        stop_event = multiprocessing.Event()
+        # A strategy only races the others while it has a core of its own; queued ones would run after the deadline
+        strategies = settings['portfolio'][:self._max_workers()]
+        # CLOCK_MONOTONIC is system-wide on Linux, so workers can measure the same deadline
+        deadline = time.monotonic() + self._time_budget(len(self.delivery_df), 'portfolio')
+        
+        with ProcessPoolExecutor(
+            max_workers=len(strategies),
+            initializer=_init_portfolio_worker,
+            initargs=(best_objective, stop_event)
+        ) as executor:
+            futures = [
+                executor.submit(_solve_portfolio_member, data, deadline, settings, first_solution, metaheuristic)
+                for first_solution, metaheuristic in strategies
+            ]
+            while not all(future.done() for future in futures):
+                best = best_objective.value
+                gap = (best - lower_bound) / best if 0 < best < np.iinfo(np.int64).max else 1.0
+                if gap <= settings['portfolio_target_gap'] or time.monotonic() >= deadline:
+                    stop_event.set()
+                    for future in futures:
+                        future.cancel()
+                time.sleep(0.05)
+            results = [future.result() for future in futures if not future.cancelled()]
+        
+        results = [result for result in results if result is not None]
+        if not results:
+            return None
+        objective, node_routes, strategy = min(results, key=lambda result: result[0])
+        print(f"Portfolio winner: {strategy} with objective {objective} (lower bound {lower_bound})")
+        return self._routes_from_nodes(node_routes)
+
+    def _objective_lower_bound(self, distance_matrix, depot):
+        """Every stop leaves along exactly one arc, so the cheapest outgoing arcs bound the objective"""
+        matrix = np.asarray(distance_matrix, dtype=np.float64).copy()
+        np.fill_diagonal(matrix, np.inf)
+        cheapest = matrix.min(axis=1)
+        cheapest[depot] = 0
+        return int(cheapest[np.isfinite(cheapest)].sum())
+
     def _create_distance_matrix_vectorized(self):
         """Create distance matrix using vectorized operations"""
-        if self._distance_matrix_cache is not None:
-            return self._distance_matrix_cache
+        settings = self.config['route_optimization']
+        key = plan_fingerprint(
+            self.delivery_df[['latitude', 'longitude', 'traffic_impact', 'weather_impact']],
+            'matrix', {'distance_source': settings['distance_source']}
+        )
+        if self._distance_matrix_cache is not None and self._distance_matrix_cache[0] == key:
+            return self._distance_matrix_cache[1]
             
         locations = self.delivery_df[['latitude', 'longitude']].values
         
-        # Use scipy's pdist for efficient distance calculation
-        distances = pdist(locations, metric='euclidean')
-        matrix = squareform(distances)
+        if settings['distance_source'] == 'road_network':
+            # Road travel minutes, the same unit as the Time dimension
+            matrix = self._road_network().travel_time_matrix(locations)
+        else:
+            # Scaled great-circle matrix, reused from disk when the same stops were solved before
+            matrix = self._matrix_store.get_matrix(locations).astype(np.float64)
         
         # Vectorized impact calculations
         traffic_impact = self.delivery_df['traffic_impact'].values
         weather_impact = self.delivery_df['weather_impact'].values
         
-        # Broadcasting for efficient multiplication
-        impact_matrix = np.outer(np.ones(len(matrix)), traffic_impact * weather_impact)
-        matrix *= impact_matrix
+        # Broadcast the per-destination impact across rows instead of materializing it
+        matrix *= (traffic_impact * weather_impact)[np.newaxis, :]
         
-        self._distance_matrix_cache = matrix.astype(np.int32)
-        return self._distance_matrix_cache
+        matrix = np.rint(matrix).astype(np.int32)
+        self._distance_matrix_cache = (key, matrix)
+        return matrix
+
+    def _road_network(self):
+        """Local road graph, loaded once per process"""
+        settings = self.config['route_optimization']
+        return RoadNetwork.shared(
+            os.path.join(os.path.dirname(__file__), '..', 'data', settings['road_network_dir']),
+            os.path.join(os.path.dirname(__file__), '..', 'data', 'cache', 'road'),
+            settings['road_batch_memory_mb'],
+            settings['road_access_speed_kph'],
+            settings['road_cache_entries']
+        )
 
     def _create_data_model_optimized(self, distance_matrix):
         """Create optimized data model with minimal conversions"""
-        if self._data_model_cache is not None:
-            return self._data_model_cache
+        key = (plan_fingerprint(self.delivery_df, 'model', {}), id(distance_matrix))
+        if self._data_model_cache is not None and self._data_model_cache[0] == key:
+            return self._data_model_cache[1]
             
+        data = self._build_data_model(self.delivery_df, distance_matrix)
+        self._data_model_cache = (key, data)
+        return data
+
+    def _num_vehicles(self, delivery_df):
+        """Number of vehicles available for the given orders"""
+        return min(
+            self.config['route_optimization']['max_vehicles'],
+            delivery_df['vehicle_id'].nunique()
+        )
+
+    def _max_workers(self):
+        """Solver processes one solve may run at once: max_workers, or every core when it is 0"""
+        max_workers = self.config['route_optimization']['max_workers']
+        return min(max_workers, os.cpu_count()) if max_workers > 0 else os.cpu_count()
+
+    def _build_data_model(self, delivery_df, distance_matrix, num_vehicles=None):
+        """Build the routing data model for a set of orders"""
+        num_vehicles = num_vehicles or self._num_vehicles(delivery_df)
         data = {
             'distance_matrix': distance_matrix,
             'time_matrix': distance_matrix,
-            'num_vehicles': min(
-                self.config['route_optimization']['max_vehicles'],
-                self.delivery_df['vehicle_id'].nunique()
-            ),
+            'num_vehicles': num_vehicles,
             'depot': 0,
             'vehicle_capacities': [
                 self.config['route_optimization']['max_capacity']
-            ] * self.delivery_df['vehicle_id'].nunique(),
-            'demands': self.delivery_df['package_weight'].astype(np.int32).tolist(),
+            ] * num_vehicles,
+            'demands': delivery_df['package_weight'].astype(np.int32).tolist(),
         }
         
         # Vectorized time window calculation
-        delivery_times = pd.to_datetime(self.delivery_df['actual_delivery_time'])
-        minutes_since_midnight = delivery_times.dt.hour * 60 + delivery_times.dt.minute
-        window_starts = minutes_since_midnight.astype(np.int32)
-        window_ends = window_starts + 240
+        # Minutes since the shift start for partitioned orders, otherwise since midnight
+        delivery_times = pd.to_datetime(delivery_df['actual_delivery_time'])
+        if 'shift_start' in delivery_df:
+            origin = pd.to_datetime(delivery_df['shift_start'])
+        else:
+            origin = delivery_times.dt.normalize()
+        minutes_since_origin = (delivery_times - origin).dt.total_seconds() // 60
+        window_starts = minutes_since_origin.astype(np.int32)
+        window_ends = np.minimum(window_starts + 240, self.config['route_optimization']['time_window'])
         
         data['time_windows'] = list(zip(window_starts, window_ends))
-        
-        self._data_model_cache = data
+
+        if self.config['route_optimization']['travel_time_model'] == 'hourly':
+            departure_hours = origin.dt.hour.values + window_starts.values // 60
+            data['time_matrix'] = self._create_time_matrix(delivery_df, departure_hours)
         return data
 
+    def _create_time_matrix(self, delivery_df, departure_hours):
+        """Travel minutes out of each stop, taken from the hourly tensor slice of its departure hour"""
+        settings = self.config['route_optimization']
+        locations = delivery_df[['latitude', 'longitude']].values
+        if settings['distance_source'] == 'road_network':
+            base_minutes = self._road_network().travel_time_matrix(locations)
+        else:
+            base_minutes = self._matrix_store.get_matrix(locations) / settings['distance_scale'] / settings['average_speed_kph'] * 60
+
+        if processed_data_version() is not None:
+            profile = HourlyImpactProfile.shared()
+        else:
+            # Without processed history (e.g. synthetic benchmark instances) profile the orders themselves
+            profile = HourlyImpactProfile(delivery_df)
+        tensor = TravelTimeTensor(
+            base_minutes,
+            profile.stop_factors(delivery_df['customer_location']),
+            settings['time_resolution']
+        )
+        return tensor.departure_matrix(departure_hours)
+
     def _create_routing_model(self, data):
         """Create routing model with optimized settings"""
         manager = pywrapcp.RoutingIndexManager(
@@ -119,26 +468,16 @@ class RouteOptimization:
         return manager, routing
 
     def _register_callbacks(self, routing, manager, data):
-        """Register all callbacks efficiently"""
-        # Use numpy arrays for faster lookup
-        distance_matrix = np.array(data['distance_matrix'])
-        demands = np.array(data['demands'])
-        time_matrix = np.array(data['time_matrix'])
+        """Register transits as native matrices/vectors evaluated without calling back into Python"""
+        demands = np.asarray(data['demands'], dtype=np.int64)
         
-        def distance_callback(from_index, to_index):
-            return int(distance_matrix[manager.IndexToNode(from_index)][manager.IndexToNode(to_index)])
-            
-        def demand_callback(from_index):
-            return int(demands[manager.IndexToNode(from_index)])
-            
-        def time_callback(from_index, to_index):
-            return int(time_matrix[manager.IndexToNode(from_index)][manager.IndexToNode(to_index)])
-        
-        # Register callbacks
-        transit_callback_index = routing.RegisterTransitCallback(distance_callback)
+        # Register transits
+        transit_callback_index = routing.RegisterTransitMatrix(
+            np.asarray(data['distance_matrix'], dtype=np.int64).tolist()
+        )
         routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
         
-        demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
+        demand_callback_index = routing.RegisterUnaryTransitVector(demands.tolist())
         routing.AddDimensionWithVehicleCapacity(
             demand_callback_index,
             0,
@@ -147,10 +486,16 @@ class RouteOptimization:
             'Capacity'
         )
         
-        time_callback_index = routing.RegisterTransitCallback(time_callback)
+        # Reuse the distance transit when the time matrix is the same data
+        if data['time_matrix'] is data['distance_matrix']:
+            time_callback_index = transit_callback_index
+        else:
+            time_callback_index = routing.RegisterTransitMatrix(
+                np.asarray(data['time_matrix'], dtype=np.int64).tolist()
+            )
         routing.AddDimension(
             time_callback_index,
-            30,
+            self.config['route_optimization']['max_waiting_time'],
             self.config['route_optimization']['time_window'],
             False,
             'Time'
@@ -164,57 +509,102 @@ class RouteOptimization:
             index = manager.NodeToIndex(location_idx)
             time_dimension.CumulVar(index).SetRange(time_window[0], time_window[1])
 
-    def _solve_with_optimized_parameters(self, routing):
-        """Solve with optimized search parameters"""
+    def _solve_with_optimized_parameters(self, routing, time_limit=None, mode='exact'):
+        """Solve with optimized search parameters and a size-adaptive time budget"""
+        time_limit = time_limit or self._time_budget(routing.nodes(), mode)
+        monitor = self._attach_search_monitor(routing)
+        solution = routing.SolveWithParameters(self._search_parameters(time_limit))
+        self._telemetry.record(mode, routing.nodes(), time_limit, monitor.curve)
+        return solution
+
+    def _time_budget(self, num_stops, mode='exact'):
+        """Time limit from instance size and historical search curves of the same mode, capped by time_limit"""
+        settings = self.config['route_optimization']
+        if not settings['adaptive_time_limit']:
+            return settings['time_limit']
+        return adaptive_time_limit(num_stops, self._telemetry.load(), settings, mode)
+
+    def _attach_search_monitor(self, routing):
+        """Record objective versus time and stop on a plateau; attach before the model is closed"""
+        settings = self.config['route_optimization']
+        monitor = SearchMonitor(routing, settings['plateau_seconds'], settings['plateau_min_improvement'])
+        routing.AddAtSolutionCallback(monitor)
+        return monitor
+
+    def _search_parameters(self, time_limit=None, first_solution='PARALLEL_CHEAPEST_INSERTION',
+                           metaheuristic='GUIDED_LOCAL_SEARCH'):
+        """Build the search parameters shared by full, incremental and portfolio solves"""
         search_parameters = pywrapcp.DefaultRoutingSearchParameters()
         search_parameters.first_solution_strategy = (
-            routing_enums_pb2.FirstSolutionStrategy.PARALLEL_CHEAPEST_INSERTION
+            getattr(routing_enums_pb2.FirstSolutionStrategy, first_solution)
         )
         search_parameters.local_search_metaheuristic = (
-            routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+            getattr(routing_enums_pb2.LocalSearchMetaheuristic, metaheuristic)
+        )
+        search_parameters.time_limit.FromMilliseconds(
+            int((time_limit or self.config['route_optimization']['time_limit']) * 1000)
         )
-        search_parameters.time_limit.seconds = 30
         search_parameters.use_full_propagation = True
-        search_parameters.log_search = False
+        search_parameters.log_search = self.config['route_optimization']['log_search']
         
-        return routing.SolveWithParameters(search_parameters)
+        return search_parameters
 
     def _get_routes_optimized(self, solution, routing, manager):
         """Extract routes with minimal dataframe operations"""
-        routes = []
-        df_values = self.delivery_df[['order_id', 'customer_location', 'latitude', 'longitude', 'actual_delivery_time']].values
-        
+        return self._routes_from_nodes(self._extract_node_routes(solution, routing, manager))
+
+    def _extract_node_routes(self, solution, routing, manager):
+        """Read the node sequence travelled by every vehicle, starting at the depot"""
+        node_routes = []
         for vehicle_id in range(routing.vehicles()):
             index = routing.Start(vehicle_id)
-            route = []
+            nodes = []
             while not routing.IsEnd(index):
-                node_index = manager.IndexToNode(index)
+                nodes.append(manager.IndexToNode(index))
+                index = solution.Value(routing.NextVar(index))
+            node_routes.append(nodes)
+        return node_routes
+
+    def _depot_only_routes(self):
+        """What the routing model returns when there is no stop besides the depot: every vehicle stays there"""
+        return self._routes_from_nodes([[0]] * self._num_vehicles(self.delivery_df))
+
+    def _routes_from_nodes(self, node_routes):
+        """Map per-vehicle row indices of delivery_df onto the routes structure"""
+        routes = []
+        df_values = self.delivery_df[[
+            'order_id', 'customer_location', 'latitude', 'longitude', 'actual_delivery_time', 'package_weight'
+        ]].values
+        
+        for vehicle_id, nodes in enumerate(node_routes):
+            route = []
+            for node_index in nodes:
                 row = df_values[node_index]
                 route.append({
                     'order_id': row[0],
                     'location': row[1],
                     'latitude': float(row[2]),
                     'longitude': float(row[3]),
-                    'delivery_time': str(row[4])
+                    'delivery_time': str(row[4]),
+                    'package_weight': float(row[5])
                 })
-                index = solution.Value(routing.NextVar(index))
             routes.append({
                 'vehicle_id': f'VEH-{vehicle_id:03d}',
                 'stops': route
             })
         return routes
 
-    def _batch_save_routes_to_db(self, routes):
-        """Save routes to database using batch operations"""
-        db = mysql.connector.connect(
+    def _get_db_connection(self):
+        """Open a connection to the MySQL database"""
+        return mysql.connector.connect(
             host=self.config['DB_HOST'],
             user=self.config['DB_USER'],
             password=self.config['DB_PASSWORD'],
             database=self.config['DB_NAME']
         )
-        cursor = db.cursor()
-        
-        # Create table if not exists
+
+    def _ensure_routes_table(self, cursor):
+        """Create the optimized_routes table if it does not exist"""
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS optimized_routes (
                 route_id VARCHAR(50),
@@ -225,37 +615,386 @@ class RouteOptimization:
                 latitude FLOAT,
                 longitude FLOAT,
                 planned_delivery_time DATETIME,
+                package_weight FLOAT,
                 created_at DATETIME
             )
         """)
+        # Tables created before weights were stored get the column; their existing rows read back as 0
+        cursor.execute("SHOW COLUMNS FROM optimized_routes LIKE 'package_weight'")
+        if not cursor.fetchall():
+            cursor.execute("ALTER TABLE optimized_routes ADD COLUMN package_weight FLOAT AFTER planned_delivery_time")
+
+    def _route_stop_rows(self, route, stops, plan_date, created_at):
+        """Build optimized_routes rows for (stop_number, stop) pairs of one route"""
+        route_id = route.get('route_id', f"ROUTE-{plan_date}-{route['vehicle_id']}")
+        return [
+            (
+                route_id,
+                route['vehicle_id'],
+                stop_num,
+                stop['order_id'],
+                stop['location'],
+                stop['latitude'],
+                stop['longitude'],
+                stop['delivery_time'],
+                stop['package_weight'],
+                created_at
+            )
+            for stop_num, stop in stops
+        ]
+
+    def _batch_save_routes_to_db(self, routes, plan_date=None):
+        """Save routes to database using batch operations, replacing any plan for the same day"""
+        db = self._get_db_connection()
+        cursor = db.cursor()
+        
+        # Create table if not exists
+        self._ensure_routes_table(cursor)
         
         # Prepare batch insert
-        current_date = datetime.now().strftime('%Y%m%d')
+        current_date = plan_date or datetime.now().strftime('%Y%m%d')
         current_time = datetime.now()
         
         values = []
         for route in routes:
-            route_id = f"ROUTE-{current_date}-{route['vehicle_id']}"
-            for stop_num, stop in enumerate(route['stops'], 1):
-                values.append((
-                    route_id,
-                    route['vehicle_id'],
-                    stop_num,
-                    stop['order_id'],
-                    stop['location'],
-                    stop['latitude'],
-                    stop['longitude'],
-                    stop['delivery_time'],
-                    current_time
-                ))
+            values.extend(self._route_stop_rows(route, enumerate(route['stops'], 1), current_date, current_time))
+        
+        # Re-running the planner for a day replaces that day's plan
+        cursor.execute("DELETE FROM optimized_routes WHERE route_id LIKE %s", (f"ROUTE-{current_date}-%",))
         
         # Batch insert
         cursor.executemany("""
             INSERT INTO optimized_routes (
                 route_id, vehicle_id, stop_number, order_id, location,
-                latitude, longitude, planned_delivery_time, created_at
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                latitude, longitude, planned_delivery_time, package_weight, created_at
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         """, values)
         
         db.commit()
         db.close()
+
+    def _load_routes_from_db(self, plan_date, shift=None):
+        """Load the stored plan for a YYYYMMDD date, optionally a single shift, as a routes structure"""
+        prefix = f"ROUTE-{plan_date}-{shift.upper()}-" if shift else f"ROUTE-{plan_date}-"
+        db = self._get_db_connection()
+        cursor = db.cursor()
+        self._ensure_routes_table(cursor)
+        cursor.execute("""
+            SELECT route_id, vehicle_id, order_id, location, latitude, longitude, planned_delivery_time,
+                   package_weight
+            FROM optimized_routes
+            WHERE route_id LIKE %s
+            ORDER BY route_id, stop_number
+        """, (f"{prefix}%",))
+        rows = cursor.fetchall()
+        db.close()
+
+        routes = {}
+        for route_id, vehicle_id, order_id, location, latitude, longitude, planned_time, weight in rows:
+            route = routes.setdefault(route_id, {'route_id': route_id, 'vehicle_id': vehicle_id, 'stops': []})
+            route['stops'].append({
+                'order_id': order_id,
+                'location': location,
+                'latitude': float(latitude),
+                'longitude': float(longitude),
+                'delivery_time': str(planned_time),
+                'package_weight': float(weight or 0.0)
+            })
+        return list(routes.values())
+
+    def get_routes_by_date(self, date):
+        """Return the stored plan for a YYYY-MM-DD date in the API response shape"""
+        plan_date = datetime.strptime(date, '%Y-%m-%d').strftime('%Y%m%d')
+        return [
+            {
+                'route_id': route['route_id'],
+                'vehicle_id': route['vehicle_id'],
+                'stops': [
+                    {
+                        'order_id': stop['order_id'],
+                        'location': stop['location'],
+                        'latitude': stop['latitude'],
+                        'longitude': stop['longitude'],
+                        'planned_delivery_time': stop['delivery_time']
+                    }
+                    for stop in route['stops']
+                ]
+            }
+            for route in self._load_routes_from_db(plan_date)
+        ]
+
+    def reoptimize_incremental(self, new_orders=None, cancelled_order_ids=(), shift=None):
+        """Warm-start today's stored plan with new and cancelled orders, one shift at a time or only shift
+
+        Time windows count from a shift's start, so a plan spanning several shifts is never solved as one model.
+        """
+        plan_date = datetime.now().strftime('%Y%m%d')
+        shifts = self.config['route_optimization']['shifts']
+        plans = {
+            name: sorted(self._load_routes_from_db(plan_date, name), key=lambda route: route['route_id'])
+            for name in ([shift] if shift else shifts)
+        }
+        orders_df = self._load_delivery_data()
+        cancelled = set(cancelled_order_ids)
+
+        if new_orders is not None and len(new_orders):
+            new_hours = pd.to_datetime(new_orders['actual_delivery_time']).dt.hour
+        routes = []
+        solved = False
+        for name, previous_routes in plans.items():
+            start_hour, end_hour = shifts[name]
+            shift_orders = None
+            if new_orders is not None and len(new_orders):
+                shift_orders = new_orders[(new_hours >= start_hour) & (new_hours < end_hour)]
+            shift_start = pd.Timestamp(datetime.strptime(plan_date, '%Y%m%d')) + pd.Timedelta(hours=start_hour)
+
+            if previous_routes:
+                shift_routes = self._reoptimize_shift(
+                    plan_date, name, shift_start, previous_routes, shift_orders, cancelled, orders_df
+                )
+            else:
+                shift_routes = self._plan_shift(plan_date, name, shift_start, shift_orders, cancelled, orders_df)
+                if shift_routes is False:
+                    continue
+
+            if not shift_routes:
+                print(f"No solution found for the {name} shift; its stored plan is kept")
+                continue
+            solved = True
+            routes.extend(shift_routes)
+        return routes if solved else None
+
+    def _plan_shift(self, plan_date, shift, shift_start, new_orders, cancelled, orders_df):
+        """Plan a shift of today that has no stored routes from its orders, the new ones and minus cancellations
+
+        Returns False when the shift has no orders at all, otherwise the solved routes or None.
+        """
+        start_hour, end_hour = self.config['route_optimization']['shifts'][shift]
+        delivery_times = pd.to_datetime(orders_df['actual_delivery_time'])
+        in_shift = (
+            (delivery_times.dt.normalize() == shift_start.normalize())
+            & (delivery_times.dt.hour >= start_hour) & (delivery_times.dt.hour < end_hour)
+        )
+        frames = [orders_df[in_shift]]
+        if new_orders is not None and len(new_orders):
+            frames.append(new_orders[~new_orders['order_id'].isin(orders_df.loc[in_shift, 'order_id'])])
+        partition_df = pd.concat(frames, ignore_index=True)
+        partition_df = partition_df[~partition_df['order_id'].isin(cancelled)].reset_index(drop=True)
+        if not len(partition_df):
+            return False
+        partition_df['shift_start'] = shift_start
+
+        routes = self._solve_orders(partition_df, self.config['route_optimization']['solver_mode'])
+        if routes:
+            self._label_routes(routes, plan_date, shift)
+            self._save_route_diff([], routes, plan_date)
+        return routes
+
+    def _reoptimize_shift(self, plan_date, shift, shift_start, previous_routes, new_orders, cancelled, orders_df):
+        """Re-solve one shift's stored routes from the previous plan, timed from shift_start"""
+        # Keep the planned orders (depot first) minus cancellations, then append the new ones
+        planned_ids = list(dict.fromkeys(
+            stop['order_id'] for route in previous_routes for stop in route['stops']
+            if stop['order_id'] not in cancelled
+        ))
+        orders_df = orders_df.set_index('order_id')
+        stored_stops = {stop['order_id']: stop for route in previous_routes for stop in route['stops']}
+        missing_ids = [order_id for order_id in planned_ids if order_id not in orders_df.index]
+        if missing_ids:
+            # Orders added by earlier incremental runs only live in the stored plan, weight included
+            orders_df = pd.concat([orders_df, pd.DataFrame({
+                'customer_location': [stored_stops[order_id]['location'] for order_id in missing_ids],
+                'latitude': [stored_stops[order_id]['latitude'] for order_id in missing_ids],
+                'longitude': [stored_stops[order_id]['longitude'] for order_id in missing_ids],
+                'actual_delivery_time': [stored_stops[order_id]['delivery_time'] for order_id in missing_ids],
+                'package_weight': [stored_stops[order_id]['package_weight'] for order_id in missing_ids],
+                'traffic_impact': 1.0,
+                'weather_impact': 1.0,
+                'vehicle_id': None
+            }, index=pd.Index(missing_ids, name='order_id'))])
+        frames = [orders_df.loc[planned_ids].reset_index()]
+        if new_orders is not None and len(new_orders):
+            frames.append(new_orders[~new_orders['order_id'].isin(planned_ids)])
+        self.delivery_df = pd.concat(frames, ignore_index=True)
+        self.delivery_df['shift_start'] = shift_start
+        self._init_cache()
+
+        distance_matrix = self._create_distance_matrix_vectorized()
+        data = self._build_data_model(
+            self.delivery_df,
+            distance_matrix,
+            max(len(previous_routes), self._num_vehicles(self.delivery_df))
+        )
+        manager, routing = self._create_routing_model(data)
+        self._register_callbacks(routing, manager, data)
+
+        # Previous plan as initial routes (depot excluded), new orders by cheapest insertion
+        node_of = {order_id: node for node, order_id in enumerate(self.delivery_df['order_id'])}
+        initial_routes = [
+            [node_of[stop['order_id']] for stop in route['stops']
+             if stop['order_id'] in node_of and node_of[stop['order_id']] != data['depot']]
+            for route in previous_routes
+        ]
+        initial_routes += [[] for _ in range(data['num_vehicles'] - len(initial_routes))]
+        routed = {node for route in initial_routes for node in route}
+        new_nodes = [node for node in range(len(self.delivery_df)) if node != data['depot'] and node not in routed]
+        initial_routes = self._cheapest_insertion(initial_routes, new_nodes, distance_matrix, data['depot'])
+
+        time_limit = self.config['route_optimization']['incremental_time_limit']
+        search_parameters = self._search_parameters(time_limit)
+        monitor = self._attach_search_monitor(routing)
+        routing.CloseModelWithParameters(search_parameters)
+        initial_solution = routing.ReadAssignmentFromRoutes(initial_routes, True)
+        if initial_solution:
+            solution = routing.SolveFromAssignmentWithParameters(initial_solution, search_parameters)
+        else:
+            # The spliced plan violates a constraint, so let the solver build a fresh first solution
+            solution = routing.SolveWithParameters(search_parameters)
+        self._telemetry.record('incremental', routing.nodes(), time_limit, monitor.curve)
+        if not solution:
+            return None
+
+        # Vehicle i continues the stored route i; any extra vehicles get new route ids
+        routes = self._get_routes_optimized(solution, routing, manager)
+        for vehicle, route in enumerate(routes):
+            if vehicle < len(previous_routes):
+                route['route_id'] = previous_routes[vehicle]['route_id']
+                route['vehicle_id'] = previous_routes[vehicle]['vehicle_id']
+            else:
+                route['vehicle_id'] = f'VEH-{vehicle:03d}'
+                route['route_id'] = f"ROUTE-{plan_date}-{shift.upper()}-{route['vehicle_id']}"
+        self._save_route_diff(previous_routes, routes, plan_date)
+        return routes
+
+    def _cheapest_insertion(self, initial_routes, new_nodes, distance_matrix, depot):
+        """Insert nodes one by one at the position adding the least distance"""
+        routes = [list(route) for route in initial_routes]
+        for node in new_nodes:
+            best = None
+            for vehicle, route in enumerate(routes):
+                path = np.array([depot] + route + [depot])
+                added = (
+                    distance_matrix[path[:-1], node].astype(np.int64)
+                    + distance_matrix[node, path[1:]]
+                    - distance_matrix[path[:-1], path[1:]]
+                )
+                position = int(added.argmin())
+                if best is None or added[position] < best[0]:
+                    best = (added[position], vehicle, position)
+            routes[best[1]].insert(best[2], node)
+        return routes
+
+    def _save_route_diff(self, previous_routes, routes, plan_date):
+        """Persist only the stops that were removed, added or re-sequenced since the previous plan"""
+        def index_stops(plan):
+            return {
+                (route['route_id'], stop['order_id']): (stop_num, route, stop)
+                for route in plan
+                for stop_num, stop in enumerate(route['stops'], 1)
+            }
+
+        previous = index_stops(previous_routes)
+        current = index_stops(routes)
+        current_time = datetime.now()
+
+        removed = list(previous.keys() - current.keys())
+        resequenced = [
+            (stop_num, route_id, order_id)
+            for (route_id, order_id), (stop_num, _, _) in current.items()
+            if (route_id, order_id) in previous and previous[(route_id, order_id)][0] != stop_num
+        ]
+        added = []
+        for key in current.keys() - previous.keys():
+            stop_num, route, stop = current[key]
+            added.extend(self._route_stop_rows(route, [(stop_num, stop)], plan_date, current_time))
+
+        db = self._get_db_connection()
+        cursor = db.cursor()
+        if removed:
+            cursor.executemany(
+                "DELETE FROM optimized_routes WHERE route_id = %s AND order_id = %s", removed
+            )
+        if resequenced:
+            cursor.executemany(
+                "UPDATE optimized_routes SET stop_number = %s WHERE route_id = %s AND order_id = %s", resequenced
+            )
+        if added:
+            cursor.executemany("""
+                INSERT INTO optimized_routes (
+                    route_id, vehicle_id, stop_number, order_id, location,
+                    latitude, longitude, planned_delivery_time, package_weight, created_at
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, added)
+        db.commit()
+        db.close()
+        print(f"Route diff: {len(removed)} removed, {len(resequenced)} re-sequenced, {len(added)} added")
+
+def _solve_cluster(cluster_df, num_vehicles, time_limit, settings):
+    """Process-pool worker solving one cluster with the parent's route_optimization settings
+
+    Returns per-vehicle node routes local to the cluster.
+    """
+    optimizer = RouteOptimization()
+    optimizer._use_settings(settings)
+    optimizer.delivery_df = cluster_df.reset_index(drop=True)
+    distance_matrix = optimizer._create_distance_matrix_vectorized()
+    data = optimizer._build_data_model(optimizer.delivery_df, distance_matrix, num_vehicles)
+    manager, routing = optimizer._create_routing_model(data)
+    optimizer._register_callbacks(routing, manager, data)
+    solution = optimizer._solve_with_optimized_parameters(
+        routing,
+        max(min(optimizer._time_budget(len(cluster_df), 'decomposed'), settings['cluster_time_limit'], time_limit),
+            settings['min_time_limit']),
+        mode='decomposed'
+    )
+    if not solution:
+        return None
+    return optimizer._extract_node_routes(solution, routing, manager)
+
+
+def _init_portfolio_worker(best_objective, stop_event):
+    """Give each portfolio process access to the shared incumbent and stop signal"""
+    global _portfolio_best, _portfolio_stop
+    _portfolio_best = best_objective
+    _portfolio_stop = stop_event
+
+
+def _solve_portfolio_member(data, deadline, settings, first_solution, metaheuristic):
+    """Process-pool worker running one search strategy until the shared deadline or the stop signal"""
+    if deadline <= time.monotonic() or _portfolio_stop.is_set():
+        return None
+    optimizer = RouteOptimization()
+    optimizer._use_settings(settings)
+    manager, routing = optimizer._create_routing_model(data)
+    optimizer._register_callbacks(routing, manager, data)
+    monitor = optimizer._attach_search_monitor(routing)
+    
+    def publish_solution():
+        objective = routing.CostVar().Value()
+        with _portfolio_best.get_lock():
+            if objective < _portfolio_best.value:
+                _portfolio_best.value = objective
+        if _portfolio_stop.is_set():
+            routing.solver().FinishCurrentSearch()
+    
+    routing.AddAtSolutionCallback(publish_solution)
+    # Whatever model building took comes out of this member's share
+    time_limit = deadline - time.monotonic()
+    if time_limit <= 0:
+        return None
+    solution = routing.SolveWithParameters(
+        optimizer._search_parameters(time_limit, first_solution=first_solution, metaheuristic=metaheuristic)
+    )
+    optimizer._telemetry.record(f'portfolio:{first_solution}/{metaheuristic}', routing.nodes(), time_limit, monitor.curve)
+    if not solution:
+        return None
+    return (
+        solution.ObjectiveValue(),
+        optimizer._extract_node_routes(solution, routing, manager),
+        f'{first_solution}/{metaheuristic}'
+    )
+
+
+def _solve_partition(delivery_df, mode):
+    """Process-pool worker solving one (service date, shift) partition"""
+    return RouteOptimization()._solve_orders(delivery_df, mode)
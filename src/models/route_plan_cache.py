@@ -0,0 +1,112 @@
+import os
+import json
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+import pandas as pd
+from src.utils.cache import atomic_write, evict_least_recently_used, mark_used
+
+# Columns that determine a plan: identity, location, demand, time windows and arc impacts
+FINGERPRINT_COLUMNS = [
+    'order_id', 'latitude', 'longitude', 'package_weight', 'actual_delivery_time',
+    'traffic_impact', 'weather_impact', 'shift_start'
+]
+
+
+def plan_fingerprint(delivery_df, mode, settings, input_versions=None):
+    """Stable hash of the orders, the solver mode, the route_optimization config and the versions of the
+    data the plan was solved on (e.g. road graph, hourly profile)"""
+    digest = hashlib.sha256()
+    digest.update(mode.encode())
+    digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+    digest.update(json.dumps(input_versions or {}, sort_keys=True, default=str).encode())
+    for column in FINGERPRINT_COLUMNS:
+        if column in delivery_df:
+            digest.update(column.encode())
+            digest.update(pd.util.hash_pandas_object(delivery_df[column].astype(str), index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+class RoutePlanCache:
+    """Size-bounded LRU of solved plans in memory, backed by a bounded on-disk store shared across processes"""
+
+    _shared = {}
+
+    def __init__(self, cache_dir, max_entries, max_disk_entries):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, cache_dir, max_entries, max_disk_entries):
+        """One cache per directory and process, so every RouteOptimization instance sees the same entries"""
+        key = os.path.abspath(cache_dir)
+        if key not in cls._shared:
+            cls._shared[key] = cls(cache_dir, max_entries, max_disk_entries)
+        return cls._shared[key]
+
+    def _path(self, fingerprint):
+        return os.path.join(self.cache_dir, f'{fingerprint}.pkl')
+
+    def get(self, fingerprint):
+        """Return a private copy of the cached routes, or None"""
+        with self._lock:
+            payload = self._entries.get(fingerprint)
+            if payload is not None:
+                self._entries.move_to_end(fingerprint)
+        if payload is None:
+            payload = self._read_disk(fingerprint)
+            if payload is not None:
+                self._remember(fingerprint, payload)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        # Entries are stored pickled, so callers can mutate what they get back
+        return pickle.loads(payload)
+
+    def put(self, fingerprint, routes):
+        """Store a plan in memory and on disk, evicting the least recently used entries"""
+        payload = pickle.dumps(routes, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(fingerprint, payload)
+        self._write_disk(fingerprint, payload)
+
+    def stats(self):
+        """Hit/miss counters and current sizes"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries
+            }
+
+    def _remember(self, fingerprint, payload):
+        with self._lock:
+            self._entries[fingerprint] = payload
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _read_disk(self, fingerprint):
+        path = self._path(fingerprint)
+        try:
+            with open(path, 'rb') as f:
+                payload = f.read()
+        except FileNotFoundError:
+            return None
+        mark_used(path)
+        return payload
+
+    def _write_disk(self, fingerprint, payload):
+        with atomic_write(self._path(fingerprint)) as f:
+            f.write(payload)
+        evict_least_recently_used(self.cache_dir, self.max_disk_entries, '.pkl')
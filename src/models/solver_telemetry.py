@@ -0,0 +1,106 @@
+import os
+import json
+import time
+from datetime import datetime
+import numpy as np
+from src.utils.cache import atomic_write
+
+
+class SearchMonitor:
+    """At-solution callback recording best objective versus elapsed time and stopping on a plateau"""
+
+    def __init__(self, routing, plateau_seconds, min_improvement):
+        self.routing = routing
+        self.plateau_seconds = plateau_seconds
+        self.min_improvement = min_improvement
+        self.curve = []
+        self.start = time.monotonic()
+
+    def __call__(self):
+        elapsed = time.monotonic() - self.start
+        objective = int(self.routing.CostVar().Value())
+
+        # Metaheuristics also accept worse solutions, so only improvements extend the curve
+        if not self.curve or objective < self.curve[-1][1]:
+            self.curve.append((round(elapsed, 4), objective))
+        if self._has_plateaued(elapsed, self.curve[-1][1]):
+            self.routing.solver().FinishCurrentSearch()
+
+    def _has_plateaued(self, elapsed, objective):
+        """True when the best objective improved by less than min_improvement over the last plateau_seconds"""
+        window_start = elapsed - self.plateau_seconds
+        if window_start <= 0:
+            return False
+        earlier = [value for at, value in self.curve if at <= window_start]
+        if not earlier or earlier[-1] <= 0:
+            return False
+        return (earlier[-1] - objective) / earlier[-1] < self.min_improvement
+
+
+class TelemetryStore:
+    """JSON-lines history of search curves, compacted to the last max_history once it passes max_kb"""
+
+    def __init__(self, path, max_history, max_kb):
+        self.path = path
+        self.max_history = max_history
+        self.max_kb = max_kb
+
+    def record(self, mode, num_stops, time_limit, curve):
+        """Append one solve's objective-versus-time curve"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        entry = {
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'mode': mode,
+            'num_stops': num_stops,
+            'time_limit': time_limit,
+            'curve': curve
+        }
+        # One write per line keeps concurrent appends from worker processes intact
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+        if os.path.getsize(self.path) > self.max_kb * 1024:
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the file with only the most recent max_history lines; an append racing this may be lost"""
+        with open(self.path) as f:
+            lines = f.readlines()[-self.max_history:]
+        with atomic_write(self.path, 'w') as f:
+            f.writelines(lines)
+
+    def load(self):
+        """Most recent max_history curves"""
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path) as f:
+            lines = f.readlines()[-self.max_history:]
+        return [json.loads(line) for line in lines if line.strip()]
+
+
+def time_to_converge(curve, tolerance):
+    """Seconds until the objective first came within tolerance of its final value"""
+    if not curve:
+        return None
+    final = curve[-1][1]
+    for elapsed, objective in curve:
+        if objective <= final * (1 + tolerance):
+            return elapsed
+    return curve[-1][0]
+
+
+def adaptive_time_limit(num_stops, history, settings, mode):
+    """Budget from similar-sized historical solves of the same mode, falling back to a per-stop rate
+
+    Portfolio members record their mode as 'portfolio:<strategy>', so entries match on the part before ':'.
+    """
+    converged = [
+        time_to_converge(entry['curve'], settings['plateau_min_improvement']) * num_stops / entry['num_stops']
+        for entry in history
+        if entry['curve'] and entry['mode'].split(':')[0] == mode
+        and 0.5 <= num_stops / max(entry['num_stops'], 1) <= 2.0
+    ]
+    if len(converged) >= settings['min_history']:
+        budget = float(np.percentile(converged, 90)) * settings['budget_safety_factor']
+    else:
+        budget = settings['seconds_per_stop'] * num_stops
+    return float(np.clip(budget, settings['min_time_limit'], settings['time_limit']))
@@ -0,0 +1,355 @@
+import numpy as np
+import pandas as pd
+from src.models.backends import build_model, build_neural_network
+
+# Raw float64 feature and target values per row, counted three times for the slices, the stacked chunk and the
+# model's own conversion of it
+_CHUNK_BYTES_PER_FEATURE = 3 * 8
+# Order ids become Python strings for hashing, next to the hashes, test mask and sample keys
+_CHUNK_BYTES_PER_ROW = 160
+# LightGBM keeps its binned copy of the rows (one byte per feature) and float32 labels of its own and ours,
+# then gradients, hessians, scores and row partitions while boosting; measured peak, with some headroom
+_LIGHTGBM_BYTES_PER_FEATURE = 1
+_LIGHTGBM_BYTES_PER_ROW = 90
+# The float64 rows LightGBM reads to choose its bins arrive as one small array each, are stacked and then split
+# by column with int32 row indices
+_LIGHTGBM_BIN_SAMPLE_BYTES_PER_FEATURE = 8 + 8 + 8 + 4
+_LIGHTGBM_BIN_SAMPLE_BYTES_PER_ROW = 120
+# XGBoost builds its quantized copy of the rows (one byte per feature) batch by batch, then holds gradient
+# pairs, the prediction cache and row partitions while boosting; measured peak, with some headroom
+_XGBOOST_BYTES_PER_FEATURE = 1
+_XGBOOST_BYTES_PER_ROW = 80
+# A sampled row's int32 position, kept until the training matrix is built, or its sample key while sampling
+_SAMPLE_BYTES_PER_ROW = 8
+
+
+class RunningMoments:
+    """Column means and sums of squared deviations merged chunk by chunk (Chan et al.), numerically stable"""
+
+    def __init__(self, width):
+        self.count = 0
+        self.mean = np.zeros(width)
+        self.m2 = np.zeros(width)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).reshape(len(values), -1)
+        if not len(values):
+            return
+        count = len(values)
+        mean = values.mean(axis=0)
+        m2 = ((values - mean) ** 2).sum(axis=0)
+        delta = mean - self.mean
+        total = self.count + count
+        self.mean = self.mean + delta * count / total
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / max(self.count, 1))
+
+
+class StreamingScore:
+    """R-squared and mean absolute error accumulated over prediction chunks"""
+
+    def __init__(self):
+        self.target = RunningMoments(1)
+        self.squared_error = 0.0
+        self.absolute_error = 0.0
+
+    def update(self, y_true, y_pred):
+        errors = np.asarray(y_true, dtype=np.float64) - np.asarray(y_pred, dtype=np.float64).ravel()
+        self.target.update(y_true)
+        self.squared_error += float(errors @ errors)
+        self.absolute_error += float(np.abs(errors).sum())
+
+    @property
+    def r2(self):
+        return 1.0 - self.squared_error / self.target.m2[0] if self.target.m2[0] else float('nan')
+
+    @property
+    def mae(self):
+        return self.absolute_error / max(self.target.count, 1)
+
+
+class TrainingStream:
+    """Encoded training rows of the columnar cache, read partition by partition in memory-budgeted chunks
+
+    Rows are assigned to the test set by a hash of their order id, so the split is the same on every
+    pass and for every model without keeping any index in memory.
+    """
+
+    def __init__(self, dataset, feature_columns, target_column, memory_budget_mb, test_percent):
+        self.dataset = dataset
+        self.feature_columns = list(feature_columns)
+        self.target_column = target_column
+        self.memory_budget = memory_budget_mb * 2**20
+        self.test_percent = test_percent
+        # A tenth of the budget for the chunk in flight; the rest is left to the model being trained
+        row_bytes = _CHUNK_BYTES_PER_FEATURE * (len(self.feature_columns) + 1) + _CHUNK_BYTES_PER_ROW
+        self.rows_per_chunk = max(1024, int(self.memory_budget * 0.1) // row_bytes)
+
+    def _split(self, order_ids):
+        """Test mask and a uniform [0, 1) sample key per row, both from a hash of the order id"""
+        hashes = pd.util.hash_array(np.asarray(order_ids, dtype=object))
+        return hashes % 100 < self.test_percent, (hashes >> np.uint64(32)) / 2**32
+
+    def chunks(self):
+        """(features, target, is_test, sample_key) per chunk, features as a float64 (rows, features) array
+
+        sample_key is uniform in [0, 1) per row and independent of the split, for budgeted subsampling.
+        """
+        columns = self.feature_columns + [self.target_column, 'order_id']
+        for date in sorted(self.dataset.partitions):
+            arrays = self.dataset.partition_arrays(date, columns)
+            for start in range(0, self.dataset.partitions[date], self.rows_per_chunk):
+                stop = start + self.rows_per_chunk
+                features = np.column_stack([arrays[column][start:stop] for column in self.feature_columns])
+                target = np.asarray(arrays[self.target_column][start:stop], dtype=np.float64)
+                is_test, sample_key = self._split(arrays['order_id'][start:stop])
+                yield features.astype(np.float64, copy=False), target, is_test, sample_key
+
+    def sample(self, capacity):
+        """Row positions per partition of a uniform sample of at most capacity training rows, and the fraction kept
+
+        The rows with the capacity smallest sample keys are kept (bottom-k sampling), so every training row is
+        equally likely to be kept wherever it sits in the history. A first pass over the order ids finds the
+        largest key kept, holding only keys; a second one collects the positions of the rows at or below it.
+        """
+        keys = np.empty(capacity + self.rows_per_chunk)
+        filled, threshold, train_rows = 0, 1.0, 0
+        for _, start, is_test, sample_key in self._splits():
+            candidates = sample_key[~is_test & (sample_key < threshold)]
+            train_rows += int((~is_test).sum())
+            keys[filled:filled + len(candidates)] = candidates
+            filled += len(candidates)
+            if filled > capacity:
+                keys[:filled].partition(capacity - 1)
+                filled, threshold = capacity, keys[capacity - 1]
+        del keys
+
+        rows = {}
+        for date, start, is_test, sample_key in self._splits():
+            kept = np.flatnonzero(~is_test & (sample_key <= threshold)).astype(np.int32) + start
+            if len(kept):
+                rows.setdefault(date, []).append(kept)
+        rows = {date: np.concatenate(positions) for date, positions in rows.items()}
+        return rows, sum(len(positions) for positions in rows.values()) / max(train_rows, 1)
+
+    def _splits(self):
+        """(date, start, is_test, sample_key) per chunk, reading only the order ids"""
+        for date in sorted(self.dataset.partitions):
+            order_ids = self.dataset.partition_arrays(date, ['order_id'])['order_id']
+            for start in range(0, len(order_ids), self.rows_per_chunk):
+                yield (date, start) + self._split(order_ids[start:start + self.rows_per_chunk])
+
+    def gather(self, arrays, positions):
+        """float32 features and target of the given rows of one partition's arrays"""
+        features = np.empty((len(positions), len(self.feature_columns)), dtype=np.float32)
+        for i, column in enumerate(self.feature_columns):
+            features[:, i] = arrays[column][positions]
+        return features, np.asarray(arrays[self.target_column][positions], dtype=np.float32)
+
+    def sampled_chunks(self, rows):
+        """(features, target) as float32 over the rows of a sample, chunk by chunk"""
+        columns = self.feature_columns + [self.target_column]
+        for date, positions in rows.items():
+            arrays = self.dataset.partition_arrays(date, columns)
+            for start in range(0, len(positions), self.rows_per_chunk):
+                yield self.gather(arrays, positions[start:start + self.rows_per_chunk])
+
+    def frame(self, features):
+        """Chunk features as a DataFrame with the model's column names, without copying"""
+        return pd.DataFrame(features, columns=self.feature_columns, copy=False)
+
+
+def sample_for_budget(stream, budget_bytes, bytes_per_row):
+    """Uniform sample of the training rows sized to fit budget_bytes, as in-memory arrays
+
+    Returns the float32 features, float32 target and the fraction of the training rows kept.
+    """
+    rows, fraction = stream.sample(max(1, int(budget_bytes // (bytes_per_row + _SAMPLE_BYTES_PER_ROW))))
+    chunks = list(stream.sampled_chunks(rows))
+    if not chunks:
+        return np.empty((0, len(stream.feature_columns)), dtype=np.float32), np.empty(0, dtype=np.float32), fraction
+    return np.concatenate([f for f, _ in chunks]), np.concatenate([t for _, t in chunks]), fraction
+
+
+def _batch_iterator(xgboost, batches, feature_names):
+    """xgboost.DataIter over batches(), a function returning a fresh iterable of (features, target) on each pass"""
+
+    class BatchIterator(xgboost.DataIter):
+        def __init__(self):
+            super().__init__()
+            self._batches = None
+
+        def next(self, input_data):
+            if self._batches is None:
+                self._batches = iter(batches())
+            batch = next(self._batches, None)
+            if batch is None:
+                return False
+            input_data(data=batch[0], label=batch[1], feature_names=feature_names)
+            return True
+
+        def reset(self):
+            self._batches = None
+
+    return BatchIterator()
+
+
+def train_xgboost_sampled(stream, params, n_threads, budget_bytes):
+    """XGBRegressor on the training rows, or on the largest uniform sample of them that fits its memory budget
+
+    The quantized training matrix is built chunk by chunk from a DataIter over the stream, so the float
+    rows are never held in memory together.
+    """
+    import xgboost
+
+    bytes_per_row = _XGBOOST_BYTES_PER_FEATURE * len(stream.feature_columns) + _XGBOOST_BYTES_PER_ROW
+    rows, fraction = stream.sample(max(1, int(budget_bytes // (bytes_per_row + _SAMPLE_BYTES_PER_ROW))))
+    train_matrix = xgboost.QuantileDMatrix(
+        _batch_iterator(xgboost, lambda: stream.sampled_chunks(rows), stream.feature_columns), nthread=n_threads
+    )
+    del rows
+    booster = xgboost.train(
+        {'tree_method': 'hist', 'eta': params['learning_rate'], 'nthread': n_threads},
+        train_matrix, num_boost_round=params['n_estimators']
+    )
+    # Same estimator type the in-memory path publishes, so serving, compilation and updates work unchanged
+    model = build_model('xgboost', params, n_threads)
+    model.load_model(bytearray(booster.save_raw()))
+    return model, fraction
+
+
+class PartitionRows:
+    """Sampled rows of one partition as a lightgbm.Sequence: slices while constructing, single rows for its bin sample"""
+
+    def __init__(self, stream, arrays, positions):
+        self.stream = stream
+        self.arrays = arrays
+        self.positions = positions
+        self.batch_size = stream.rows_per_chunk
+        self._block_start, self._block = 0, np.empty((0, len(stream.feature_columns)), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return self.stream.gather(self.arrays, self.positions[idx])[0]
+        # LightGBM reads its bin sample one float64 row at a time in increasing order, so read a block at a time
+        if not self._block_start <= idx < self._block_start + len(self._block):
+            self._block_start = idx
+            self._block = self[idx:idx + self.batch_size]
+        return self._block[idx - self._block_start].astype(np.float64)
+
+
+def train_lightgbm_sampled(stream, params, n_threads, budget_bytes):
+    """LGBMRegressor on the training rows, or on the largest uniform sample of them that fits its memory budget
+
+    The binned dataset is built from one lightgbm.Sequence per partition, so the float rows are never held
+    in memory together.
+    """
+    import lightgbm
+
+    lightgbm.Sequence.register(PartitionRows)
+    num_features = len(stream.feature_columns)
+    # LightGBM reads a quarter as many rows as it bins to choose its bins, up to its default of 200,000; it warns
+    # when a feature's non-zero values among them cover less than about a tenth of the rows
+    bytes_per_row = (
+        _LIGHTGBM_BYTES_PER_FEATURE * num_features + _LIGHTGBM_BYTES_PER_ROW + _SAMPLE_BYTES_PER_ROW
+        + (_LIGHTGBM_BIN_SAMPLE_BYTES_PER_FEATURE * num_features + _LIGHTGBM_BIN_SAMPLE_BYTES_PER_ROW) / 4
+    )
+    capacity = max(1, int(budget_bytes // bytes_per_row))
+    rows, fraction = stream.sample(capacity)
+
+    columns = stream.feature_columns + [stream.target_column]
+    sequences, targets = [], []
+    for date, positions in rows.items():
+        arrays = stream.dataset.partition_arrays(date, columns)
+        sequences.append(PartitionRows(stream, arrays, positions))
+        targets.append(np.asarray(arrays[stream.target_column][positions], dtype=np.float32))
+    train_set = lightgbm.Dataset(
+        sequences, label=np.concatenate(targets), feature_name=stream.feature_columns,
+        params={'bin_construct_sample_cnt': min(capacity // 4 + 1, 200000), 'verbose': -1}
+    )
+    booster = lightgbm.train(
+        {'objective': 'regression', 'num_leaves': params['num_leaves'], 'num_threads': n_threads, 'verbose': -1},
+        train_set, num_boost_round=params['n_estimators']
+    )
+    booster.free_dataset()
+    return _lightgbm_estimator(booster, params, n_threads), fraction
+
+
+def _lightgbm_estimator(booster, params, n_threads):
+    """LGBMRegressor around a booster from lightgbm.train, in the state LGBMRegressor.fit leaves it in
+
+    Same estimator type the in-memory path publishes, so serving, compilation and updates work unchanged.
+    """
+    model = build_model('lightgbm', params, n_threads)
+    model._Booster = booster
+    model._n_features = model._n_features_in = booster.num_feature()
+    model._fitted_with_feature_names = True
+    model._evals_result = {}
+    model._best_iteration = booster.best_iteration
+    model._best_score = booster.best_score
+    model.fitted_ = True
+    return model
+
+
+class StandardizedNetwork:
+    """Keras regressor trained on standardized features and target, predicting in original units"""
+
+    def __init__(self, network, feature_mean, feature_std, target_mean, target_std, batch_size):
+        self.network = network
+        self.feature_mean = feature_mean
+        self.feature_std = np.where(feature_std > 0, feature_std, 1.0)
+        self.target_mean = float(target_mean)
+        self.target_std = float(target_std) or 1.0
+        self.batch_size = batch_size
+
+    def scale(self, features):
+        return ((np.asarray(features, dtype=np.float64) - self.feature_mean) / self.feature_std).astype(np.float32)
+
+    def predict(self, features):
+        scaled = self.network.predict(self.scale(features), batch_size=self.batch_size, verbose=0)
+        return scaled.ravel() * self.target_std + self.target_mean
+
+
+def train_neural_network_streaming(stream, nn_config, epochs, batch_size):
+    """Keras network fed batch by batch from a generator over the chunks; one pass first for scaling statistics
+
+    Batches are cut from the chunk in flight and scaled one at a time, so the rows held for training stay within
+    the chunk's share of the budget. The network's weights and TensorFlow's own buffers are not budgeted.
+    """
+    batch_size = min(batch_size, stream.rows_per_chunk)
+    feature_moments = RunningMoments(len(stream.feature_columns))
+    target_moments = RunningMoments(1)
+    steps_per_epoch = 0
+    for features, target, is_test, _ in stream.chunks():
+        train = ~is_test
+        feature_moments.update(features[train])
+        target_moments.update(target[train])
+        steps_per_epoch += -(-int(train.sum()) // batch_size)
+
+    model = StandardizedNetwork(
+        build_neural_network(nn_config, len(stream.feature_columns)),
+        feature_moments.mean, feature_moments.std, target_moments.mean[0], target_moments.std[0], batch_size
+    )
+
+    def batches():
+        # Keras draws steps_per_epoch batches per epoch from one endless generator
+        while True:
+            for features, target, is_test, _ in stream.chunks():
+                features, target = features[~is_test], target[~is_test]
+                for start in range(0, len(target), batch_size):
+                    stop = start + batch_size
+                    yield (
+                        model.scale(features[start:stop]),
+                        ((target[start:stop] - model.target_mean) / model.target_std).astype(np.float32)
+                    )
+
+    if steps_per_epoch:
+        model.network.fit(batches(), steps_per_epoch=steps_per_epoch, epochs=epochs, verbose=0)
+    return model
@@ -0,0 +1,90 @@
+import itertools
+import numpy as np
+
+
+def sample_configurations(space, base_params, count, seed):
+    """Up to count distinct (model name, params) pairs drawn from each family's grid, split evenly across families
+
+    space maps a model name to {parameter: [candidate values]}; parameters not in the grid keep base_params.
+    """
+    rng = np.random.default_rng(seed)
+    per_family = max(1, count // len(space))
+    configurations = []
+    for name, grid in space.items():
+        keys = list(grid)
+        combinations = list(itertools.product(*(grid[key] for key in keys)))
+        for index in rng.permutation(len(combinations))[:per_family]:
+            configurations.append((name, dict(base_params[name], **dict(zip(keys, combinations[index])))))
+    # Interleave families so the first rung is not one family after another
+    order = rng.permutation(len(configurations))
+    return [configurations[i] for i in order]
+
+
+class AshaScheduler:
+    """Asynchronous successive halving over a fixed list of configurations
+
+    The last rung trains on all max_rows rows and each rung below on reduction_factor times fewer, down
+    to no fewer than min_rows. As soon as a
+    configuration is in the top 1/reduction_factor of the results reported for its rung it is promoted
+    to the next one, so free workers never wait for a whole rung to finish.
+    """
+
+    def __init__(self, num_configurations, min_rows, max_rows, reduction_factor):
+        self.num_configurations = num_configurations
+        self.reduction_factor = reduction_factor
+        # Counted down from the full data, so every rung has reduction_factor times the rows of the one below
+        self.budgets = [int(max_rows)]
+        while self.budgets[0] / reduction_factor >= max(min_rows, 1):
+            self.budgets.insert(0, int(self.budgets[0] / reduction_factor))
+        self._results = [{} for _ in self.budgets]
+        self._promoted = [set() for _ in self.budgets]
+        self._next_configuration = 0
+        self._running = 0
+
+    def next_trial(self):
+        """(configuration index, rung) to start now, or None until a running trial reports"""
+        # Promotions first, highest rung first, so good configurations reach full data early
+        for rung in reversed(range(len(self.budgets) - 1)):
+            configuration = self._promotable(rung, len(self._results[rung]) // self.reduction_factor)
+            if configuration is not None:
+                return self._start(configuration, rung + 1)
+        if self._next_configuration < self.num_configurations:
+            self._next_configuration += 1
+            return self._start(self._next_configuration - 1, 0)
+        if not self._running and not self._results[-1]:
+            # Too few configurations for a regular promotion to reach the last rung: push the leader up
+            for rung in reversed(range(len(self.budgets) - 1)):
+                configuration = self._promotable(rung, 1)
+                if configuration is not None:
+                    return self._start(configuration, rung + 1)
+        return None
+
+    def _promotable(self, rung, top):
+        results = self._results[rung]
+        for configuration in sorted(results, key=results.get, reverse=True)[:top]:
+            if configuration not in self._promoted[rung] and np.isfinite(results[configuration]):
+                return configuration
+        return None
+
+    def _start(self, configuration, rung):
+        if rung:
+            self._promoted[rung - 1].add(configuration)
+        self._running += 1
+        return configuration, rung
+
+    def report(self, configuration, rung, score):
+        """Record a finished trial; failed trials report -inf and are never promoted"""
+        self._running -= 1
+        self._results[rung][configuration] = score
+
+    def best(self, configurations=None):
+        """(configuration index, rung, score) of the best result on the most data, optionally among some indices"""
+        for rung in reversed(range(len(self.budgets))):
+            results = {
+                configuration: score for configuration, score in self._results[rung].items()
+                if (configurations is None or configuration in configurations) and np.isfinite(score)
+            }
+            if results:
+                best = max(results, key=results.get)
+                return best, rung, results[best]
+        return None
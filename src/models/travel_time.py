@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+from src.database.columnar_cache import processed_data_version, read_processed_data
+
+HOURS_PER_DAY = 24
+
+
+class HourlyImpactProfile:
+    """Mean traffic x weather multiplier per customer location and hour of day, learned from processed orders"""
+
+    _shared = None
+
+    def __init__(self, history_df):
+        hours = pd.to_datetime(history_df['actual_delivery_time']).dt.hour
+        impact = history_df['traffic_impact'] * history_df['weather_impact']
+        locations = history_df['customer_location'].astype(str)
+
+        overall = impact.groupby(hours).mean().reindex(range(HOURS_PER_DAY))
+        overall = overall.fillna(impact.mean() if len(impact) else 1.0)
+        table = impact.groupby([locations, hours]).mean().unstack().reindex(columns=range(HOURS_PER_DAY))
+        # Hours a location was never served fall back to its own mean, then to the fleet-wide hour
+        table = table.where(table.notna(), table.mean(axis=1), axis=0).fillna(overall)
+
+        self.locations = table.index
+        self.factors = table.values.astype(np.float32)
+        self.default = overall.values.astype(np.float32)
+
+    @classmethod
+    def shared(cls):
+        """Profile of the processed data, rebuilt only when ETL writes a new version of it"""
+        version = processed_data_version()
+        if cls._shared is None or cls._shared[0] != version:
+            history_df, _ = read_processed_data([
+                'customer_location', 'actual_delivery_time', 'traffic_impact', 'weather_impact'
+            ])
+            cls._shared = (version, cls(history_df))
+        return cls._shared[1]
+
+    def stop_factors(self, customer_locations):
+        """(24, n) multipliers for travelling into each stop at each hour"""
+        rows = self.locations.get_indexer(pd.Index(customer_locations).astype(str))
+        factors = np.empty((HOURS_PER_DAY, len(rows)), dtype=np.float32)
+        known = rows >= 0
+        factors[:, known] = self.factors[rows[known]].T
+        factors[:, ~known] = self.default[:, np.newaxis]
+        return factors
+
+
+class TravelTimeTensor:
+    """Per-hour travel times in minutes, stored as an int16 base matrix and float16 hourly multipliers
+
+    Impacts depend only on the destination and the hour, so slice h is base * factors[h] column-wise and
+    the 24 slices never have to be materialized; 5k stops take ~50 MB instead of ~1.2 GB as a dense tensor.
+    """
+
+    def __init__(self, base_minutes, hourly_factors, resolution):
+        base_minutes = np.asarray(base_minutes, dtype=np.float64)
+        # Coarsen the quantization step if the longest leg would overflow int16
+        self.resolution = max(resolution, float(base_minutes.max(initial=0.0)) / np.iinfo(np.int16).max)
+        self.base = np.rint(base_minutes / self.resolution).astype(np.int16)
+        self.hourly_factors = np.asarray(hourly_factors, dtype=np.float16)
+
+    @property
+    def nbytes(self):
+        return self.base.nbytes + self.hourly_factors.nbytes
+
+    def __getitem__(self, hour):
+        """Whole-minute travel times for departures during one hour of the day"""
+        scale = self.hourly_factors[hour % HOURS_PER_DAY].astype(np.float32) * self.resolution
+        return np.rint(self.base * scale[np.newaxis, :]).astype(np.int32)
+
+    def departure_matrix(self, departure_hours):
+        """Row i taken from the slice of the hour stop i is left, built one hour group at a time"""
+        departure_hours = np.asarray(departure_hours) % HOURS_PER_DAY
+        matrix = np.empty(self.base.shape, dtype=np.int32)
+        for hour in np.unique(departure_hours):
+            rows = np.flatnonzero(departure_hours == hour)
+            scale = self.hourly_factors[hour].astype(np.float32) * self.resolution
+            matrix[rows] = np.rint(self.base[rows] * scale[np.newaxis, :])
+        return matrix
@@ -0,0 +1,50 @@
+import os
+import threading
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path, mode='wb'):
+    """Open a temporary file next to path and move it over path once written, so readers never see a partial file"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    # Unique per process and thread, so concurrent writers of the same path never share a temporary file
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp_path, mode) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def mark_used(path):
+    """Touch a cache file on a hit so eviction is least-recently-used rather than oldest-written"""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        # Evicted by another process since it was read; the caller already has the contents
+        pass
+
+
+def evict_least_recently_used(cache_dir, max_entries, suffix):
+    """Remove the files ending in suffix in cache_dir beyond max_entries, oldest modification time first"""
+    stored = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir) if name.endswith(suffix)]
+    if len(stored) <= max_entries:
+        return
+
+    def modified(path):
+        try:
+            return os.path.getmtime(path)
+        except FileNotFoundError:
+            return 0.0
+
+    stored.sort(key=modified)
+    for stale in stored[:len(stored) - max_entries]:
+        try:
+            os.remove(stale)
+        except FileNotFoundError:
+            pass
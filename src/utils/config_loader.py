@@ -18,6 +18,21 @@ class ConfigLoader:
                 # Models configuration
                 'models': config['models'],
 
+                # Training configuration
+                'training': config['training'],
+
+                # Hyperparameter search configuration
+                'hyperparameter_search': config['hyperparameter_search'],
+
+                # Feature store configuration
+                'feature_store': config['feature_store'],
+
+                # Model registry configuration
+                'model_registry': config['model_registry'],
+
                 # Route optimization configuration
-                'route_optimization': config['route_optimization']
+                'route_optimization': config['route_optimization'],
+
+                # API configuration
+                'api': config['api']
             }
\ No newline at end of file
@@ -0,0 +1,95 @@
+import os
+import hashlib
+import numpy as np
+from src.utils.cache import atomic_write, evict_least_recently_used, mark_used
+
+# Mean Earth radius used by the haversine formula
+EARTH_RADIUS_KM = 6371.0088
+
+# Central depot near the geographic center of the US
+DEPOT_LOCATION = (39.8283, -98.5795)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Vectorized great-circle distance in km, broadcasting over array inputs"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def to_unit_vectors(coords):
+    """Project (lat, lon) pairs onto the unit sphere so Euclidean chords order like great-circle distance"""
+    lat = np.radians(coords[:, 0])
+    lon = np.radians(coords[:, 1])
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def haversine_matrix(coords, dtype=np.float64):
+    """Build a dense N x N great-circle distance matrix in km from (lat, lon) pairs"""
+    coords = np.asarray(coords, dtype=np.float64)
+    lat = coords[:, 0]
+    lon = coords[:, 1]
+    matrix = haversine_km(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+    np.fill_diagonal(matrix, 0.0)
+    return matrix.astype(dtype, copy=False)
+
+
+def scale_to_int(matrix_km, scale, dtype=np.int32):
+    """Scale a float km matrix to integer units (e.g. scale=1000 gives metres)"""
+    return np.rint(np.asarray(matrix_km) * scale).astype(dtype)
+
+
+def coordinates_fingerprint(coords, *salt):
+    """Stable content hash of a coordinate set, optionally salted with extra parameters"""
+    coords = np.ascontiguousarray(coords, dtype=np.float64)
+    digest = hashlib.sha256()
+    digest.update(str(coords.shape).encode())
+    digest.update(coords.tobytes())
+    for value in salt:
+        digest.update(repr(value).encode())
+    return digest.hexdigest()
+
+
+class MatrixCache:
+    """Content-addressed on-disk cache of matrices, evicting the least recently used beyond max_entries"""
+
+    def __init__(self, cache_dir, max_entries):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.npy')
+
+    def get(self, key, compute):
+        """Return the matrix stored under key, calling compute() and storing its result on a miss"""
+        path = self._path(key)
+        try:
+            matrix = np.load(path)
+        except FileNotFoundError:
+            pass
+        else:
+            mark_used(path)
+            return matrix
+
+        matrix = compute()
+        with atomic_write(path) as f:
+            np.save(f, matrix)
+        evict_least_recently_used(self.cache_dir, self.max_entries, '.npy')
+        return matrix
+
+
+class DistanceMatrixCache(MatrixCache):
+    """Scaled integer great-circle distance matrices, cached by their coordinates"""
+
+    def __init__(self, cache_dir, scale, max_entries):
+        super().__init__(cache_dir, max_entries)
+        self.scale = scale
+
+    def get_matrix(self, coords):
+        """Return the scaled distance matrix for coords, building and storing it on a miss"""
+        return self.get(
+            coordinates_fingerprint(coords, 'haversine', self.scale),
+            lambda: scale_to_int(haversine_matrix(coords), self.scale)
+        )
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from src.api import main
+
+
+class EchoWeight:
+    """Stand-in model predicting package_weight thousand seconds, counting its calls"""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, features):
+        self.batch_sizes.append(len(features))
+        return features['package_weight'].values * 1000
+
+
+def order(weight, location='LOC-1', priority='Express'):
+    return {
+        'customer_location': location, 'delivery_priority': priority, 'package_weight': weight,
+        'latitude': 41.88, 'longitude': -87.63, 'weather_condition': 'Rainy', 'traffic_condition': 'High'
+    }
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = EchoWeight()
+    monkeypatch.setattr(main.prediction_model, '_current_model', lambda: model)
+    monkeypatch.setattr(main.prediction_model, 'get_average_delivery_time',
+                        lambda locations: np.full(len(locations), 3600.0))
+    return model
+
+
+def test_batch_predictions_come_back_in_input_order_one_call_per_chunk(model, monkeypatch):
+    monkeypatch.setitem(main.config['api'], 'prediction_batch_size', 3)
+
+    response = TestClient(main.app).post('/api/v1/predict-delivery/batch', json=[order(w) for w in range(1, 8)])
+
+    assert response.status_code == 200
+    predictions = response.json()
+    expected = pd.to_datetime(np.arange(1, 8) * 1000, unit='s').strftime('%Y-%m-%d %H:%M:%S').tolist()
+    assert [p['predicted_delivery_time'] for p in predictions] == expected
+    assert len({p['order_id'] for p in predictions}) == 7
+    assert model.batch_sizes == [3, 3, 1]
+
+
+def test_vectorized_features_match_one_order_at_a_time(model):
+    orders = [order(2.5, 'LOC-1', 'Express'), order(7.0, 'LOC-2', 'Standard'), order(1.0, 'LOC-3', 'Unknown')]
+    columns = {key: [o[key] for o in orders] for key in orders[0]}
+
+    batch = main.prediction_model.build_features(
+        columns['customer_location'], columns['delivery_priority'], columns['package_weight'], columns['latitude'],
+        columns['longitude'], columns['traffic_condition'], columns['weather_condition']
+    )
+    single = pd.concat([
+        main.prediction_model.build_features(
+            [o['customer_location']], [o['delivery_priority']], [o['package_weight']], [o['latitude']],
+            [o['longitude']], [o['traffic_condition']], [o['weather_condition']]
+        ) for o in orders
+    ], ignore_index=True)
+
+    pd.testing.assert_frame_equal(batch, single)
+    assert batch['delivery_priority'].tolist()[2] == -1
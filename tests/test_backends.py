@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), '..')
+HEAVY_BACKENDS = ('tensorflow', 'catboost', 'xgboost', 'lightgbm', 'sklearn')
+
+
+def loaded_backends(script):
+    """Heavy backends in sys.modules after running script in a fresh interpreter"""
+    check = textwrap.dedent(script) + textwrap.dedent(f'''
+        import sys
+        print(' '.join(name for name in {HEAVY_BACKENDS!r} if name in sys.modules))
+    ''')
+    output = subprocess.run(
+        [sys.executable, '-c', check], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    ).stdout.split('\n')
+    return set(output[-2].split())
+
+
+def test_api_and_predictor_start_without_importing_a_backend():
+    assert loaded_backends('''
+        import src.api.main
+        from src.models.prediction import PredictionModel
+        PredictionModel()
+    ''') == set()
+
+
+def test_building_a_model_imports_only_its_own_backend():
+    loaded = loaded_backends('''
+        from src.models.backends import build_model
+        build_model('lightgbm', {'n_estimators': 5, 'num_leaves': 7}, 1)
+    ''')
+
+    # LightGBM brings scikit-learn along for its estimator API; the other backends stay unloaded
+    assert 'lightgbm' in loaded
+    assert not loaded & {'tensorflow', 'catboost', 'xgboost'}
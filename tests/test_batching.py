@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from src.api.batching import MicroBatcher
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_concurrent_requests_share_one_call_and_get_their_own_result():
+    calls = []
+
+    def predict_batch(items):
+        calls.append(list(items))
+        return [item * 10 for item in items]
+
+    async def scenario():
+        batcher = MicroBatcher(predict_batch, max_batch_size=8, window_ms=50)
+        results = await asyncio.gather(*(batcher.submit(item) for item in range(5)))
+        stats = batcher.stats()
+        await batcher.stop()
+        return results, stats
+
+    results, stats = run(scenario())
+
+    assert results == [0, 10, 20, 30, 40]
+    assert calls == [[0, 1, 2, 3, 4]]
+    assert stats['batches'] == 1 and stats['items'] == 5 and stats['max_queue_depth'] >= 4
+
+
+def test_batches_never_exceed_the_max_size():
+    calls = []
+
+    def predict_batch(items):
+        calls.append(len(items))
+        return items
+
+    async def scenario():
+        batcher = MicroBatcher(predict_batch, max_batch_size=3, window_ms=50)
+        results = await asyncio.gather(*(batcher.submit(item) for item in range(7)))
+        await batcher.stop()
+        return results
+
+    assert run(scenario()) == list(range(7))
+    assert calls == [3, 3, 1]
+
+
+def test_a_failed_call_fails_every_request_in_its_batch():
+    def predict_batch(items):
+        raise ValueError('model unavailable')
+
+    async def scenario():
+        batcher = MicroBatcher(predict_batch, max_batch_size=8, window_ms=20)
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    results = run(scenario())
+
+    assert len(results) == 2
+    for result in results:
+        with pytest.raises(ValueError, match='model unavailable'):
+            raise result
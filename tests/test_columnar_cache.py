@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+from src.database.columnar_cache import ColumnarDataset, write_columnar_dataset
+
+
+def test_reads_keep_the_processed_row_order(tmp_path):
+    rng = np.random.default_rng(0)
+    processed_df = pd.DataFrame({
+        'order_id': [f'ORD-{i:03d}' for i in range(60)],
+        'vehicle_id': rng.choice(['VEH-001', 'VEH-002'], 60),
+        'package_weight': rng.uniform(1, 50, 60),
+        # Deliveries over five days, interleaved in the file
+        'actual_delivery_time': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 5 * 24 * 60, 60), unit='m'),
+    })
+    write_columnar_dataset(processed_df, root=str(tmp_path))
+    dataset = ColumnarDataset(str(tmp_path))
+
+    everything = dataset.read(['order_id', 'package_weight', 'actual_delivery_time'])
+    pd.testing.assert_frame_equal(
+        everything, processed_df[['order_id', 'package_weight', 'actual_delivery_time']], check_dtype=False
+    )
+
+    # A date range keeps file order among the rows it selects
+    selected = dataset.read(['order_id'], start='2024-01-02', end='2024-01-03')
+    days = processed_df['actual_delivery_time'].dt.normalize()
+    expected = processed_df.loc[(days >= '2024-01-02') & (days <= '2024-01-03'), 'order_id']
+    assert selected['order_id'].tolist() == expected.tolist()
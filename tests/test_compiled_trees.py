@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.models.backends import BACKENDS, build_model
+from src.models.compiled_trees import CompiledTreeEnsemble, compile_model
+from src.models.prediction import FEATURE_COLUMNS
+
+
+def make_features(num_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'distance_km': rng.uniform(0, 2500, num_rows),
+        'delivery_priority': rng.integers(0, 3, num_rows),
+        'package_weight': rng.uniform(1, 50, num_rows).round(2),
+        'traffic_impact': rng.choice([1.0, 1.2, 1.4], num_rows),
+        'weather_impact': rng.choice([1.0, 1.1, 1.3, 1.5], num_rows),
+        'average_delivery_time': rng.uniform(0, 2.6e6, num_rows),
+    }, columns=FEATURE_COLUMNS)
+
+
+PARAMS = {
+    'random_forest': {'n_estimators': 10, 'max_depth': 8},
+    'xgboost': {'n_estimators': 20, 'learning_rate': 0.3},
+    'lightgbm': {'n_estimators': 20, 'num_leaves': 15},
+    'catboost': {'iterations': 20, 'depth': 4},
+}
+
+
+@pytest.mark.parametrize('name', sorted(PARAMS))
+def test_compiled_trees_match_the_framework(name, tmp_path):
+    X_train = make_features(2000)
+    y_train = X_train['distance_km'] / 50 * X_train['traffic_impact'] + X_train['package_weight']
+    pytest.importorskip(BACKENDS[name][0])
+    model = build_model(name, PARAMS[name], 1)
+    if name == 'catboost':
+        model.set_params(verbose=False, allow_writing_files=False)
+    model.fit(X_train, y_train)
+
+    X_check = make_features(500, seed=1)
+    compiled = compile_model(model, FEATURE_COLUMNS)
+    compiled.save(str(tmp_path / 'compiled'))
+    loaded = CompiledTreeEnsemble.load(str(tmp_path / 'compiled'), mmap_mode='r')
+
+    expected = model.predict(X_check)
+    np.testing.assert_allclose(compiled.predict(X_check), expected, rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(loaded.predict(X_check), expected, rtol=1e-6, atol=1e-6)
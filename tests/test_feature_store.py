@@ -0,0 +1,51 @@
+import os
+import time
+import pandas as pd
+from src.database.feature_store import LocationFeatureStore, compute_location_aggregates, save_location_aggregates
+
+
+def deliveries(offsets_by_location):
+    rows = [
+        (location, pd.Timestamp('2024-01-01 08:00') + pd.Timedelta(seconds=offset))
+        for location, offsets in offsets_by_location.items() for offset in offsets
+    ]
+    return pd.DataFrame(rows, columns=['customer_location', 'actual_delivery_time'])
+
+
+def test_aggregates_are_offsets_from_each_locations_first_delivery():
+    aggregates = compute_location_aggregates(deliveries({'LOC-A': [0, 100, 200], 'LOC-B': [50, 450]}))
+
+    assert aggregates.loc['LOC-A', 'average_delivery_time'] == 100
+    assert aggregates.loc['LOC-A', 'p50_delivery_time'] == 100
+    assert aggregates.loc['LOC-B', 'average_delivery_time'] == 200
+    assert aggregates['order_count'].to_dict() == {'LOC-A': 3, 'LOC-B': 2}
+
+
+def test_unknown_locations_get_the_order_weighted_mean(tmp_path):
+    path = str(tmp_path / 'aggregates.npz')
+    save_location_aggregates(compute_location_aggregates(deliveries({'LOC-A': [0, 100, 200], 'LOC-B': [50, 450]})), path)
+    store = LocationFeatureStore(path, refresh_seconds=0)
+
+    assert store.lookup('LOC-A', 'average_delivery_time') == 100
+    assert store.lookup('LOC-UNSEEN', 'average_delivery_time') == (3 * 100 + 2 * 200) / 5
+    assert store.lookup('LOC-UNSEEN', 'order_count') == 0
+    assert store.lookup(['LOC-B', 'LOC-UNSEEN', 'LOC-A'], 'average_delivery_time').tolist() == [200, 140, 100]
+
+
+def test_a_newly_published_file_is_picked_up_without_a_restart(tmp_path):
+    path = str(tmp_path / 'aggregates.npz')
+    save_location_aggregates(compute_location_aggregates(deliveries({'LOC-A': [0, 100]})), path)
+    store = LocationFeatureStore(path, refresh_seconds=0.05)
+    try:
+        assert store.lookup('LOC-A', 'average_delivery_time') == 50
+
+        save_location_aggregates(compute_location_aggregates(deliveries({'LOC-A': [0, 300]})), path)
+        # Coarse filesystem clocks can give both versions the same mtime
+        os.utime(path, (store._snapshot.mtime + 10, store._snapshot.mtime + 10))
+        deadline = time.time() + 5
+        while store.lookup('LOC-A', 'average_delivery_time') == 50 and time.time() < deadline:
+            time.sleep(0.02)
+
+        assert store.lookup('LOC-A', 'average_delivery_time') == 150
+    finally:
+        store.stop()
@@ -0,0 +1,20 @@
+import os
+import numpy as np
+from src.utils.geo import DistanceMatrixCache, coordinates_fingerprint, haversine_km
+
+
+def test_distance_matrix_cache_evicts_least_recently_used(tmp_path):
+    cache = DistanceMatrixCache(str(tmp_path), 10, max_entries=2)
+    coords = [np.array([[41.88 + i * 0.01, -87.63], [41.90, -87.65]]) for i in range(3)]
+    paths = [tmp_path / f"{coordinates_fingerprint(c, 'haversine', 10)}.npy" for c in coords]
+
+    first = cache.get_matrix(coords[0])
+    assert first[0, 1] == round(float(haversine_km(*coords[0][0], *coords[0][1])) * 10)
+    cache.get_matrix(coords[1])
+    os.utime(paths[0], (100, 100))
+    os.utime(paths[1], (200, 200))
+
+    # A hit refreshes the first matrix, so the second is evicted when a third is stored
+    np.testing.assert_array_equal(cache.get_matrix(coords[0]), first)
+    cache.get_matrix(coords[2])
+    assert [path.exists() for path in paths] == [True, False, True]
@@ -0,0 +1,39 @@
+import os
+import time
+import subprocess
+import multiprocessing
+from src.api.jobs import _terminate_group
+
+
+def _solver_with_pool(conn):
+    """Stands in for _optimization_worker: own session, then a worker process of its own"""
+    os.setsid()
+    worker = subprocess.Popen(['sleep', '60'])
+    conn.send(worker.pid)
+    worker.wait()
+
+
+def _alive(pid):
+    """Running, as opposed to gone or a zombie waiting to be reaped"""
+    try:
+        with open(f'/proc/{pid}/stat') as stat:
+            return stat.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+
+def test_terminating_a_job_also_stops_its_workers():
+    context = multiprocessing.get_context('fork')
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(target=_solver_with_pool, args=(child_conn,))
+    process.start()
+    worker_pid = parent_conn.recv()
+
+    _terminate_group(process)
+    process.join(5)
+
+    deadline = time.monotonic() + 5
+    while _alive(worker_pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert process.exitcode is not None
+    assert not _alive(worker_pid)
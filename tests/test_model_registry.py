@@ -0,0 +1,58 @@
+import os
+import time
+import pytest
+from src.models.model_registry import CURRENT_FILE, ModelRegistry, ServingModel
+
+FEATURES = ['package_weight', 'latitude']
+
+
+def manifest(features=FEATURES):
+    return {'model_name': 'constant', 'feature_schema': [{'name': name, 'dtype': 'float64'} for name in features]}
+
+
+def test_publish_moves_current_and_keeps_only_the_newest_versions(tmp_path):
+    registry = ModelRegistry(str(tmp_path), keep_versions=2)
+    assert registry.current_version() is None
+
+    published = [registry.publish({'seconds': seconds}, manifest()) for seconds in (1, 2, 3)]
+
+    assert registry.current_version() == published[-1]
+    assert len(registry.versions()) == 2 and published[-1] in registry.versions()
+    model, loaded = registry.load(published[-1], compiled_inference=False)
+    assert model == {'seconds': 3}
+    assert loaded['version'] == published[-1] and 'model.pkl' in loaded['files']
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_serving_model_swaps_to_a_new_version_and_rejects_a_wrong_schema(tmp_path):
+    registry = ModelRegistry(str(tmp_path), keep_versions=3)
+    first = registry.publish({'seconds': 1}, manifest())
+    serving = ServingModel(registry, FEATURES, compiled_inference=False, reload_seconds=0)
+
+    assert serving.version == first and serving.model == {'seconds': 1}
+    assert serving.reload() is False
+
+    second = registry.publish({'seconds': 2}, manifest())
+    assert serving.reload() is True
+    assert serving.version == second and serving.model == {'seconds': 2}
+
+    registry.publish({'seconds': 3}, manifest(['package_weight']))
+    with pytest.raises(ValueError, match='expects features'):
+        serving.reload()
+    assert serving.version == second
+
+
+def test_background_reload_follows_the_current_pointer(tmp_path):
+    registry = ModelRegistry(str(tmp_path), keep_versions=3)
+    registry.publish({'seconds': 1}, manifest())
+    serving = ServingModel(registry, FEATURES, compiled_inference=False, reload_seconds=0.05)
+    try:
+        second = registry.publish({'seconds': 2}, manifest())
+        deadline = time.time() + 5
+        while serving.version != second and time.time() < deadline:
+            time.sleep(0.02)
+
+        assert serving.model == {'seconds': 2}
+        assert open(os.path.join(tmp_path, CURRENT_FILE)).read() == second
+    finally:
+        serving.stop()
@@ -0,0 +1,61 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.models.backends import BACKENDS
+from src.models.model_registry import ModelRegistry
+from src.models.prediction import FEATURE_COLUMNS, PredictionModel
+
+
+@pytest.fixture
+def predictor(tmp_path, monkeypatch):
+    predictor = PredictionModel()
+    predictor.registry = ModelRegistry(str(tmp_path / 'artifacts'), keep_versions=2)
+    monkeypatch.setattr(predictor, 'train_and_save_model', lambda: 'retrained')
+    return predictor
+
+
+def publish(predictor, name, watermark):
+    """A stand-in version of model name trained on deliveries up to watermark"""
+    return predictor.registry.publish(None, {'model_name': name, 'training_data': {'watermark': watermark}})
+
+
+def deliveries(times):
+    """Model inputs for deliveries at the given Unix seconds"""
+    rows = pd.DataFrame(0.0, index=range(len(times)), columns=FEATURE_COLUMNS)
+    rows['actual_delivery_time'] = times
+    return 'columnar', rows
+
+
+def test_models_without_incremental_training_wait_for_new_deliveries(predictor, monkeypatch):
+    publish(predictor, 'random_forest', watermark=1000)
+    min_new_rows = predictor.config['training']['incremental']['min_new_rows']
+
+    # Only deliveries after the watermark count; too few keep the published version
+    monkeypatch.setattr(predictor, '_load_training_data', lambda start=None: deliveries([1000] * (min_new_rows + 5)))
+    assert predictor.update_model() == {}
+
+    monkeypatch.setattr(predictor, '_load_training_data', lambda start=None: deliveries([2000] * min_new_rows))
+    assert predictor.update_model() == 'retrained'
+
+
+@pytest.mark.skipif(not os.path.isdir('/dev/shm'), reason='lists shared-memory blocks in /dev/shm')
+def test_parallel_training_fits_every_backend_over_shared_memory(predictor):
+    for params in predictor.config['models'].values():
+        for key in ('n_estimators', 'iterations'):
+            if key in params:
+                params[key] = 5
+    predictor._tuned_params = {}
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.uniform(0, 1, (300, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    y = X['distance_km'] * 100 + rng.normal(0, 1, len(X))
+    blocks_before = set(os.listdir('/dev/shm'))
+
+    scores, timings = predictor._train_models_parallel(X[:240], X[240:], y[:240], y[240:])
+
+    assert set(scores) == set(predictor._models) == set(BACKENDS)
+    assert set(timings) == set(BACKENDS) | {'total'}
+    for model in predictor._models.values():
+        assert model.predict(X[240:]).shape == (60,)
+    # Workers only attached to the blocks; the parent removed them all
+    assert set(os.listdir('/dev/shm')) <= blocks_before
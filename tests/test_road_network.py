@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+from src.models.road_network import RoadNetwork
+from src.utils.geo import haversine_km
+
+
+def make_network(tmp_path, disk_entries):
+    """Two connected nodes, each with a one-way arc, and a third node with no road to it"""
+    network_dir = tmp_path / 'network'
+    network_dir.mkdir()
+    pd.DataFrame({
+        'node_id': [1, 2, 3],
+        'latitude': [41.88, 41.89, 41.95],
+        'longitude': [-87.63, -87.63, -87.70]
+    }).to_csv(network_dir / 'nodes.csv', index=False)
+    pd.DataFrame({'source': [1, 2], 'target': [2, 1], 'travel_time_s': [60.0, 90.0], 'oneway': [True, True]}).to_csv(
+        network_dir / 'edges.csv', index=False
+    )
+    return RoadNetwork(str(network_dir), str(tmp_path / 'cache'), 16, 20, disk_entries, memory_entries=0)
+
+
+def test_disconnected_pairs_use_the_access_speed(tmp_path):
+    network = make_network(tmp_path, disk_entries=4)
+
+    seconds = network._node_matrix(np.array([0, 1, 2]))
+
+    assert seconds[0, 1] == 60.0 and seconds[1, 0] == 90.0
+    km = haversine_km(41.88, -87.63, 41.95, -87.70)
+    assert np.isclose(seconds[0, 2], km / 20 * 3600.0)
+
+
+def test_path_cache_keeps_disk_entries(tmp_path):
+    network = make_network(tmp_path, disk_entries=2)
+
+    for node_set in ([0, 1], [1, 2], [0, 2], [0, 1, 2]):
+        network._node_matrix(np.array(node_set))
+
+    assert len(list((tmp_path / 'cache').glob('*.npy'))) == 2
@@ -0,0 +1,54 @@
+import numpy as np
+from src.models.route_heuristics import clarke_wright, schedule_is_feasible, solve_savings_heuristic
+
+HORIZON = 600
+MAX_WAIT = 30
+
+
+def make_data(num_stops, num_vehicles, capacity=1000, seed=0):
+    """Stops on a line east of the depot, one minute per distance unit, windows wide open"""
+    rng = np.random.default_rng(seed)
+    positions = np.concatenate([[0], rng.integers(1, 100, num_stops)])
+    distance_matrix = np.abs(positions[:, np.newaxis] - positions[np.newaxis, :])
+    return {
+        'distance_matrix': distance_matrix,
+        'time_matrix': distance_matrix.copy(),
+        'time_windows': [[0, HORIZON]] * (num_stops + 1),
+        'demands': [0] + [10] * num_stops,
+        'vehicle_capacities': [capacity] * num_vehicles,
+        'num_vehicles': num_vehicles,
+        'depot': 0
+    }
+
+
+def test_every_savings_route_meets_windows_and_capacity():
+    data = make_data(40, num_vehicles=10, capacity=100)
+    # Staggered windows keep some merges infeasible
+    data['time_windows'] = [[0, HORIZON]] + [[i * 10, i * 10 + 120] for i in range(40)]
+
+    routes = solve_savings_heuristic(data, HORIZON, MAX_WAIT)
+
+    windows = np.asarray(data['time_windows'])
+    demands = np.asarray(data['demands'])
+    assert sorted(node for route in routes for node in route) == list(range(1, 41))
+    assert len(routes) <= data['num_vehicles']
+    for route in routes:
+        assert demands[route].sum() <= 100
+        assert schedule_is_feasible(route, data['time_matrix'], windows, HORIZON, MAX_WAIT)
+
+
+def test_unreachable_stop_is_not_planned():
+    data = make_data(5, num_vehicles=5)
+    # Stop 3 closes before a vehicle leaving the depot at 0 can reach it
+    data['time_windows'][3] = [0, data['distance_matrix'][0, 3] - 1]
+    args = (np.asarray(data['time_matrix']), np.asarray(data['demands']), 1000,
+            np.asarray(data['time_windows']), HORIZON, MAX_WAIT)
+
+    assert clarke_wright(data['distance_matrix'], *args) is None
+    assert solve_savings_heuristic(data, HORIZON, MAX_WAIT) is None
+
+
+def test_plan_over_the_fleet_is_rejected():
+    # 20 stops of 10 on vehicles of 50 need four routes
+    assert len(solve_savings_heuristic(make_data(20, num_vehicles=4, capacity=50), HORIZON, MAX_WAIT)) == 4
+    assert solve_savings_heuristic(make_data(20, num_vehicles=3, capacity=50), HORIZON, MAX_WAIT) is None
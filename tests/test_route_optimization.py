@@ -0,0 +1,219 @@
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from src.models import route_optimization
+from src.models.route_optimization import RouteOptimization
+from src.models.route_plan_cache import RoutePlanCache
+from src.utils.geo import DistanceMatrixCache
+
+
+@pytest.fixture
+def optimizer(tmp_path, monkeypatch):
+    """RouteOptimization with its caches and telemetry under tmp_path"""
+    monkeypatch.setattr(
+        route_optimization, 'DistanceMatrixCache',
+        lambda cache_dir, scale, max_entries: DistanceMatrixCache(str(tmp_path / 'distance'), scale, max_entries)
+    )
+    optimizer = RouteOptimization()
+    settings = optimizer.config['route_optimization']
+    settings.update(
+        telemetry_file=str(tmp_path / 'telemetry.jsonl'), travel_time_model='distance', incremental_time_limit=1
+    )
+    optimizer._use_settings(settings)
+    optimizer._plan_cache = RoutePlanCache(str(tmp_path / 'plans'), 8, 8)
+    return optimizer
+
+
+def make_orders(order_ids, hours, seed, vehicle_ids='VEH-000'):
+    rng = np.random.default_rng(seed)
+    today = pd.Timestamp(datetime.now().date())
+    return pd.DataFrame({
+        'order_id': order_ids,
+        'customer_location': [f'LOC-{order_id}' for order_id in order_ids],
+        'latitude': 41.88 + rng.uniform(-0.02, 0.02, len(order_ids)),
+        'longitude': -87.63 + rng.uniform(-0.02, 0.02, len(order_ids)),
+        'actual_delivery_time': [today + pd.Timedelta(hours=hour) for hour in hours],
+        'package_weight': 10.0,
+        'traffic_impact': 1.0,
+        'weather_impact': 1.0,
+        'vehicle_id': vehicle_ids,
+    })
+
+
+def stored_plan(orders_df, plan_date, shift):
+    """One stored route per shift, as solve_vrp labels and saves them"""
+    return [{
+        'route_id': f'ROUTE-{plan_date}-{shift.upper()}-VEH-000',
+        'vehicle_id': 'VEH-000',
+        'stops': [
+            {'order_id': row.order_id, 'location': row.customer_location, 'latitude': row.latitude,
+             'longitude': row.longitude, 'delivery_time': str(row.actual_delivery_time),
+             'package_weight': row.package_weight}
+            for row in orders_df.itertuples()
+        ],
+    }]
+
+
+def test_reoptimize_incremental_times_each_shift_from_its_start(optimizer, monkeypatch):
+    plan_date = datetime.now().strftime('%Y%m%d')
+    day_orders = make_orders(['D1', 'D2', 'D3', 'D4'], [9, 10, 10, 11], seed=1)
+    late_orders = make_orders(['L1', 'L2', 'L3', 'L4'], [17, 18, 19, 19], seed=2)
+    plans = {'day': stored_plan(day_orders, plan_date, 'day'), 'late': stored_plan(late_orders, plan_date, 'late')}
+    saved = []
+    monkeypatch.setattr(optimizer, '_load_delivery_data', lambda: pd.concat([day_orders, late_orders]))
+    monkeypatch.setattr(
+        optimizer, '_load_routes_from_db',
+        lambda date, shift=None: plans.get(shift, []) if shift else plans['day'] + plans['late']
+    )
+    monkeypatch.setattr(optimizer, '_save_route_diff', lambda previous, routes, date: saved.append(routes))
+
+    # Late-shift windows counted from midnight would start after the 600-minute horizon and fail the model
+    new_order = make_orders(['L5'], [18], seed=3)
+    routes = optimizer.reoptimize_incremental(new_orders=new_order, cancelled_order_ids=['D2'])
+
+    planned = {
+        route['route_id'].split('-')[2]: {stop['order_id'] for stop in route['stops']}
+        for route in routes if route['stops']
+    }
+    assert planned['DAY'] == {'D1', 'D3', 'D4'}
+    assert planned['LATE'] == {'L1', 'L2', 'L3', 'L4', 'L5'}
+    assert len(saved) == 2
+
+
+def test_decomposed_shift_with_only_its_depot_order(optimizer):
+    orders = make_orders(['D1'], [9], seed=4)
+    orders['shift_start'] = orders['actual_delivery_time'].dt.normalize() + pd.Timedelta(hours=8)
+
+    exact = optimizer._solve_orders(orders, 'exact')
+    decomposed = optimizer._solve_orders(orders, 'decomposed')
+
+    assert decomposed == exact
+    assert [[stop['order_id'] for stop in route['stops']] for route in decomposed] == [['D1']]
+
+
+def test_heuristic_shift_with_only_its_depot_order_is_planned_and_cached(optimizer):
+    orders = make_orders(['D1'], [9], seed=4)
+    orders['shift_start'] = orders['actual_delivery_time'].dt.normalize() + pd.Timedelta(hours=8)
+
+    routes = optimizer._solve_orders(orders, 'heuristic')
+
+    assert routes == optimizer._solve_orders(orders, 'exact')
+    assert optimizer._solve_orders(orders, 'heuristic') == routes
+    assert optimizer.plan_cache_stats()['hits'] == 1
+
+
+def test_orders_from_earlier_incremental_runs_keep_their_weight(optimizer, monkeypatch):
+    settings = optimizer.config['route_optimization']
+    settings['max_capacity'] = 30
+    optimizer._use_settings(settings)
+    plan_date = datetime.now().strftime('%Y%m%d')
+    # D1 is the depot row, so each vehicle leaves with 10 and has room for two stops of 10
+    day_orders = make_orders(['D1', 'D2', 'D3'], [9, 9, 10], seed=5, vehicle_ids=['V1', 'V2', 'V3'])
+    plans = {'day': stored_plan(day_orders.iloc[:2], plan_date, 'day')
+             + [dict(stored_plan(day_orders.iloc[[0, 2]], plan_date, 'day')[0], route_id='ROUTE-B', vehicle_id='V2')]}
+    monkeypatch.setattr(optimizer, '_load_delivery_data', lambda: day_orders)
+    monkeypatch.setattr(optimizer, '_load_routes_from_db', lambda date, shift=None: [
+        dict(route, stops=[dict(stop) for stop in route['stops']]) for route in plans.get(shift or 'day', [])
+    ])
+    monkeypatch.setattr(optimizer, '_save_route_diff', lambda previous, routes, date: plans.update(day=routes))
+
+    # New orders are only ever stored with the plan, so the second pass reads N1 and N2 back from it
+    optimizer.reoptimize_incremental(make_orders(['N1', 'N2'], [9, 10], seed=6, vehicle_ids='V4'), shift='day')
+    routes = optimizer.reoptimize_incremental(make_orders(['N3'], [10], seed=7, vehicle_ids='V5'), shift='day')
+
+    weights = {order_id: 10.0 for order_id in ['D1', 'D2', 'D3', 'N1', 'N2', 'N3']}
+    planned = [stop['order_id'] for route in routes for stop in route['stops'] if stop['order_id'] != 'D1']
+    assert sorted(planned) == ['D2', 'D3', 'N1', 'N2', 'N3']
+    for route in routes:
+        assert sum(weights[stop['order_id']] for stop in route['stops']) <= 30
+
+
+def test_shift_without_a_stored_plan_is_planned_from_todays_orders(optimizer, monkeypatch):
+    day_orders = make_orders(['D1', 'D2', 'D3'], [9, 10, 11], seed=8)
+    yesterday = make_orders(['Y1', 'Y2'], [9, 10], seed=9)
+    yesterday['actual_delivery_time'] -= pd.Timedelta(days=1)
+    saved = []
+    monkeypatch.setattr(optimizer, '_load_delivery_data', lambda: pd.concat([yesterday, day_orders]))
+    monkeypatch.setattr(optimizer, '_load_routes_from_db', lambda date, shift=None: [])
+    monkeypatch.setattr(optimizer, '_save_route_diff', lambda previous, routes, date: saved.append(routes))
+    monkeypatch.setattr(optimizer, 'solve_vrp', lambda mode=None: pytest.fail('re-planned the whole history'))
+
+    routes = optimizer.reoptimize_incremental(make_orders(['D4'], [12], seed=10), cancelled_order_ids=['D3'])
+
+    assert {stop['order_id'] for route in routes for stop in route['stops']} == {'D1', 'D2', 'D4'}
+    assert {route['route_id'].split('-')[2] for route in routes} == {'DAY'}
+    assert len(saved) == 1
+
+
+def test_cached_plans_are_not_reused_after_new_processed_data(optimizer, monkeypatch):
+    orders = make_orders(['DEPOT', 'A1', 'A2'], [9, 10, 11], seed=6)
+    orders['shift_start'] = pd.Timestamp(datetime.now().date()) + pd.Timedelta(hours=8)
+    optimizer.config['route_optimization']['travel_time_model'] = 'hourly'
+    monkeypatch.setattr(route_optimization, 'processed_data_version', lambda: 'build-1')
+
+    first = optimizer._plan_fingerprint(orders, 'heuristic')
+    assert optimizer._plan_fingerprint(orders, 'heuristic') == first
+    monkeypatch.setattr(route_optimization, 'processed_data_version', lambda: 'build-2')
+    assert optimizer._plan_fingerprint(orders, 'heuristic') != first
+
+
+def test_native_transits_cost_routes_by_the_matrix_and_demands(optimizer):
+    rng = np.random.default_rng(11)
+    # Asymmetric, so an arc registered the wrong way round would change the objective
+    distance_matrix = rng.integers(1, 30, (7, 7))
+    np.fill_diagonal(distance_matrix, 0)
+    demands = np.array([0, 10, 10, 10, 10, 10, 10])
+    data = {
+        'distance_matrix': distance_matrix,
+        'time_matrix': distance_matrix,
+        'time_windows': [[0, optimizer.config['route_optimization']['time_window']]] * 7,
+        'demands': demands,
+        'vehicle_capacities': [30, 30, 30],
+        'num_vehicles': 3,
+        'depot': 0
+    }
+    manager, routing = optimizer._create_routing_model(data)
+    optimizer._register_callbacks(routing, manager, data)
+
+    solution = routing.SolveWithParameters(optimizer._search_parameters(1))
+    node_routes = optimizer._extract_node_routes(solution, routing, manager)
+
+    assert sorted(node for route in node_routes for node in route[1:]) == list(range(1, 7))
+    assert solution.ObjectiveValue() == sum(
+        distance_matrix[route[i], (route + [0])[i + 1]] for route in node_routes for i in range(len(route))
+    )
+    for route in node_routes:
+        assert demands[route].sum() <= 30
+
+
+def test_portfolio_keeps_the_best_member_plan_within_the_shared_deadline(optimizer, monkeypatch):
+    settings = optimizer.config['route_optimization']
+    settings.update(adaptive_time_limit=False, time_limit=2, portfolio_target_gap=0.0)
+    optimizer._use_settings(settings)
+    monkeypatch.setattr(optimizer, '_max_workers', lambda: 2)
+    order_ids = ['D1'] + [f'A{i}' for i in range(12)]
+    orders = make_orders(order_ids, [9] + [10, 11, 12] * 4, seed=12, vehicle_ids=['V1', 'V2', 'V3'] * 4 + ['V1'])
+    orders['shift_start'] = pd.Timestamp(datetime.now().date()) + pd.Timedelta(hours=8)
+    optimizer.delivery_df = orders
+
+    start = time.monotonic()
+    routes = optimizer._solve_portfolio()
+    elapsed = time.monotonic() - start
+
+    planned = [stop['order_id'] for route in routes for stop in route['stops'] if stop['order_id'] != 'D1']
+    assert sorted(planned) == sorted(order_ids[1:])
+    # Members stop at the deadline; the rest is process start-up and shutdown
+    assert elapsed < settings['time_limit'] + 3
+
+    # Each member recorded its search; the plan kept is the best any of them found
+    members = [entry for entry in optimizer._telemetry.load() if entry['mode'].startswith('portfolio:')]
+    assert len(members) == 2
+    distance_matrix = optimizer._create_distance_matrix_vectorized()
+    rows = {order_id: row for row, order_id in enumerate(order_ids)}
+    cost = 0
+    for route in routes:
+        nodes = [rows[stop['order_id']] for stop in route['stops']] + [0]
+        cost += sum(distance_matrix[a, b] for a, b in zip(nodes, nodes[1:]))
+    assert cost == min(member['curve'][-1][1] for member in members)
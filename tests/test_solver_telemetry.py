@@ -0,0 +1,22 @@
+from src.models.solver_telemetry import TelemetryStore, adaptive_time_limit
+
+SETTINGS = {
+    'plateau_min_improvement': 0.005, 'min_history': 3, 'budget_safety_factor': 1.5,
+    'seconds_per_stop': 0.02, 'min_time_limit': 0.5, 'time_limit': 30
+}
+
+
+def test_adaptive_time_limit_only_learns_from_the_same_mode():
+    history = [{'mode': 'portfolio:SAVINGS/TABU_SEARCH', 'num_stops': 100, 'curve': [[0.1, 900], [20.0, 800]]}] * 5
+    # Portfolio curves do not count for exact solves, which fall back to the per-stop rate
+    assert adaptive_time_limit(100, history, SETTINGS, 'exact') == 2.0
+    assert adaptive_time_limit(100, history, SETTINGS, 'portfolio') == 30
+
+
+def test_telemetry_store_compacts_to_recent_history(tmp_path):
+    store = TelemetryStore(str(tmp_path / 'telemetry.jsonl'), max_history=3, max_kb=1)
+    for num_stops in range(40):
+        store.record('exact', num_stops, 1.0, [[0.1, 100]])
+
+    assert (tmp_path / 'telemetry.jsonl').stat().st_size <= 1024
+    assert [entry['num_stops'] for entry in store.load()] == [37, 38, 39]
@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+import textwrap
+import numpy as np
+import pandas as pd
+import pytest
+from src.database.columnar_cache import ColumnarDataset, write_columnar_dataset
+from src.models.prediction import FEATURE_COLUMNS
+from src.models.streaming import TrainingStream
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+# Runs in a fresh process so the peak is this training's alone; RssAnon leaves out the memory-mapped columns
+MEASURE_PEAK = textwrap.dedent('''
+    import sys, threading, time
+    import lightgbm, xgboost
+    from src.database.columnar_cache import ColumnarDataset
+    from src.models.prediction import FEATURE_COLUMNS
+    from src.models.streaming import TrainingStream, train_lightgbm_sampled, train_xgboost_sampled
+
+    def anonymous_rss():
+        with open('/proc/self/status') as f:
+            return next(int(line.split()[1]) * 1024 for line in f if line.startswith('RssAnon'))
+
+    stream = TrainingStream(ColumnarDataset(sys.argv[1]), FEATURE_COLUMNS, 'actual_delivery_time', int(sys.argv[2]), 20)
+    peak = [0]
+    def poll():
+        while True:
+            peak[0] = max(peak[0], anonymous_rss())
+            time.sleep(0.001)
+    baseline = anonymous_rss()
+    threading.Thread(target=poll, daemon=True).start()
+    params = {'n_estimators': 20, 'learning_rate': 0.1, 'num_leaves': 31}
+    _, xgboost_fraction = train_xgboost_sampled(stream, params, 1, stream.memory_budget * 0.5)
+    _, lightgbm_fraction = train_lightgbm_sampled(stream, params, 1, stream.memory_budget * 0.5)
+    print(peak[0] - baseline, xgboost_fraction, lightgbm_fraction)
+''')
+
+
+def make_history(root, num_rows, num_days, seed=0):
+    rng = np.random.default_rng(seed)
+    write_columnar_dataset(pd.DataFrame({
+        'order_id': [f'ORD-{i:07d}' for i in range(num_rows)],
+        'distance_km': rng.uniform(0, 2500, num_rows),
+        'delivery_priority': rng.choice(['Express', 'Same-day', 'Standard'], num_rows),
+        'package_weight': rng.uniform(1, 50, num_rows),
+        'traffic_impact': rng.choice([1.0, 1.2, 1.4], num_rows),
+        'weather_impact': rng.choice([1.0, 1.1, 1.3, 1.5], num_rows),
+        'average_delivery_time': rng.uniform(0, 2.6e6, num_rows),
+        'actual_delivery_time': pd.Timestamp('2024-01-01') + pd.to_timedelta(
+            rng.integers(0, num_days * 86400, num_rows), unit='s'
+        ),
+    }), root=str(root))
+
+
+def test_sample_is_spread_over_the_whole_history(tmp_path):
+    make_history(tmp_path, 20000, num_days=10)
+    stream = TrainingStream(ColumnarDataset(str(tmp_path)), FEATURE_COLUMNS, 'actual_delivery_time', 1, 20)
+
+    rows, fraction = stream.sample(1600)
+
+    # Exactly the capacity, in proportion from every day including the newest
+    assert sum(len(positions) for positions in rows.values()) == 1600
+    assert np.isclose(fraction, 1600 / 16000, rtol=0.05)
+    assert sorted(rows) == sorted(stream.dataset.partitions)
+    for date, positions in rows.items():
+        assert abs(len(positions) - 160) < 60
+        assert np.all(np.diff(positions) > 0)
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/status'), reason='reads RssAnon from /proc')
+def test_sampled_boosters_stay_within_the_memory_budget(tmp_path):
+    pytest.importorskip('xgboost')
+    pytest.importorskip('lightgbm')
+    make_history(tmp_path, 400000, num_days=30)
+    budget_mb = 16
+
+    output = subprocess.run(
+        [sys.executable, '-c', MEASURE_PEAK, str(tmp_path), str(budget_mb)],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    ).stdout.split()
+
+    peak_bytes, xgboost_fraction, lightgbm_fraction = int(output[-3]), float(output[-2]), float(output[-1])
+    # Both had to sample, so the budget and not the data size bounded them
+    assert xgboost_fraction < 1 and lightgbm_fraction < 1
+    assert peak_bytes <= budget_mb * 2**20
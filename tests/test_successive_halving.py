@@ -0,0 +1,65 @@
+from src.models.successive_halving import AshaScheduler, sample_configurations
+
+
+def run_sequentially(scheduler, score):
+    """One worker: start a trial, report it, repeat until the scheduler has nothing left"""
+    trials = []
+    while True:
+        trial = scheduler.next_trial()
+        if trial is None:
+            return trials
+        trials.append(trial)
+        scheduler.report(*trial, score(*trial))
+
+
+def test_rungs_grow_by_the_reduction_factor_up_to_all_rows():
+    assert AshaScheduler(9, 100, 900, 3).budgets == [100, 300, 900]
+    assert AshaScheduler(9, 1, 1000, 3).budgets == [1, 4, 12, 37, 111, 333, 1000]
+
+
+def test_top_third_of_a_rung_is_promoted_without_waiting_for_the_rest():
+    scheduler = AshaScheduler(9, 100, 900, 3)
+    for configuration, score in enumerate([0.1, 0.5, 0.3]):
+        assert scheduler.next_trial() == (configuration, 0)
+        scheduler.report(configuration, 0, score)
+
+    # Three results in rung 0: the best one moves up before the fourth configuration starts
+    assert scheduler.next_trial() == (1, 1)
+    assert scheduler.next_trial() == (3, 0)
+
+
+def test_failed_trials_are_never_promoted():
+    scheduler = AshaScheduler(3, 100, 900, 3)
+    for configuration in range(3):
+        scheduler.next_trial()
+        scheduler.report(configuration, 0, float('-inf') if configuration == 0 else 0.1 * configuration)
+
+    assert scheduler.next_trial() == (2, 1)
+    scheduler.report(2, 1, 0.5)
+    assert scheduler.next_trial() == (2, 2)
+    scheduler.report(2, 2, 0.6)
+    assert scheduler.next_trial() is None
+    assert scheduler.best() == (2, 2, 0.6)
+
+
+def test_best_configuration_reaches_the_full_data():
+    quality = [0.2, 0.9, 0.4, 0.7, 0.1, 0.5, 0.3, 0.8, 0.6]
+    scheduler = AshaScheduler(len(quality), 100, 900, 3)
+
+    trials = run_sequentially(scheduler, lambda configuration, rung: quality[configuration] + 0.01 * rung)
+
+    assert sorted(configuration for configuration, rung in trials if rung == 0) == list(range(len(quality)))
+    assert scheduler.best() == (1, 2, 0.92)
+    # Restricted to the other families' indices, the best is taken from whatever rung they reached
+    assert scheduler.best({0, 2, 4})[0] == 2
+
+
+def test_sample_configurations_splits_families_evenly():
+    space = {'xgboost': {'n_estimators': [50, 100, 200]}, 'lightgbm': {'num_leaves': [15, 31]}}
+    base = {'xgboost': {'n_estimators': 100, 'learning_rate': 0.1}, 'lightgbm': {'n_estimators': 100, 'num_leaves': 31}}
+
+    configurations = sample_configurations(space, base, 4, seed=0)
+
+    assert sorted(name for name, _ in configurations) == ['lightgbm', 'lightgbm', 'xgboost', 'xgboost']
+    for name, params in configurations:
+        assert set(params) == set(base[name])
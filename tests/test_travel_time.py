@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+from src.models.travel_time import HOURS_PER_DAY, HourlyImpactProfile, TravelTimeTensor
+
+
+def test_each_row_uses_the_hour_its_stop_is_left():
+    base_minutes = np.array([[0, 10, 20], [10, 0, 30], [20, 30, 0]])
+    factors = np.ones((HOURS_PER_DAY, 3))
+    factors[17] = [1.0, 1.5, 2.0]
+    tensor = TravelTimeTensor(base_minutes, factors, resolution=0.1)
+
+    matrix = tensor.departure_matrix([8, 17, 8])
+
+    assert matrix[0].tolist() == [0, 10, 20]
+    assert matrix[1].tolist() == [10, 0, 60]
+    assert matrix[2].tolist() == [20, 30, 0]
+    assert (tensor[17] == tensor.departure_matrix([17, 17, 17])).all()
+
+
+def test_long_legs_coarsen_the_quantization_instead_of_overflowing():
+    base_minutes = np.array([[0, 50000.0], [12.3, 0]])
+    tensor = TravelTimeTensor(base_minutes, np.ones((HOURS_PER_DAY, 2)), resolution=0.1)
+
+    assert tensor.resolution > 0.1
+    assert np.abs(tensor[0] - base_minutes).max() <= tensor.resolution
+    assert tensor.nbytes == 2 * 2 * 2 + HOURS_PER_DAY * 2 * 2
+
+
+def test_locations_fall_back_to_their_own_mean_then_the_fleet_hour():
+    history_df = pd.DataFrame({
+        'customer_location': ['LOC-A', 'LOC-A', 'LOC-B'],
+        'actual_delivery_time': pd.to_datetime(['2024-01-01 08:10', '2024-01-02 08:40', '2024-01-01 09:30']),
+        'traffic_impact': [1.2, 1.4, 1.0],
+        'weather_impact': [1.0, 1.0, 1.1],
+    })
+    profile = HourlyImpactProfile(history_df)
+
+    factors = profile.stop_factors(['LOC-A', 'LOC-UNSEEN'])
+
+    assert np.isclose(factors[8, 0], 1.3)
+    # LOC-A was never served at 9:00, so its own mean applies
+    assert np.isclose(factors[9, 0], 1.3)
+    # An unseen location takes the mean over all locations at that hour
+    assert np.isclose(factors[9, 1], 1.1)
+    assert np.isclose(factors[8, 1], 1.3)